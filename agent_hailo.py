@@ -5,26 +5,23 @@
 
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk, ImageOps, ImageDraw
+from PIL import Image, ImageTk, ImageDraw
 import threading
 import time
 import json
 import os
 import subprocess
 import random
-import re
 import sys
 import select
 import traceback
 import atexit
 import datetime
 import math
-from collections import deque
+import queue
 import warnings
 import wave
 import struct 
-import urllib.request
-import urllib.error
 
 # Core audio dependencies
 import sounddevice as sd
@@ -35,10 +32,21 @@ import scipy.signal
 from openwakeword.model import Model
 
 # Import unified core modules
-from core.llm import Brain, extract_json_object, strip_prompt_leakage
+from core.llm import Brain, extract_json_object
 from core.tts import play_audio_on_hardware
 from core.stt import transcribe_audio
+from core.images import get_image_service
+from core.camera import CameraUnavailable, get_camera_service
+from core.vlm import get_vlm_worker
+from core.thoughts import ThoughtPool
+from core.chiptune import JamEngine, JamSession
+from core.statebus import StateBus
+from core.power import ACTIVE, PowerGovernor, WakeGate, in_quiet_hours
+from core.timers import TimerService, format_duration, parse_timer_command
+from core import metrics, tracing
 from core.config import MIC_DEVICE_INDEX, MIC_SAMPLE_RATE, WAKE_WORD_MODEL, WAKE_WORD_THRESHOLD, ALSA_DEVICE, VOLUME
+from core.config import LLM_URL, METRICS_PORT, METRICS_INTERVAL_S, TIMER_JOURNAL, TIMER_MAX_LATE_S, JAM_DURATION_S
+from core.config import STRICT_STATE_TRANSITIONS, QUIET_HOURS, POWER_IDLE_FRAME_MS, POWER_NIGHT_FRAME_MS, WAKE_GATE
 
 # =========================================================================
 # 1. HARDWARE CONFIGURATION
@@ -86,6 +94,120 @@ class BotStates:
     LADYBUG = "ladybug"
     WORM = "worm"
 
+ALL_STATES = frozenset(v for k, v in vars(BotStates).items() if not k.startswith("_"))
+
+# Target state -> states it may be entered from (core/statebus.py); anything
+# not listed may be entered from anywhere.
+STATE_TRANSITIONS = {
+    # Start-up only, or starting over after an error
+    BotStates.WARMUP: frozenset({BotStates.ERROR}),
+    # Not mid-recording or mid-capture (a failed thought may drop back from SPEAKING)
+    BotStates.SCREENSAVER: ALL_STATES - {BotStates.WARMUP, BotStates.LISTENING, BotStates.CAPTURING},
+    # Photos are taken after the reply's lead-in
+    BotStates.CAPTURING: frozenset({BotStates.IDLE, BotStates.THINKING, BotStates.SPEAKING}),
+    # No new turn during start-up or mid-capture
+    BotStates.LISTENING: ALL_STATES - {BotStates.WARMUP, BotStates.CAPTURING},
+}
+
+# Short expressions the screensaver loop plays; they keep the idle power mode
+SCREENSAVER_GAGS = frozenset({
+    BotStates.HEART, BotStates.SLEEPY, BotStates.STARRY_EYED, BotStates.DIZZY,
+    BotStates.FOOTBALL, BotStates.DETECTIVE, BotStates.SIR_MANO, BotStates.LOW_BATTERY, BotStates.BEE,
+})
+
+class FaceCompositor:
+    """Blits face frames into one persistent on-screen PhotoImage.
+
+    Swapping the whole 800x480 PhotoImage on the label makes Tk push every
+    pixel to X11 on each tick.  Instead, each state's frames are diffed once
+    at load time; while a state is playing, only the rectangle that actually
+    changes between its frames (the mouth while speaking, the eyes for a
+    blink) is copied with Tk's `photo copy -from ... -to ...`.  Tk then
+    repaints just that damaged region."""
+
+    REPORT_INTERVAL_S = 30
+
+    def __init__(self, master, label, width, height):
+        self.tk = master.tk
+        self.label = label
+        self.width, self.height = width, height
+        self.screen = tk.PhotoImage(master=master, width=width, height=height)
+        self.frames = {}  # state -> [ImageTk.PhotoImage]
+        self.dirty = {}   # state -> (x0, y0, x1, y1) union of changed pixels, or None
+        self._shown = None  # (state, frame index) currently blitted into self.screen
+        # Frame-budget accounting: state -> [ticks, seconds, pixels, budget seconds]
+        self._stats = {}
+        self._report_at = time.time() + self.REPORT_INTERVAL_S
+
+    def add_state(self, state, pil_frames, photo_frames):
+        """Register a state's frames and compute the region they differ in."""
+        self.frames[state] = photo_frames
+        base = np.asarray(pil_frames[0].convert("RGB"))
+        changed = np.zeros(base.shape[:2], dtype=bool)
+        for img in pil_frames[1:]:
+            changed |= np.any(np.asarray(img.convert("RGB")) != base, axis=2)
+        rows = np.flatnonzero(changed.any(axis=1))
+        cols = np.flatnonzero(changed.any(axis=0))
+        if rows.size:
+            self.dirty[state] = (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+        else:
+            self.dirty[state] = None  # every frame identical — nothing to blit within the state
+
+    def render(self, state, idx, budget_ms):
+        """Show frame `idx` of `state`, copying only the pixels that changed."""
+        t0 = time.perf_counter()
+        # Image display (DISPLAY_IMAGE) points the label at another picture;
+        # re-attach the screen and force a full blit when we come back.
+        if str(self.label.cget("image")) != str(self.screen):
+            self.label.config(image=self.screen)
+            self._shown = None
+
+        pixels = 0
+        if self._shown != (state, idx):
+            src = self.frames[state][idx]
+            box = self.dirty.get(state)
+            if self._shown is not None and self._shown[0] == state:
+                if box is not None:
+                    x0, y0, x1, y1 = box
+                    self.tk.call(self.screen, "copy", src,
+                                 "-from", x0, y0, x1, y1, "-to", x0, y0)
+                    pixels = (x1 - x0) * (y1 - y0)
+            else:
+                self.tk.call(self.screen, "copy", src)
+                pixels = self.width * self.height
+            self._shown = (state, idx)
+
+        st = self._stats.setdefault(state, [0, 0.0, 0, 0.0])
+        st[0] += 1
+        st[1] += time.perf_counter() - t0
+        st[2] += pixels
+        st[3] += budget_ms / 1000.0
+        if time.time() >= self._report_at:
+            self._log_report()
+
+    def report(self):
+        """Per-state frame cost since the last report: ms/frame, % of the tick
+        budget spent blitting, and % of screen pixels pushed per frame."""
+        out = {}
+        for state, (ticks, secs, pixels, budget) in self._stats.items():
+            if not ticks:
+                continue
+            out[state] = {
+                "frames": ticks,
+                "ms_per_frame": secs * 1000.0 / ticks,
+                "budget_pct": 100.0 * secs / budget if budget else 0.0,
+                "pixels_pct": 100.0 * pixels / (ticks * self.width * self.height),
+            }
+        return out
+
+    def _log_report(self):
+        for state, r in sorted(self.report().items()):
+            print(f"[ANIM] {state}: {r['frames']} frames, {r['ms_per_frame']:.2f} ms/frame "
+                  f"({r['budget_pct']:.1f}% of budget), {r['pixels_pct']:.1f}% pixels/frame")
+        self._stats.clear()
+        self._report_at = time.time() + self.REPORT_INTERVAL_S
+
+
 class BotGUI:
 
     BG_WIDTH, BG_HEIGHT = 800, 480 
@@ -103,7 +225,12 @@ class BotGUI:
         self.thinking_sound_active = threading.Event()
         self.tts_active = threading.Event()
         self.manual_wake_event = threading.Event()
-        self.current_state = BotStates.WARMUP
+        # Work for the main loop to run between turns, as (kind, payload).
+        # Timer alarms arrive here instead of interrupting from their own thread.
+        self.events = queue.Queue()
+        # current_state lives here; waiters block on it instead of polling
+        self.bus = StateBus(BotStates.WARMUP, ALL_STATES, STATE_TRANSITIONS,
+                            strict=STRICT_STATE_TRANSITIONS)
         self.last_state_change = time.time()
         # Tracks the last real user/agent interaction.  Updated on wake fire,
         # tap, and trigger entry — NOT on every state transition.  Watchdog
@@ -114,6 +241,7 @@ class BotGUI:
         self.active_sounds = []
         self.current_audio_process = None
         self.tts_queue = []
+        self.jam = None  # JamSession while the procedural music engine is playing
         
         # Concurrency & Resource Management
         self.speak_lock = threading.Lock()
@@ -136,7 +264,6 @@ class BotGUI:
         
         # Memory
         self.brain = Brain()
-        self.recent_thoughts = deque(maxlen=20)
         
         # Mood System
         self.current_mood = 'neutral'
@@ -161,11 +288,17 @@ class BotGUI:
         self.screensaver_expr        = BotStates.IDLE
         self.screensaver_expr_until  = 0   # epoch when to pick next expression
         self.screensaver_expr_dur    = 10  # seconds (refreshed randomly each pick)
+        # Idle power: slower frames in the screensaver; at night also no
+        # expression churn and a VAD gate in front of the wake word
+        self.power = PowerGovernor(QUIET_HOURS, POWER_IDLE_FRAME_MS, POWER_NIGHT_FRAME_MS, WAKE_GATE)
+        self.wake_gate = WakeGate()
+        self._anim_after = None  # pending update_animation tick
 
 
         # Init UI
         self.background_label = tk.Label(master, bg='black')
         self.background_label.place(x=0, y=0, width=self.BG_WIDTH, height=self.BG_HEIGHT)
+        self.compositor = FaceCompositor(master, self.background_label, self.BG_WIDTH, self.BG_HEIGHT)
         
         # BMO-themed captions: dark green text on translucent lime-green background
         self.status_label = tk.Label(
@@ -220,19 +353,42 @@ class BotGUI:
         self.last_screensaver_audio_time = time.time()
         threading.Thread(target=self.screensaver_audio_loop, daemon=True).start()
 
-        # Pre-warm the VLM (Hailo NPU) so the first "what is this?" doesn't
-        # eat a ~3 s init tax mid-conversation.  Best-effort only.
-        def _warmup_vlm():
+        # Ready-to-speak thoughts (text + image URL + pre-synthesized audio),
+        # generated only while BMO is idle so the red button / screensaver
+        # musings play instantly instead of waiting on topic+search+LLM+TTS.
+        self.thought_pool = ThoughtPool(capacity=3, idle_check=self._idle_for_thoughts,
+                                        llm_lock=self.llm_lock, synthesize=True).start()
+
+        # Metrics: background system sampling + a tiny /metrics server, since
+        # the agent has no web server of its own.
+        self.metrics_collector = metrics.SystemCollector(
+            interval=METRICS_INTERVAL_S, llm_health_url=f"{LLM_URL.split('/api/')[0]}/api/tags").start()
+        if METRICS_PORT:
             try:
-                from core.llm import _get_vlm
-                _get_vlm()
-            except Exception as e:
-                print(f"[VLM] Warmup skipped: {e}")
-        threading.Thread(target=_warmup_vlm, daemon=True).start()
+                metrics.start_http_server(METRICS_PORT)
+                print(f"[METRICS] Serving http://0.0.0.0:{METRICS_PORT}/metrics", flush=True)
+            except OSError as e:
+                print(f"[METRICS] Could not bind port {METRICS_PORT}: {e}", flush=True)
+
+        # Timers: one scheduler thread; alarms come back through self.events.
+        # Pending timers are reloaded from the journal after a restart.
+        self.timers = TimerService(TIMER_JOURNAL, on_fire=lambda t: self.events.put(("timer", t)),
+                                   max_late_s=TIMER_MAX_LATE_S).start()
+
+        # Pre-warm the VLM (Hailo NPU) so the first "what is this?" doesn't
+        # eat a ~3 s init tax mid-conversation.  The worker loads it on its
+        # own thread; a missing HEF just leaves it in the "failed" state.
+        get_vlm_worker()
 
     def exit_fullscreen(self, event=None):
         # Signal all background threads to wind down before tearing the UI.
         self.stop_event.set()
+        self.bus.close()  # release every thread waiting on a state change
+        self.timers.stop()  # pending timers stay in the journal for next start
+        try:
+            get_camera_service().close()  # release the sensor for the next start
+        except Exception:
+            pass
         # Best-effort kill of any running audio so we don't leave aplay holding the device.
         try:
             self._kill_tts_pipeline()
@@ -251,12 +407,23 @@ class BotGUI:
             pass
         self.master.quit()
 
+    @property
+    def current_state(self):
+        return self.bus.state
+
+    @current_state.setter
+    def current_state(self, state):
+        # Quiet transitions (speak() without a status message) go through the bus too
+        if self.bus.set(state) and self.power.mode != ACTIVE:
+            self.master.after(0, self._kick_animation)
+
     def set_state(self, state, msg=""):
-        if state != self.current_state:
-            self.current_state = state
+        if self.bus.set(state, msg):
             self.current_frame = 0
             self.last_state_change = time.time()
             print(f"[STATE] {state.upper()}: {msg}")
+            if self.power.mode != ACTIVE:
+                self.master.after(0, self._kick_animation)
         if msg:
             self.master.after(0, lambda: self.status_label.config(text=msg))
 
@@ -266,6 +433,7 @@ class BotGUI:
         if self._busy_lock.acquire(blocking=False):
             self.is_busy = True
             self.last_user_interaction = time.time()
+            self.bus.notify()
             return True
         return False
 
@@ -276,17 +444,13 @@ class BotGUI:
             self._busy_lock.release()
         except RuntimeError:
             pass  # already unlocked
+        self.bus.notify()  # the mic loop and watchdog wait on this
 
-    def _wait_until_idle(self, states, poll_s: float = 0.5, timeout_s: float = 60.0) -> bool:
-        """Block until current_state is OUT of `states` or stop_event fires.
+    def _wait_until_idle(self, states, timeout_s: float = 60.0) -> bool:
+        """Block until current_state is OUT of `states` or shutdown.
         Returns True if we exited because we're no longer in those states,
         False on shutdown / timeout.  Bounded so worker threads can't hang."""
-        end = time.time() + timeout_s
-        while self.current_state in states:
-            if self.stop_event.is_set() or time.time() >= end:
-                return False
-            time.sleep(poll_s)
-        return True
+        return self.bus.wait_while(states, timeout=timeout_s)
 
     # ── Thinking-sound controller ────────────────────────────────────────────
     def _thinking_sound_start(self):
@@ -304,6 +468,7 @@ class BotGUI:
     def _thinking_sound_stop(self):
         """Signal the loop to exit; terminate the current sound process."""
         self.is_thinking_sound_playing = False
+        self.bus.notify()  # cut the gap between repeats short
         proc = self.thinking_audio_process
         self.thinking_audio_process = None
         if proc is not None:
@@ -321,14 +486,12 @@ class BotGUI:
                 self.thinking_audio_process = self.play_sound("thinking_sounds")
                 if self.thinking_audio_process:
                     self.thinking_audio_process.wait()
-                # Randomized 0.4–1.2 s gap between repeats — feels alive
-                gap_total = random.uniform(0.4, 1.2)
-                elapsed = 0.0
-                while elapsed < gap_total:
-                    if self.current_state != BotStates.THINKING or not self.is_thinking_sound_playing:
-                        break
-                    time.sleep(0.1)
-                    elapsed += 0.1
+                # Randomized 0.4–1.2 s gap between repeats — feels alive.
+                # Ends early the moment BMO stops thinking.
+                self.bus.wait_for(
+                    lambda: self.current_state != BotStates.THINKING or not self.is_thinking_sound_playing,
+                    timeout=random.uniform(0.4, 1.2),
+                )
         finally:
             self.thinking_audio_process = None
 
@@ -382,6 +545,7 @@ class BotGUI:
         elif self.current_state in [BotStates.IDLE, BotStates.SCREENSAVER]:
             print(f"[CLICK] Body: Manual Wake ({x},{y})")
             self.manual_wake_event.set()
+            self.bus.notify()
         else:
             print(f"[CLICK] Ignored in state {self.current_state} ({x},{y})")
 
@@ -419,6 +583,8 @@ class BotGUI:
 
     def _on_volume_change(self, val):
         self.volume = int(val) / 100.0
+        if self.jam is not None:
+            self.jam.gain = self.volume
         if self._volume_hide_job:
             self.master.after_cancel(self._volume_hide_job)
         self._volume_hide_job = self.master.after(4000, self._hide_volume_overlay)
@@ -549,6 +715,7 @@ class BotGUI:
             path = os.path.join("faces", state)
             files = sorted([f for f in os.listdir(path) if f.lower().endswith('.png')])
             frames = []
+            pil_frames = []
             for f in files:
                 try:
                     img = Image.open(os.path.join(path, f))
@@ -556,22 +723,47 @@ class BotGUI:
                     if img.size != (self.BG_WIDTH, self.BG_HEIGHT):
                         img = img.resize((self.BG_WIDTH, self.BG_HEIGHT), Image.Resampling.LANCZOS)
                     frames.append(ImageTk.PhotoImage(img))
+                    pil_frames.append(img)
                 except Exception as e:
                     print(f"Error loading frame {f}: {e}")
             if frames:
                 self.animations[state] = frames
+                self.compositor.add_state(state, pil_frames, frames)
         
         print(f"Loaded animations for: {list(self.animations.keys())}")
         self.tk_img = None
 
+    def _kick_animation(self):
+        """Run the next animation tick now instead of after a long low-power
+        interval, so leaving the screensaver looks instant (Tk thread)."""
+        if self._anim_after is not None:
+            self.master.after_cancel(self._anim_after)
+        self.update_animation()
+
+    def _update_power_mode(self):
+        state = self.current_state
+        old = self.power.update(state == BotStates.SCREENSAVER or (state in SCREENSAVER_GAGS and not self.is_busy))
+        if old is None:
+            return
+        if not self.power.gate_enabled:
+            self.wake_gate.reset()
+        stats = self.power.report().get(old)
+        if stats:
+            print(f"[POWER] {old} -> {self.power.mode} ({old}: {stats['cpu_pct']}% CPU, "
+                  f"{stats['wakeups_per_s']} wakeups/s over {stats['seconds']:.0f}s)")
+        else:
+            print(f"[POWER] {old} -> {self.power.mode}")
+
     def update_animation(self):
+        self.power.wakeup("frame")
         if self.current_state == BotStates.DISPLAY_IMAGE:
-            self.master.after(500, self.update_animation)
+            self._anim_after = self.master.after(500, self.update_animation)
             return
 
         now = time.time()
-        # Mood Logic
-        if now - self.last_mood_change > self.mood_duration:
+        self._update_power_mode()
+        # Mood Logic (held at night so nothing churns while everyone's asleep)
+        if not self.power.churn_paused and now - self.last_mood_change > self.mood_duration:
             self.current_mood = random.choice(list(self.expressions_map.keys()))
             self.last_mood_change = now
             print(f"[MOOD] BMO is now feeling: {self.current_mood}")
@@ -582,7 +774,13 @@ class BotGUI:
 
         # If in screensaver, pick expression randomly; change every 8-18 s
         display_state = self.current_state
-        if self.current_state == BotStates.SCREENSAVER:
+        if self.current_state == BotStates.SCREENSAVER and self.power.churn_paused:
+            # Night: settle on one sleepy face instead of re-picking every 8-18 s
+            if BotStates.SLEEPY in self.animations:
+                self.screensaver_expr = BotStates.SLEEPY
+            self.screensaver_expr_until = 0  # pick afresh once the night is over
+            display_state = self.screensaver_expr
+        elif self.current_state == BotStates.SCREENSAVER:
             if now >= self.screensaver_expr_until:
                 mood_pool = self.expressions_map[self.current_mood]
                 # 30 % chance to pull one extra from a random other mood for variety
@@ -628,20 +826,29 @@ class BotGUI:
                     self.current_frame = min(num_frames - 1, max(0, idx))
                 else:
                     self.current_frame = 0 # Closed
+            elif display_state == BotStates.JAMMING and self.jam is not None:
+                # Bob on the beat: two frames per beat of the music being heard
+                self.current_frame = int(self.jam.clock.beat() * 2) % len(frames)
             else:
                 self.current_frame = (self.current_frame + 1) % len(frames)
 
-            # Skip the Tk reconfigure when nothing actually changed — avoids
-            # syscalls when the speaking EMA holds the same frame for a while.
-            new_key = (display_state, self.current_frame)
-            if getattr(self, '_last_render_key', None) != new_key:
-                self.tk_img = frames[self.current_frame]
-                self.background_label.config(image=self.tk_img)
-                self._last_render_key = new_key
-
         # Dynamic frame rate: 40ms (25fps) for speaking lip-sync, 120ms for everything else
         interval = 40 if display_state == BotStates.SPEAKING else 120
-        self.master.after(interval, self.update_animation)
+        if display_state == BotStates.JAMMING and self.jam is not None:
+            # Wake up right on the next half-beat instead of up to 120 ms late
+            to_next = self.jam.clock.time_to_next(2)
+            if to_next is not None:
+                interval = max(20, min(120, int(to_next * 1000) + 1))
+        interval = self.power.frame_interval(interval)
+
+        if frames:
+            # The compositor skips the blit entirely when the frame is unchanged
+            # (speaking EMA holding a frame) and otherwise copies only the
+            # region that differs within the state (mouth / eyes).
+            shown_state = display_state if display_state in self.animations else BotStates.IDLE
+            self.compositor.render(shown_state, self.current_frame, interval)
+
+        self._anim_after = self.master.after(interval, self.update_animation)
 
     # --- AUDIO INPUT ---
     def wait_for_wakeword(self, oww):
@@ -652,9 +859,12 @@ class BotGUI:
         downsample_factor = capture_rate // target_rate
         
         print(f"[EARS] Waiting for wake word... (Index: {MIC_DEVICE_INDEX}, Rate: {capture_rate})")
+        self._wake_detect_s = None  # stays None for manual taps
         
         retry_count = 0
         while not self.stop_event.is_set():
+            if self._event_ready():
+                return False
             try:
                 # Use a smaller blocksize to reduce latency
                 with sd.InputStream(samplerate=capture_rate, device=MIC_DEVICE_INDEX, channels=1, dtype='int16', blocksize=CHUNK * downsample_factor) as stream:
@@ -667,10 +877,14 @@ class BotGUI:
                             return True
 
                         if self.is_busy:
-                            time.sleep(0.5)
+                            # Sleep until the busy holder lets go (or a tap / shutdown)
+                            self.bus.wait_for(lambda: not self.is_busy or self.manual_wake_event.is_set())
                             last_data_time = time.time() # Reset watchdog
                             continue
-                            
+
+                        if self._event_ready():
+                            return False  # main_loop delivers it, then comes back here
+
                         data, overflowed = stream.read(CHUNK * downsample_factor)
                         
                         # Real failure modes: None / wrong-shape data
@@ -682,34 +896,47 @@ class BotGUI:
                             continue
 
                         last_data_time = time.time()  # Pet the watchdog (we got real data)
+                        self.power.wakeup("mic")
 
                         # 1. Quick Volume Check (Skip OWW if it's too quiet)
                         # All-zero arrays are valid (quiet room) — don't treat as a mic failure.
-                        current_max = np.max(np.abs(data))
-                        if current_max < 250: # Adjust threshold as needed
-                            continue
-
-                        # 2. Down-sample 48 kHz → 16 kHz with an IIR low-pass
-                        # before decimating.  Nearest-neighbor slicing aliases
-                        # high-frequency speech content into the OWW band and
-                        # hurts wake-word reliability in noisy rooms.
-                        flat = data.flatten()
-                        if downsample_factor >= 2:
-                            audio_16k = scipy.signal.decimate(
-                                flat, downsample_factor, ftype='iir', zero_phase=False,
-                            ).astype(np.int16)
+                        # At night the VAD gate decides instead, against the room's noise floor.
+                        if self.power.gate_enabled:
+                            chunks = self.wake_gate.feed(data)
+                            if not chunks:
+                                continue
                         else:
-                            audio_16k = flat
-
-                        # 3. Predict
-                        oww.predict(audio_16k)
-                        
-                        for key in oww.prediction_buffer.keys():
-                            score = oww.prediction_buffer[key][-1]
-                            if score > WAKE_WORD_THRESHOLD:
-                                print(f"[EARS] Wake Word Detected: {key} (Score: {score:.2f})")
-                                oww.reset()
-                                return True
+                            current_max = np.max(np.abs(data))
+                            if current_max < 250: # Adjust threshold as needed
+                                continue
+                            chunks = [data]
+
+                        for chunk in chunks:
+                            # 2. Down-sample 48 kHz → 16 kHz with an IIR low-pass
+                            # before decimating.  Nearest-neighbor slicing aliases
+                            # high-frequency speech content into the OWW band and
+                            # hurts wake-word reliability in noisy rooms.
+                            t_detect = time.perf_counter()
+                            flat = chunk.flatten()
+                            if downsample_factor >= 2:
+                                audio_16k = scipy.signal.decimate(
+                                    flat, downsample_factor, ftype='iir', zero_phase=False,
+                                ).astype(np.int16)
+                            else:
+                                audio_16k = flat
+
+                            # 3. Predict
+                            self.power.wakeup("wakeword")
+                            oww.predict(audio_16k)
+
+                            for key in oww.prediction_buffer.keys():
+                                score = oww.prediction_buffer[key][-1]
+                                if score > WAKE_WORD_THRESHOLD:
+                                    print(f"[EARS] Wake Word Detected: {key} (Score: {score:.2f})")
+                                    self._wake_detect_s = time.perf_counter() - t_detect
+                                    oww.reset()
+                                    self.wake_gate.reset()
+                                    return True
             except Exception as e:
                 retry_count += 1
                 print(f"[EARS] Audio Input Error (Attempt {retry_count}): {e}")
@@ -786,43 +1013,87 @@ class BotGUI:
         # Down-sample 48 kHz → 16 kHz with a polyphase filter (better than the
         # old ffmpeg subprocess + extra disk write). 48000 / 3 = 16000 exactly.
         import scipy.io.wavfile
-        ratio = MIC_SAMPLE_RATE // 16000
-        if MIC_SAMPLE_RATE == 16000 or ratio < 2:
-            data_16k = data.flatten()
-        else:
-            data_16k = scipy.signal.resample_poly(data.flatten().astype(np.float32), 1, ratio)
-            data_16k = np.clip(data_16k, -32768, 32767).astype(np.int16)
-        scipy.io.wavfile.write(filename, 16000, data_16k)
+        with tracing.span("resample"):
+            ratio = MIC_SAMPLE_RATE // 16000
+            if MIC_SAMPLE_RATE == 16000 or ratio < 2:
+                data_16k = data.flatten()
+            else:
+                data_16k = scipy.signal.resample_poly(data.flatten().astype(np.float32), 1, ratio)
+                data_16k = np.clip(data_16k, -32768, 32767).astype(np.int16)
+            scipy.io.wavfile.write(filename, 16000, data_16k)
         return filename
     # --- TIMERS & REMINDERS ---
-    def start_timer_thread(self, minutes, message):
-        def timer_worker():
-            print(f"[TIMER SET] for {minutes} minutes. Message: {message}")
-            # Wait on stop_event so app shutdown drains the timer immediately.
-            if self.stop_event.wait(timeout=minutes * 60):
-                print(f"[TIMER CANCELLED] (app shutting down): {message}")
+    def _event_ready(self):
+        """True if a queued event is waiting and nothing else holds the busy lock."""
+        return not self.is_busy and not self.events.empty()
+
+    def _run_pending_events(self):
+        """Deliver queued events (timer alarms) between turns, holding the busy
+        lock so no trigger flow or screensaver thought talks over them."""
+        while not self.stop_event.is_set():
+            try:
+                kind, payload = self.events.get_nowait()
+            except queue.Empty:
                 return
-            print(f"[TIMER DONE] {message}")
-            
-            # Wait for BMO to finish speaking/listening to avoid ALSA conflicts
-            self._wait_until_idle({BotStates.SPEAKING, BotStates.LISTENING}, poll_s=1.0, timeout_s=120)
-                
-            # Interject the alarm
-            old_state = self.current_state
-            self.set_state(BotStates.HAPPY, "Reminder!")
-            # Play an alert noise if we have one
-            alert_proc = self.play_sound("ack_sounds")
-            if alert_proc:
-                alert_proc.wait()
-                
-            self.speak(message, msg="Reminder!")
-            
-            # Return BMO to whatever they were doing (e.g. IDLE or SCREENSAVER)
-            time.sleep(1)
-            if self.current_state == BotStates.IDLE:
-                self.set_state(old_state if old_state != BotStates.HAPPY else BotStates.IDLE, "Ready")
-                
-        threading.Thread(target=timer_worker, daemon=True).start()
+            if not self._busy_lock.acquire(timeout=2.0):
+                self.events.put((kind, payload))  # a trigger flow is running; retry next loop
+                return
+            self.is_busy = True
+            self.bus.notify()
+            try:
+                if kind == "timer":
+                    self._ring_timer(payload)
+            except Exception as e:
+                print(f"[EVENTS] {kind} failed: {e}")
+            finally:
+                self._release_busy()
+
+    def _ring_timer(self, timer):
+        late_s = time.time() - timer.due
+        print(f"[TIMER DONE] {timer.message}" + (f" ({late_s:.0f}s late)" if late_s > 60 else ""))
+        old_state = self.current_state
+        self.set_state(BotStates.HAPPY, "Reminder!")
+        # Play an alert noise if we have one
+        alert_proc = self.play_sound("ack_sounds")
+        if alert_proc:
+            alert_proc.wait()
+
+        message = timer.message
+        if late_s > 60:
+            message = f"While I was away, a reminder came due {format_duration(late_s)} ago. {message}"
+        self.speak(message, msg="Reminder!")
+
+        # Return BMO to whatever they were doing (e.g. IDLE or SCREENSAVER)
+        time.sleep(1)
+        if self.current_state == BotStates.IDLE:
+            self.set_state(old_state if old_state != BotStates.HAPPY else BotStates.IDLE, "Ready")
+
+    def _timer_command_reply(self, user_text):
+        """Answer list / cancel / snooze requests without the LLM. None if the
+        text isn't one of those."""
+        cmd = parse_timer_command(user_text)
+        if cmd is None:
+            return None
+        op, arg = cmd
+        if op == "list":
+            pending = self.timers.list()
+            if not pending:
+                return "You don't have any timers right now!"
+            parts = [f"{t.message} in {format_duration(t.remaining())}" for t in pending[:3]]
+            more = f", plus {len(pending) - 3} more" if len(pending) > 3 else ""
+            count = "one timer" if len(pending) == 1 else f"{len(pending)} timers"
+            return f"BMO has {count}: " + "; ".join(parts) + more + "."
+        if op == "cancel":
+            cancelled = self.timers.cancel_all() if arg else [t for t in [self.timers.cancel()] if t]
+            if not cancelled:
+                return "There are no timers to cancel!"
+            if len(cancelled) == 1:
+                return f"Okay, I cancelled your timer: {cancelled[0].message}"
+            return f"Okay, I cancelled all {len(cancelled)} timers."
+        timer = self.timers.snooze(arg)
+        if timer is None:
+            return "There's nothing to snooze!"
+        return f"Snoozed! I'll remind you again in {format_duration(timer.remaining())}."
 
     # --- STT & TTS ---
     def transcribe(self, filename):
@@ -1019,13 +1290,14 @@ class BotGUI:
                 stderr=subprocess.DEVNULL,
             )
 
-        # Reader thread: Piper stdout → aplay stdin (with lip-sync)
+        # Reader thread: Piper stdout → aplay stdin (with lip-sync).  The
+        # turn is handed over explicitly — trace context doesn't cross threads.
         self._piper_reader_thread = threading.Thread(
-            target=self._piper_to_aplay_loop, daemon=True
+            target=self._piper_to_aplay_loop, args=(tracing.current(),), daemon=True
         )
         self._piper_reader_thread.start()
 
-    def _piper_to_aplay_loop(self):
+    def _piper_to_aplay_loop(self, turn=None):
         """Read Piper's raw PCM output and stream it into aplay with lip-sync."""
         chunk_size = 512  # samples (~23 ms at 22050 Hz)
         start_time = None
@@ -1044,6 +1316,8 @@ class BotGUI:
 
             if start_time is None:
                 start_time = time.time()
+                if turn is not None:
+                    turn.mark("piper_first_pcm")
 
             # Lip-sync from unscaled signal, then apply software volume before playback
             audio_chunk = np.frombuffer(raw_chunk, dtype=np.int16)
@@ -1064,6 +1338,9 @@ class BotGUI:
             except (BrokenPipeError, OSError) as e:
                 print(f"[TTS] aplay write error: {e}")
                 break
+            if turn is not None and chunk_idx == 0:
+                turn.mark("first_audio")
+            chunk_idx += 1
 
             # No manual pacing: aplay's 500 ms hardware buffer applies natural
             # back-pressure on stdin.write once it's full. The old time.sleep()
@@ -1250,6 +1527,26 @@ class BotGUI:
 
 
 
+    def _speak_stream(self, sentences, on_first=None):
+        """Feed a sentence generator (stream_think / stream_analyze_image) to
+        _handle_response_chunk as it arrives. One sentence is held back so the
+        last one can be flagged and the TTS turn drains. Returns the full text."""
+        full = ""
+        it = iter(sentences)
+        try:
+            chunk = next(it)
+        except StopIteration:
+            return full
+        if on_first:
+            on_first()
+        for next_chunk in it:
+            # If we got here, 'chunk' is not the last one
+            self._handle_response_chunk(chunk, is_last=False)
+            full += chunk
+            chunk = next_chunk
+        self._handle_response_chunk(chunk, is_last=True)
+        return full + chunk
+
     def _handle_response_chunk(self, chunk, is_last=True):
         """Processes a single chunk from the LLM, handling actions and speech."""
         if not chunk.strip():
@@ -1264,9 +1561,14 @@ class BotGUI:
         if action_data is not None:
             if action_data.get("action") == "take_photo":
                 self.taking_photo = True
+                # Start the camera stream now — the lead-in is still being spoken
+                get_camera_service().warm(get_vlm_worker().frame_shape)
                 return
             if action_data.get("action") == "display_image":
                 self.current_image_url = action_data.get("image_url")
+                if self.current_image_url:
+                    # Start downloading/decoding now — the lead-in is still being spoken
+                    get_image_service().prefetch(self.current_image_url)
                 chunk = (chunk[:span[0]] + chunk[span[1]:]).strip()
             elif action_data.get("action") == "set_expression":
                 expr = (action_data.get("value") or "").lower()
@@ -1284,16 +1586,7 @@ class BotGUI:
                 def music_worker():
                     if not self._wait_until_idle({BotStates.SPEAKING, BotStates.THINKING}):
                         return  # shutdown
-                    music_proc = self.play_sound("music")
-                    if music_proc:
-                        self.set_state(BotStates.JAMMING, "Jamming!")
-                        try:
-                            music_proc.wait(timeout=600)
-                        except subprocess.TimeoutExpired:
-                            try: music_proc.terminate()
-                            except Exception: pass
-                        if self.current_state == BotStates.JAMMING:
-                            self.set_state(BotStates.IDLE, "Tap to speak")
+                    self.play_music()
                 threading.Thread(target=music_worker, daemon=True).start()
                 chunk = (chunk[:span[0]] + chunk[span[1]:]).strip()
             elif action_data.get("action") == "set_timer":
@@ -1304,8 +1597,8 @@ class BotGUI:
                     minutes = float(raw_min)
                     minutes = max(0.05, min(720.0, minutes))  # 3 s … 12 h
                     msg_text = action_data.get("message") or "Timer is up!"
-                    self.start_timer_thread(minutes, str(msg_text))
-                    print(f"[TIMER] Scheduled: {minutes} min — {msg_text!r}")
+                    timer = self.timers.add(minutes * 60, str(msg_text))
+                    print(f"[TIMER] Scheduled {timer.id}: {minutes} min — {msg_text!r}")
                 except (TypeError, ValueError) as e:
                     print(f"[TIMER] Bad set_timer payload {action_data!r}: {e}")
                 chunk = (chunk[:span[0]] + chunk[span[1]:]).strip()
@@ -1339,8 +1632,9 @@ class BotGUI:
             self.set_state(BotStates.IDLE, "Tap to speak")
 
         while not self.stop_event.is_set():
-            # 1. Wait for Wake Word
+            # 1. Wait for Wake Word (queued events such as timer alarms run first)
             self._release_busy()
+            self._run_pending_events()
             if self.wait_for_wakeword(oww):
                 # Block briefly if a trigger flow is mid-run; gives up after 2 s
                 if not self._busy_lock.acquire(timeout=2.0):
@@ -1348,23 +1642,41 @@ class BotGUI:
                     continue
                 self.is_busy = True
                 self.last_user_interaction = time.time()
+                self.bus.notify()
+                # Per-stage timings for this turn (see core/tracing.py)
+                turn = tracing.start_turn("voice").activate()
+                if self._wake_detect_s is not None:
+                    turn.record("wake_detect", self._wake_detect_s)
                 # 2. Record
                 self.set_state(BotStates.LISTENING, "Listening...")
                 # Pre-warm Piper in parallel with STT so the first TTS chunk has zero start-up gap
                 threading.Thread(target=self._warmup_piper, daemon=True).start()
-                wav_file = self.record_audio()
+                with turn.span("record"):
+                    wav_file = self.record_audio()
                 
                 # 3. Transcribe
                 self.set_state(BotStates.THINKING, "Transcribing...")
                 self._thinking_sound_start()
 
-                user_text = self.transcribe(wav_file)
+                with turn.span("stt"):
+                    user_text = self.transcribe(wav_file)
                 print(f"User Transcribed: {user_text}")
                 
                 if len(user_text) < 2:
                     self.set_state(BotStates.IDLE, "Tap to speak")
                     self._release_busy()
                     self._thinking_sound_stop()
+                    turn.end()
+                    continue
+
+                # Timer management ("what timers do I have", "cancel my timer",
+                # "snooze") is answered locally — no LLM round-trip.
+                timer_reply = self._timer_command_reply(user_text)
+                if timer_reply:
+                    self.speak(timer_reply)
+                    self.set_state(BotStates.IDLE, "Tap to speak")
+                    turn.end()
+                    self._release_busy()
                     continue
 
                 # 4. LLM
@@ -1375,30 +1687,13 @@ class BotGUI:
 
 
                 try:
-                    full_response = ""
                     self.current_image_url = None
                     self.taking_photo = False
                     
                     # Lock LLM access to prevent screensaver interference
                     with self.llm_lock:
-                        # Use a peekable-style approach to detect the last chunk
-                        gen = self.brain.stream_think(user_text)
-                        try:
-                            chunk = next(gen)
-                            while True:
-                                try:
-                                    next_chunk = next(gen)
-                                    # If we got here, 'chunk' is not the last one
-                                    self._handle_response_chunk(chunk, is_last=False)
-                                    full_response += chunk
-                                    chunk = next_chunk
-                                except StopIteration:
-                                    # 'chunk' was the last one
-                                    self._handle_response_chunk(chunk, is_last=True)
-                                    full_response += chunk
-                                    break
-                        except StopIteration:
-                            pass
+                        self._speak_stream(self.brain.stream_think(user_text),
+                                           on_first=lambda: turn.mark("first_sentence"))
 
                     image_url = self.current_image_url
                     taking_photo = self.taking_photo
@@ -1406,41 +1701,26 @@ class BotGUI:
                     if taking_photo:
                         self.set_state(BotStates.CAPTURING, "Taking Photo...")
                         try:
-                            # Try libcamera-still (older) or rpicam-still (newer Pi OS)
-                            cam_cmd = None
-                            for candidate in ['libcamera-still', 'rpicam-still']:
-                                r = subprocess.run(['which', candidate], capture_output=True)
-                                if r.returncode == 0:
-                                    cam_cmd = candidate
-                                    break
-                            if cam_cmd is None:
-                                raise FileNotFoundError("No camera command found (libcamera-still / rpicam-still)")
-                            # Cap at 15 s — camera firmware can hang on USB glitches
-                            subprocess.run(
-                                [cam_cmd, '-o', 'temp.jpg', '--width', '640', '--height', '480',
-                                 '--nopreview', '-t', '2000', '--autofocus-mode', 'continuous'],
-                                check=True, timeout=15,
-                            )
-                            import base64
-                            with open('temp.jpg', 'rb') as img_file:
-                                b64_string = base64.b64encode(img_file.read()).decode('utf-8')
+                            # The stream has been warming since the take_photo action
+                            # arrived; the frame comes back at the VLM's input shape
+                            # (if the VLM has loaded) with no file or base64 round trip.
+                            frame = get_camera_service().capture(get_vlm_worker().frame_shape)
                             self.set_state(BotStates.THINKING, "Analyzing...")
                             self._thinking_sound_start()  # Idempotent — reuses existing loop if alive
-                            response = self.brain.analyze_image(b64_string, user_text)
-                            self._thinking_sound_stop()
-                            # Clean up the captured image — we don't need it anymore
+                            # Speak each sentence as soon as the VLM finishes it;
+                            # the NPU keeps decoding the rest meanwhile.
                             try:
-                                if os.path.exists('temp.jpg'):
-                                    os.remove('temp.jpg')
-                            except Exception:
-                                pass
-                            self.speak(response)
-                        except FileNotFoundError as e:
+                                self._speak_stream(self.brain.stream_analyze_image(None, user_text, frame=frame),
+                                                   on_first=self._thinking_sound_stop)
+                            finally:
+                                # An empty or failed stream never calls on_first
+                                self._thinking_sound_stop()
+                        except CameraUnavailable as e:
                             print(f"Camera Error: {e}")
                             self.speak("Hmm, BMO doesn't seem to have a camera connected right now. I can't take a photo!")
 
-                        except subprocess.TimeoutExpired:
-                            print("Camera Error: capture timed out after 15 s")
+                        except TimeoutError as e:
+                            print(f"Camera Error: {e}")
                             self.speak("My camera took too long to respond. Let's try that again later!")
 
                         except Exception as e:
@@ -1455,47 +1735,10 @@ class BotGUI:
                         self.set_state(BotStates.DISPLAY_IMAGE, "Showing Image...")
                         print(f"[IMAGE] Starting image display for: {image_url}")
                         try:
-                            # Note: migrated to loremflickr
-                            print(f"[IMAGE] Downloading: {image_url}")
-                            req = urllib.request.Request(image_url, headers={'User-Agent': 'Mozilla/5.0'})
-                            with urllib.request.urlopen(req, timeout=8) as u:
-                                raw_data = u.read()
-                            print(f"[IMAGE] Downloaded: {len(raw_data)} bytes")
-                            from io import BytesIO
-                            from PIL import ImageOps, ImageDraw
-                            
-                            def apply_bmo_border(pil_img):
-                                # Resize and crop image to fit inside the inner LCD screen
-                                lcd_w, lcd_h = self.BG_WIDTH - 60, self.BG_HEIGHT - 60
-                                # Cover/resize logic
-                                img_ratio = pil_img.width / pil_img.height
-                                target_ratio = lcd_w / lcd_h
-                                if img_ratio > target_ratio:
-                                    # Image is wider, scale to height and crop width
-                                    new_h = lcd_h
-                                    new_w = int(new_h * img_ratio)
-                                else:
-                                    # Image is taller, scale to width and crop height
-                                    new_w = lcd_w
-                                    new_h = int(new_w / img_ratio)
-                                
-                                pil_img = pil_img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                                # Crop center
-                                left = (new_w - lcd_w) / 2
-                                top = (new_h - lcd_h) / 2
-                                right = (new_w + lcd_w) / 2
-                                bottom = (new_h + lcd_h) / 2
-                                pil_img = pil_img.crop((left, top, right, bottom))
-                                
-                                # Add inner thick dark LCD bezel
-                                pil_img = ImageOps.expand(pil_img, border=10, fill="#1c201a")
-                                # Add BMO Teal outer casing
-                                pil_img = ImageOps.expand(pil_img, border=20, fill="#38b5a0")
-                                return pil_img
-
-                            img = Image.open(BytesIO(raw_data))
-                            img = apply_bmo_border(img)
-                            
+                            # Usually already fetched: _handle_response_chunk
+                            # prefetched it while the lead-in was being spoken.
+                            img = get_image_service().get(image_url, timeout=15)
+
                             # Schedule Tkinter update on main thread for thread safety
                             def show_image(pil_img=img):
                                 try:
@@ -1504,7 +1747,7 @@ class BotGUI:
                                     print("[IMAGE] Displayed on screen")
                                 except Exception as e:
                                     print(f"[IMAGE] Tkinter display error: {e}")
-                            
+
                             self.master.after(0, show_image)
                         except Exception as e:
                             print(f"[IMAGE] Download/Display Error: {e}")
@@ -1514,6 +1757,8 @@ class BotGUI:
                     traceback.print_exc()
 
                 self.set_state(BotStates.IDLE, "Tap to speak")
+                turn.end()
+                print(f"[TRACE] {turn.stages}")
 
                 self._release_busy()
                 # 1-second ALSA cooldown before re-opening the mic stream.
@@ -1530,56 +1775,25 @@ class BotGUI:
             return  # another flow holds the busy lock
 
         def run_thought():
-            from core.search import search_web, search_images
-            from core.config import LLM_URL, FAST_LLM_MODEL
-            import requests as http_requests
-
             try:
-                topics = [
-                    "interesting fun fact of the day", "weather forecast today in Brantford, Ontario",
-                    "this day in history", "cool science discovery this week", "funny animal fact",
-                    "random wholesome internet story", "video game history fact", "weird food fact",
-                    "Adventure Time lore or trivia", "today's astronomy picture", "best joke of the day",
-                    "funny dad jokes", "hilarious puns", "unusual world records"
-                ]
-
-                topic = random.choice(topics)
-                for _ in range(3):
-                    if topic in self.recent_thoughts:
-                        topic = random.choice(topics)
-                    else:
-                        break
-
-                print(f"[BUTTON] Manually triggering thought for: {topic}")
-                self.set_state(BotStates.THINKING, "Thinking...")
+                thought = self.thought_pool.take()
+                if thought is None:
+                    # Pool empty (just booted, or drained) — generate on demand
+                    print("[BUTTON] Thought pool empty, generating on demand...")
+                    self.set_state(BotStates.THINKING, "Thinking...")
+                    thought = self.thought_pool.make_now()
+                if thought is None:
+                    self.set_state(BotStates.IDLE, "Tap to speak")
+                    return
 
-                search_result = search_web(topic)
-                if search_result and search_result not in ("SEARCH_EMPTY", "SEARCH_ERROR"):
-                    phrase = self.generate_thought_internal(search_result)
-
-                    if phrase:
-                        self.recent_thoughts.append(topic)
-                        # Check for image URL or subject (brace-balanced JSON)
-                        image_url = None
-                        action_data, span = extract_json_object(phrase)
-                        if action_data is not None and action_data.get("action") == "display_image":
-                            subject = action_data.get("subject") or action_data.get("image_url")
-                            if subject:
-                                if "://" in subject:
-                                    image_url = subject
-                                else:
-                                    image_url = search_images(subject)
-                            phrase = (phrase[:span[0]] + phrase[span[1]:]).strip()
-
-                        self.speak(phrase, msg="Pondering...")
-                        if image_url:
-                            # Wait for BMO to start speaking before showing image
-                            time.sleep(1.5)
-                            self.display_remote_image(image_url, commentary_prompt=topic)
-                        else:
-                            self.set_state(BotStates.IDLE, "Tap to speak")
-                    else:
-                        self.set_state(BotStates.IDLE, "Tap to speak")
+                print(f"[BUTTON] Thought about: {thought.topic}")
+                if thought.image_url:
+                    get_image_service().prefetch(thought.image_url)
+                self.speak_thought(thought, msg="Pondering...")
+                if thought.image_url:
+                    # Wait for BMO to start speaking before showing image
+                    time.sleep(1.5)
+                    self.display_remote_image(thought.image_url, commentary_prompt=thought.topic)
                 else:
                     self.set_state(BotStates.IDLE, "Tap to speak")
             except Exception as e:
@@ -1592,6 +1806,10 @@ class BotGUI:
 
     def trigger_music(self, event=None):
         """Manually trigger BMO to play music and jam."""
+        if self.jam is not None:
+            print("[MUSIC] Stopping the jam")
+            self.jam.stop()  # tapping the music corner again ends the jam
+            return
         if self.current_state in [BotStates.LISTENING, BotStates.THINKING, BotStates.SPEAKING, BotStates.JAMMING]:
             return
         if not self._try_claim_busy():
@@ -1610,24 +1828,49 @@ class BotGUI:
                 ]
                 self.speak(random.choice(intros), msg="Getting ready to jam...")
                 print("[MUSIC] Starting music playback...")
-                music_proc = self.play_sound("music")
-                if music_proc:
-                    self.set_state(BotStates.JAMMING, "Jamming!")
-                    try:
-                        music_proc.wait(timeout=600)
-                    except subprocess.TimeoutExpired:
-                        try: music_proc.terminate()
-                        except Exception: pass
-                    time.sleep(1) # Extra buffer
-                    if self.current_state == BotStates.JAMMING:
-                        self.set_state(BotStates.IDLE, "Tap to speak")
-                else:
+                if not self.play_music():
                     self.speak("BMO wants to play music, but there are no songs loaded!")
             finally:
                 self._release_busy()
 
         threading.Thread(target=run_music, daemon=True).start()
 
+    def play_music(self):
+        """Jam to the procedural chiptune engine until it finishes, is tapped
+        off or muted; falls back to a prerendered track from sounds/music.
+        Blocks. Returns False if nothing could play."""
+        if self.is_muted:
+            return False
+        try:
+            session = JamSession(JamEngine(), ALSA_DEVICE, gain=self.volume, duration=JAM_DURATION_S).start()
+        except Exception as e:
+            print(f"[MUSIC] Jam engine unavailable ({e}); playing a prerendered track")
+            session = None
+
+        if session is not None:
+            self.jam = session
+            self.active_sounds.append(session.proc)  # so mute kills it like any other sound
+            self.set_state(BotStates.JAMMING, "Jamming!")
+            try:
+                session.wait()
+            finally:
+                self.jam = None
+                if session.proc in self.active_sounds:
+                    self.active_sounds.remove(session.proc)
+        else:
+            music_proc = self.play_sound("music")
+            if not music_proc:
+                return False
+            self.set_state(BotStates.JAMMING, "Jamming!")
+            try:
+                music_proc.wait(timeout=600)
+            except subprocess.TimeoutExpired:
+                try: music_proc.terminate()
+                except Exception: pass
+        if self.current_state == BotStates.JAMMING:
+            self.set_state(BotStates.IDLE, "Tap to speak")
+        return True
+
     def trigger_generate_image(self, event=None):
         """Manually trigger an image generation."""
         if self.current_state in [BotStates.LISTENING, BotStates.THINKING, BotStates.SPEAKING]:
@@ -1678,7 +1921,8 @@ class BotGUI:
                 if not url:
                     lock_id = random.randint(1, 100000)
                     url = f"https://loremflickr.com/640/480/{search_term.replace(' ', ',')}?lock={lock_id}"
-                
+                get_image_service().prefetch(url)
+
                 # Wait for BMO to finish speaking the intro
                 if not self._wait_until_idle({BotStates.SPEAKING, BotStates.THINKING}):
                     return
@@ -1696,46 +1940,8 @@ class BotGUI:
         def run_display():
             self.set_state(BotStates.DISPLAY_IMAGE, "Visualizing...")
             try:
-                import urllib.request
-                import urllib.parse
-                
-                # Safely encode the URL path and query
-                parts = urllib.parse.urlparse(image_url)
-                safe_path = urllib.parse.quote(urllib.parse.unquote(parts.path))
-                safe_query = urllib.parse.quote(urllib.parse.unquote(parts.query), safe='=&')
-                safe_url = urllib.parse.urlunparse((parts.scheme, parts.netloc, safe_path, parts.params, safe_query, parts.fragment))
-                
-                req = urllib.request.Request(safe_url, headers={'User-Agent': 'Mozilla/5.0'})
-                with urllib.request.urlopen(req, timeout=15) as u:
-                    raw_data = u.read()
-                            
-                if not raw_data:
-                    raise Exception("Failed to download image data.")
-                
-                from io import BytesIO
-                from PIL import ImageOps, Image
-                
-                img = Image.open(BytesIO(raw_data))
-                
-                # Apply BMO border
-                lcd_w, lcd_h = self.BG_WIDTH - 60, self.BG_HEIGHT - 60
-                img_ratio = img.width / img.height
-                target_ratio = lcd_w / lcd_h
-                if img_ratio > target_ratio:
-                    new_h = lcd_h
-                    new_w = int(new_h * img_ratio)
-                else:
-                    new_w = lcd_w
-                    new_h = int(new_w / img_ratio)
-                img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                left = (new_w - lcd_w) / 2
-                top = (new_h - lcd_h) / 2
-                right = (new_w + lcd_w) / 2
-                bottom = (new_h + lcd_h) / 2
-                img = img.crop((left, top, right, bottom))
-                img = ImageOps.expand(img, border=10, fill="#1c201a")
-                img = ImageOps.expand(img, border=20, fill="#38b5a0")
-                
+                img = get_image_service().get(image_url, timeout=15)
+
                 def show_img(p_img=img):
                     try:
                         self.current_display_image = ImageTk.PhotoImage(p_img)
@@ -1768,11 +1974,7 @@ class BotGUI:
                 
                 # 12 s display window — broken by app shutdown OR user tap
                 # (handle_click on DISPLAY_IMAGE state already returns to IDLE).
-                end_at = time.time() + 12
-                while time.time() < end_at:
-                    if self.stop_event.is_set() or self.current_state != BotStates.DISPLAY_IMAGE:
-                        break
-                    time.sleep(0.2)
+                self.bus.wait_for(lambda: self.current_state != BotStates.DISPLAY_IMAGE, timeout=12)
                 if self.current_state == BotStates.DISPLAY_IMAGE:
                     self.set_state(BotStates.IDLE, "Tap to speak")
             except Exception as e:
@@ -1783,141 +1985,56 @@ class BotGUI:
 
         threading.Thread(target=run_display, daemon=True).start()
 
-    def generate_thought_internal(self, search_result):
-        """Shared logic for generating a BMO thought from search results."""
-        from core.config import LLM_URL, FAST_LLM_MODEL
-        import requests as http_requests
+    def _idle_for_thoughts(self):
+        """ThoughtPool refill gate: only use the NPU when nobody is around."""
+        return (self.current_state in (BotStates.IDLE, BotStates.SCREENSAVER)
+                and not self.is_busy
+                and time.time() - self.last_user_interaction > 30)
 
-        if not self.llm_lock.acquire(blocking=False):
-            return None
-        try:
-            # Wrap the actual reply in [BMO]...[/BMO]. The stripper isolates
-            # whatever's between the markers, so any rule-echo or numbered
-            # preamble outside the tags is automatically discarded.
-            thought_prompt = (
-                "Read this real-world info, then share a short charming musing "
-                "as BMO (under 50 words, finish the thought).\n"
-                "Wrap your final reply between [BMO] and [/BMO] markers — only "
-                "what's between the markers will be spoken.\n"
-                "If the topic is visual, include ONE JSON action AFTER [/BMO]:\n"
-                '  {"action": "display_image", "subject": "<short visual phrase>"}\n\n'
-                f"Info: {search_result[:1500]}"
-            )
-            payload = {
-                "model": FAST_LLM_MODEL,
-                "messages": [
-                    {"role": "system", "content":
-                     "You are BMO, a cute robot musing to yourself. Always wrap your "
-                     "spoken reply in [BMO]...[/BMO] tags. Be concise and specific."},
-                    {"role": "user", "content": thought_prompt},
-                ],
-                "stream": False,
-                "options": {"temperature": 0.8, "num_predict": 256}  # was 512 — shorter cap matches new word limit
-            }
-            resp = http_requests.post(LLM_URL, json=payload, timeout=60)
-            if resp.status_code == 200:
-                content = resp.json().get("message", {}).get("content", "").strip()
-                return strip_prompt_leakage(content)
-        except Exception as e:
-            print(f"[LLM] Thought generation error: {e}")
-        finally:
-            self.llm_lock.release()
-        return None
+    def speak_thought(self, thought, msg="Pondering..."):
+        """Speak a pooled thought, using its pre-synthesized audio when present."""
+        if not thought.pcm or self.is_muted:
+            self.speak(thought.text, msg=msg)
+            return
+        print(f"[TTS] Pre-baked: '{thought.text[:70]}'")
+        if self.current_state != BotStates.DISPLAY_IMAGE:
+            self.set_state(BotStates.SPEAKING, msg)
+        with self.speak_lock:
+            self.play_audio_with_sync(thought.pcm)
+        if self.current_state == BotStates.SPEAKING:
+            self.set_state(BotStates.IDLE, "Tap to speak")
 
     def screensaver_audio_loop(self):
         import datetime
-        import requests as http_requests
-        from core.search import search_web
-        from core.config import LLM_URL, FAST_LLM_MODEL
-        
-        # Topics BMO might wonder about — used as web search seeds
-        search_topics = [
-            "interesting fun fact of the day",
-            "weather forecast today in Brantford, Ontario",
-            "this day in history",
-            "cool science discovery this week",
-            "funny animal fact",
-            "random wholesome internet story",
-            "video game history fact",
-            "weird food fact",
-            "Adventure Time lore or trivia",
-            "today's astronomy picture",
-            "best joke of the day",
-            "random Wikipedia article summary",
-            "latest space news from NASA",
-            "strange laws in Canada",
-            "mythology fun fact",
-            "how a computer works for kids",
-            "cool deep sea creatures",
-            "interesting insect facts",
-            "history of robots",
-            "why do cats purr",
-            "fastest land animals",
-            "tallest buildings in the world",
-            "invention of the telephone",
-            "what is a black hole",
-            "funny dad jokes",
-            "hilarious puns",
-            "knock knock jokes",
-            "short funny stories",
-            "unusual world records",
-            "history of board games",
-            "how honey is made",
-            "origins of common idioms",
-            "mysteries of the pyramids",
-            "first mission to the moon",
-            "evolution of video game consoles",
-            "how to make a paper airplane",
-            "why the sky is blue",
-            "fun facts about penguins",
-            "discovery of dinosaurs",
-            "life on Mars possibilities",
-            "history of ice cream",
-            "how the internet works for kids",
-            "cool chemistry experiments",
-            "amazing origami facts",
-            "the world's oldest trees",
-        ]
-        
-        # Fallback phrases if search/LLM fails
-        fallback_phrases = [
-            "I wonder what Finn and Jake are doing right now.",
-            "Does anyone want to play a video game? No? ...Okay.",
-            "La la la la la... BMO is the best!",
-            "Sometimes BMO just likes to hum a little tune.",
-            "Football... is a tough little guy.",
-        ]
-        
-        def is_llm_reachable():
-            """Quick health check — ping the Ollama base URL before making a full LLM call."""
-            try:
-                base_url = LLM_URL.replace("/api/chat", "")
-                r = http_requests.get(base_url, timeout=5)
-                return r.status_code == 200
-            except Exception:
-                return False
-        
+
         while not self.stop_event.is_set():
-            # Honour stop_event so app shutdown doesn't have to wait up to 30 s.
-            if self.stop_event.wait(timeout=30):
-                break
-            
             # Watchdog: if busy for >2 min with no new interaction, clear it.
             # Uses last_user_interaction (not last_state_change) so a long
-            # DISPLAY_IMAGE view doesn't get force-cleared.
-            if self.is_busy and (time.time() - self.last_user_interaction > 120):
+            # DISPLAY_IMAGE view doesn't get force-cleared. Sleeps until busy
+            # is released or the 2 min are up, whichever comes first.
+            if self.is_busy:
+                stuck_in = 120 - (time.time() - self.last_user_interaction)
+                if stuck_in > 0:
+                    self.bus.wait_for(lambda: not self.is_busy, timeout=stuck_in)
+                    continue
                 print("[WATCHDOG] BMO was busy for > 120s. Force-clearing is_busy.")
                 self._release_busy()
                 self.set_state(BotStates.IDLE, "Tap to speak")
+                continue
 
-            if self.current_state != BotStates.SCREENSAVER or self.is_busy:
+            # Nothing to do outside the screensaver: sleep until it starts
+            if self.current_state != BotStates.SCREENSAVER:
+                self.bus.wait_for(lambda: self.current_state == BotStates.SCREENSAVER or self.is_busy)
                 continue
+
+            # One roll of the dice per 30 s of undisturbed screensaver
+            if self.bus.wait_for(lambda: self.current_state != BotStates.SCREENSAVER or self.is_busy, timeout=30):
+                continue
+            if self.stop_event.is_set():
+                break
                 
-            now = datetime.datetime.now()
-            hour = now.hour
-            
-            # Quiet Hours: 10 PM to 8 AM
-            if hour >= 22 or hour < 8:
+            # Quiet Hours (QUIET_HOURS, 10 PM to 8 AM by default)
+            if in_quiet_hours(datetime.datetime.now().hour, QUIET_HOURS):
                 continue
             
             # Skip if user was recently interacting
@@ -1953,77 +2070,31 @@ class BotGUI:
                         self.set_state(BotStates.SCREENSAVER, "Screensaver...")
                 self.master.after(8000, revert_persona)
             
-            # Random Pondering (~4% chance every 30s)
+            # Random Pondering (~4% chance every 30s) — only from the pool, so
+            # nothing here waits on the LLM; the pool refills while idle.
             elif random.random() < 0.04:
-                if is_llm_reachable():
+                thought = self.thought_pool.take()
+                # Speak the thought (atomic claim — no TOCTOU)
+                if thought and self.current_state == BotStates.SCREENSAVER and self._try_claim_busy():
                     try:
-                        # 1. Ask the LLM for a random topic
-                        topic = None
-                        try:
-                            topic_messages = [
-                                {"role": "system", "content": "You are BMO's brain. Suggest one very specific, random, and interesting topic for BMO to learn about today. Examples: 'history of the first toaster', 'why do wombats have square poop', 'the mystery of the Voynich manuscript'. Keep it under 10 words. Provide ONLY the topic, no quotes or preamble."},
-                                {"role": "user", "content": "Give me a random topic."}
-                            ]
-                            topic_payload = {
-                                "model": FAST_LLM_MODEL,
-                                "messages": topic_messages,
-                                "stream": False,
-                                "options": {"temperature": 1.0, "num_predict": 20}
-                            }
-                            topic_resp = http_requests.post(LLM_URL, json=topic_payload, timeout=10)
-                            if topic_resp.status_code == 200:
-                                topic = topic_resp.json().get("message", {}).get("content", "").strip().strip('"').strip("'")
-                                topic = re.sub(r'^Topic:|^BMO topic:|^I want to learn about: ', '', topic, flags=re.IGNORECASE)
-                        except Exception as e:
-                            print(f"[SCREENSAVER] LLM topic generation failed: {e}")
-
-                        if not topic or len(topic) < 3:
-                            topic = random.choice(search_topics)
-                            for _ in range(3):
-                                if topic in self.recent_thoughts:
-                                    topic = random.choice(search_topics)
-                                else:
-                                    break
-                                
-                        print(f"[SCREENSAVER] Searching for: {topic}")
-                        search_result = search_web(topic)
-                        
-                        phrase = None
-                        if search_result and search_result not in ("SEARCH_EMPTY", "SEARCH_ERROR"):
-                            phrase = self.generate_thought_internal(search_result)
-                            
-                            if phrase:
-                                self.recent_thoughts.append(topic)
-                                # Check for image URL or subject (brace-balanced JSON)
-                                image_url = None
-                                action_data, span = extract_json_object(phrase)
-                                if action_data is not None and action_data.get("action") == "display_image":
-                                    subject = action_data.get("subject") or action_data.get("image_url")
-                                    if subject:
-                                        if "://" in subject:
-                                            image_url = subject
-                                        else:
-                                            image_url = search_images(subject)
-                                    phrase = (phrase[:span[0]] + phrase[span[1]:]).strip()
-                                
-                                # Speak the thought (atomic claim — no TOCTOU)
-                                if phrase and self.current_state == BotStates.SCREENSAVER and self._try_claim_busy():
-                                    self.speak(phrase, msg="Pondering...")
-                                    self.last_screensaver_audio_time = time.time()
-
-                                    # Handle image display
-                                    if image_url:
-                                        # Wait for BMO to start speaking
-                                        time.sleep(1.5)
-                                        self.display_remote_image(image_url, commentary_prompt=topic)
-                                        # display_remote_image releases busy in its finally
-                                    else:
-                                        self._release_busy()
+                        if thought.image_url:
+                            get_image_service().prefetch(thought.image_url)
+                        self.speak_thought(thought, msg="Pondering...")
+                        self.last_screensaver_audio_time = time.time()
+
+                        # Handle image display
+                        if thought.image_url:
+                            # Wait for BMO to start speaking
+                            time.sleep(1.5)
+                            self.display_remote_image(thought.image_url, commentary_prompt=thought.topic)
+                            # display_remote_image releases busy in its finally
+                        else:
+                            self._release_busy()
                     except Exception as e:
                         print(f"[SCREENSAVER] Thought failed: {e}")
                         self._release_busy()
                         self.set_state(BotStates.SCREENSAVER, "Sleeping...")
-                
+
                 # Revert to screensaver state if needed
                 if self.current_state != BotStates.SCREENSAVER and not self.is_busy and self.current_state != BotStates.DISPLAY_IMAGE:
                     self.set_state(BotStates.SCREENSAVER, "Sleeping...")
@@ -1,6 +1,7 @@
 import time
 import sys
 from core.llm import Brain
+from core import tracing
 
 def main():
     print("Initializing BMO Brain...")
@@ -10,7 +11,7 @@ def main():
         print(f"Failed to initialize Brain: {e}")
         sys.exit(1)
         
-    print("BMO is ready! Type 'exit' or 'quit' to stop.")
+    print("BMO is ready! Type 'exit' or 'quit' to stop, ':stats' for latency percentiles.")
     print("-" * 50)
 
     while True:
@@ -21,14 +22,19 @@ def main():
                 break
             if not user_input.strip():
                 continue
+            if user_input.strip() == ":stats":
+                print(tracing.get_tracer().format_table())
+                continue
 
             # Measure response time
             start_time = time.time()
-            response = brain.think(user_input)
+            with tracing.start_turn("cli") as turn:
+                response = brain.think(user_input)
             end_time = time.time()
 
             print(f"\nBMO: {response}")
-            print(f"\n[Response time: {end_time - start_time:.2f} seconds]")
+            stages = ", ".join(f"{k} {v:.0f} ms" for k, v in turn.stages.items())
+            print(f"\n[Response time: {end_time - start_time:.2f} seconds — {stages}]")
 
         except KeyboardInterrupt:
             print("\nGoodbye!")
@@ -0,0 +1,133 @@
+"""Content-hashed manifests of the face and sound asset directories.
+
+The web UI asks /api/faces/<state> and /api/sounds/<category> for file lists
+while it cycles expressions. Scanning the directory on every request meant
+an os.listdir and a sort each time, and plain /faces/... URLs that browsers
+kept revalidating. AssetManifest scans once at startup and hashes every file.
+It then serves from memory:
+
+    urls, etag = manifest.get("idle")
+    # ["/faces/idle/idle_01.png?v=3f2a9c1b0d4e", ...], '"9b1c..."'
+
+Each URL carries a content hash, so it can be cached forever (web_app adds
+an immutable Cache-Control to ?v= asset URLs). The list's ETag changes
+only when a file in that category changes. A watcher thread re-stats the
+directories every poll_interval seconds and rehashes only files whose size
+or mtime changed. If watchdog is installed, file events trigger the rescan
+straight away.
+"""
+import hashlib
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+
+def _file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            h.update(block)
+    return h.hexdigest()[:12]
+
+
+class AssetManifest:
+    """{category: [hashed URL, ...]} for root/<category>/<file>, with a strong ETag per category."""
+
+    def __init__(self, root, url_prefix, extensions, poll_interval=5.0):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip("/")
+        self.extensions = tuple(extensions)
+        self.poll_interval = poll_interval
+        self._entries = {}      # category -> (urls, etag)
+        self._stat_cache = {}   # path -> ((size, mtime_ns), hash)
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._thread = None
+
+    def get(self, category):
+        """(urls, etag) for a category, or ([], None) if it doesn't exist."""
+        with self._lock:
+            return self._entries.get(category, ([], None))
+
+    def categories(self):
+        with self._lock:
+            return sorted(self._entries)
+
+    def start(self):
+        self.refresh()
+        if self._thread is None:
+            if Observer is not None and os.path.isdir(self.root):
+                manifest = self
+
+                class _Handler(FileSystemEventHandler):
+                    def on_any_event(self, event):
+                        manifest._changed.set()
+
+                observer = Observer()
+                observer.schedule(_Handler(), self.root, recursive=True)
+                observer.daemon = True
+                observer.start()
+            self._thread = threading.Thread(target=self._watch, daemon=True, name=f"assets-{self.root}")
+            self._thread.start()
+        return self
+
+    def _watch(self):
+        while True:
+            self._changed.wait(self.poll_interval)
+            self._changed.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Asset manifest refresh failed for {self.root}: {e}")
+
+    def refresh(self):
+        """Rescan root; rehash only new or modified files. Returns changed category names."""
+        entries, changed, seen = {}, [], set()
+        try:
+            categories = sorted(e.name for e in os.scandir(self.root) if e.is_dir())
+        except FileNotFoundError:
+            categories = []
+        for category in categories:
+            files = []
+            for e in os.scandir(os.path.join(self.root, category)):
+                if not e.is_file() or not e.name.endswith(self.extensions):
+                    continue
+                st = e.stat()
+                key = (st.st_size, st.st_mtime_ns)
+                cached = self._stat_cache.get(e.path)
+                if cached is None or cached[0] != key:
+                    cached = (key, _file_hash(e.path))
+                    self._stat_cache[e.path] = cached
+                seen.add(e.path)
+                files.append((e.name, cached[1]))
+            files.sort()
+            urls = [f"{self.url_prefix}/{category}/{name}?v={h}" for name, h in files]
+            etag = '"' + hashlib.sha1("\n".join(urls).encode("utf-8")).hexdigest()[:16] + '"'
+            entries[category] = (urls, etag)
+        for path in list(self._stat_cache):
+            if path not in seen:
+                del self._stat_cache[path]
+        with self._lock:
+            for category in set(entries) | set(self._entries):
+                if self._entries.get(category, (None, None))[1] != entries.get(category, (None, None))[1]:
+                    changed.append(category)
+            self._entries = entries
+        if changed and self._thread is not None:
+            logger.info(f"Asset manifest {self.root}: updated {', '.join(sorted(changed))}")
+        return changed
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value matches `etag` (handles lists and *)."""
+    if not if_none_match or not etag:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
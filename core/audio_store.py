@@ -0,0 +1,225 @@
+"""Size-bounded store for generated reply audio, served by /api/audio/{id}.
+
+Web TTS used to write response_<uuid>.wav into static/audio on the SD card
+and sweep that directory after every chat. Replies are now kept in memory,
+LRU-evicted past max_bytes and expired after ttl seconds.
+
+With spill_dir set (tmpfs, e.g. /dev/shm/bmo-audio), each clip is also
+written there. This matters because uvicorn runs several worker processes:
+the worker that synthesized a reply is not necessarily the one the browser
+fetches it from. Memory is the fast path; the tmpfs copy lets any worker
+serve the clip, and lets a clip outlive its eviction from memory.
+
+The Opus variant (Ogg container) is encoded on first request from a client
+that can play it, then cached next to the WAV.
+"""
+import io
+import logging
+import os
+import re
+import subprocess
+import threading
+import time
+import uuid
+import wave
+from collections import OrderedDict
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+_BYTES = metrics.gauge("bmo_audio_store_bytes", "Reply audio held in memory")
+_EVENTS = metrics.counter("bmo_audio_store_events_total", "Audio store lookups and evictions", ["event"])
+
+try:
+    import av
+except ImportError:
+    av = None
+
+
+def pcm_to_wav(pcm: bytes, rate: int = 22050) -> bytes:
+    """Wrap raw S16_LE mono PCM (Piper --output_raw) in a WAV header."""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm)
+    return buf.getvalue()
+
+
+def encode_opus(wav: bytes, bitrate: str = "24k") -> bytes:
+    """WAV -> Ogg/Opus (speech bitrate). Uses PyAV if installed, otherwise an ffmpeg pipe."""
+    if av is not None:
+        out_buf = io.BytesIO()
+        with av.open(io.BytesIO(wav)) as src, av.open(out_buf, "w", format="ogg") as dst:
+            stream = dst.add_stream("libopus", rate=24000)
+            stream.layout = "mono"
+            stream.bit_rate = int(bitrate.rstrip("k")) * 1000
+            resampler = av.AudioResampler(format="s16", layout="mono", rate=24000)
+            for frame in src.decode(audio=0):
+                for f in resampler.resample(frame):
+                    for packet in stream.encode(f):
+                        dst.mux(packet)
+            for f in resampler.resample(None):
+                for packet in stream.encode(f):
+                    dst.mux(packet)
+            for packet in stream.encode(None):
+                dst.mux(packet)
+        return out_buf.getvalue()
+    proc = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "wav", "-i", "pipe:0",
+         "-c:a", "libopus", "-b:a", bitrate, "-application", "voip", "-f", "ogg", "pipe:1"],
+        input=wav, capture_output=True, timeout=30,
+    )
+    if proc.returncode != 0 or not proc.stdout:
+        raise RuntimeError(f"Opus encode failed: {proc.stderr.decode(errors='replace')[-200:]}")
+    return proc.stdout
+
+
+class AudioStore:
+    """id -> {variant: bytes} with LRU byte budget, TTL and optional tmpfs spill.
+
+    Variants are "wav" and "opus".
+    """
+
+    CONTENT_TYPES = {"wav": "audio/wav", "opus": "audio/ogg"}
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=600, spill_dir=None, prune_interval=60):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_dir = spill_dir
+        self.prune_interval = prune_interval
+        self._items = OrderedDict()  # id -> (created, {variant: bytes})
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        if spill_dir:
+            try:
+                os.makedirs(spill_dir, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"Audio spill dir unavailable ({e}); memory only")
+                self.spill_dir = None
+        _BYTES.set_function(lambda: self._bytes)
+
+    @staticmethod
+    def valid_id(audio_id):
+        return bool(_ID_RE.match(audio_id or ""))
+
+    def _spill_path(self, audio_id, variant):
+        return os.path.join(self.spill_dir, f"{audio_id}.{variant}")
+
+    def put(self, data: bytes, variant="wav", audio_id=None) -> str:
+        audio_id = audio_id or uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            created, variants = self._items.pop(audio_id, (now, {}))
+            self._bytes -= len(variants.get(variant, b""))
+            variants[variant] = data
+            self._items[audio_id] = (created, variants)
+            self._bytes += len(data)
+            self._evict_locked(now)
+        if self.spill_dir:
+            try:
+                tmp = self._spill_path(audio_id, variant) + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, self._spill_path(audio_id, variant))
+            except OSError as e:
+                logger.warning(f"Audio spill write failed: {e}")
+            self._maybe_prune_spill(now)
+        return audio_id
+
+    def get(self, audio_id, variant="wav"):
+        """Bytes for (id, variant), or None if unknown/expired."""
+        if not self.valid_id(audio_id):
+            return None
+        now = time.time()
+        with self._lock:
+            item = self._items.get(audio_id)
+            if item is not None:
+                created, variants = item
+                if now - created > self.ttl:
+                    self._drop_locked(audio_id)
+                    item = None
+                elif variant in variants:
+                    self._items.move_to_end(audio_id)
+                    _EVENTS.inc(event="hit")
+                    return variants[variant]
+        if self.spill_dir:
+            path = self._spill_path(audio_id, variant)
+            try:
+                if now - os.path.getmtime(path) <= self.ttl:
+                    with open(path, "rb") as f:
+                        _EVENTS.inc(event="spill_hit")
+                        return f.read()
+            except OSError:
+                pass
+        _EVENTS.inc(event="miss")
+        return None
+
+    def _drop_locked(self, audio_id):
+        _created, variants = self._items.pop(audio_id)
+        self._bytes -= sum(len(v) for v in variants.values())
+
+    def _evict_locked(self, now):
+        while self._items:
+            oldest_id, (created, _v) = next(iter(self._items.items()))
+            if self._bytes <= self.max_bytes and now - created <= self.ttl:
+                break
+            self._drop_locked(oldest_id)
+            _EVENTS.inc(event="evict")
+
+    def _maybe_prune_spill(self, now):
+        """Expire spilled clips, at most once per prune_interval (tmpfs is RAM too)."""
+        if now - self._last_prune < self.prune_interval:
+            return
+        self._last_prune = now
+        try:
+            for entry in os.scandir(self.spill_dir):
+                try:
+                    if now - entry.stat().st_mtime > self.ttl:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+        except OSError as e:
+            logger.warning(f"Audio spill prune failed: {e}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_audio_store() -> AudioStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            from .config import AUDIO_STORE_MAX_MB, AUDIO_STORE_TTL_S, AUDIO_SPILL_DIR
+            _store = AudioStore(AUDIO_STORE_MAX_MB * 1024 * 1024, AUDIO_STORE_TTL_S, AUDIO_SPILL_DIR)
+        return _store
+
+
+def parse_range(header, size):
+    """Parse a single 'bytes=start-end' Range header.
+
+    Returns (start, end) inclusive, None if there's no usable header, or
+    "invalid" if the range can't be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_s, _, end_s = header[6:].strip().partition("-")
+    try:
+        if start_s == "":  # suffix range: last N bytes
+            n = int(end_s)
+            if n <= 0:
+                return "invalid"
+            return max(0, size - n), size - 1
+        start = int(start_s)
+        end = int(end_s) if end_s else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return "invalid"
+    return start, min(end, size - 1)
@@ -0,0 +1,301 @@
+"""Camera frames for the VLM, captured in memory.
+
+A photo turn used to shell out to `which` and then to rpicam-still. That
+waited 2 s for preview and autofocus, wrote temp.jpg, read it back and
+base64-encoded it, and the VLM path then decoded base64 and JPEG again.
+CameraService does away with all of that:
+
+  - Picamera2 keeps a small RGB preview stream running, so a capture is
+    just the next frame off the ISP (~tens of ms once warm). The ISP also
+    scales to the VLM's input_frame_shape, so there's no CPU resize.
+  - warm() starts the stream early (the agent calls it when the take_photo
+    action arrives, while the lead-in is still being spoken). After
+    CAMERA_IDLE_S without a capture the stream stops again, so the sensor
+    isn't running all day.
+  - Frames are uint8 RGB numpy arrays (h, w, 3) that go straight into
+    VLMWorker.submit. Nothing touches the disk and nothing is base64.
+
+Backends, picked by CAMERA_SOURCE:
+  "auto"       Picamera2, falling back to rpicam-still/libcamera-still
+               (JPEG on stdout, decoded in memory) when python3-picamera2
+               isn't installed
+  "picamera2"  / "rpicam"  force one of the above
+  <path>       FileCamera: an image file, or a directory of images served
+               in turn. Stands in for the camera on a dev box.
+
+    frame = get_camera_service().capture((336, 336, 3))
+"""
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import numpy as np
+
+from . import metrics
+from .frames import decode_frame, fit_frame
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHAPE = (480, 640, 3)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+_CAPTURES = metrics.counter("bmo_camera_captures_total", "Camera captures by outcome", ["outcome"])
+_CAPTURE_SECONDS = metrics.histogram("bmo_camera_capture_seconds", "Camera capture latency, cold starts included")
+
+
+class CameraUnavailable(RuntimeError):
+    """No camera could be opened (none connected, or no backend installed)."""
+
+
+# ── Backends ─────────────────────────────────────────────────────────────────
+class Picamera2Camera:
+    """Pi camera via Picamera2, kept streaming between captures."""
+
+    # Frames right after start() are dark until AE/AWB settle
+    SETTLE_S = 0.5
+
+    def __init__(self):
+        try:
+            from picamera2 import Picamera2
+        except ImportError as e:
+            raise CameraUnavailable("picamera2 is not installed (sudo apt install python3-picamera2)") from e
+        try:
+            self._cam = Picamera2()
+        except (IndexError, RuntimeError) as e:
+            raise CameraUnavailable(f"No camera found: {e}") from e
+        self._size = None
+        self._running = False
+
+    def start(self, size):
+        if size != self._size:
+            if self._running:
+                self._cam.stop()
+                self._running = False
+            # libcamera names formats by register order: "BGR888" is R,G,B in memory
+            config = self._cam.create_preview_configuration(
+                main={"size": size, "format": "BGR888"}, buffer_count=2)
+            self._cam.configure(config)
+            self._size = size
+        if not self._running:
+            self._cam.start()
+            self._running = True
+            try:
+                from libcamera import controls
+                self._cam.set_controls({"AfMode": controls.AfModeEnum.Continuous})
+            except Exception:
+                pass  # fixed-focus module (Camera Module 2, HQ)
+            time.sleep(self.SETTLE_S)
+
+    def capture(self, size):
+        self.start(size)
+        return self._cam.capture_array("main")
+
+    def stop(self):
+        if self._running:
+            self._cam.stop()
+            self._running = False
+
+    def close(self):
+        self.stop()
+        self._cam.close()
+
+
+class RpicamCamera:
+    """rpicam-still / libcamera-still writing JPEG to stdout. Cold on every
+    capture, but still no temp file; used when Picamera2 isn't available."""
+
+    def __init__(self, timeout=15):
+        self._cmd = shutil.which("rpicam-still") or shutil.which("libcamera-still")
+        if self._cmd is None:
+            raise CameraUnavailable("No camera command found (rpicam-still / libcamera-still)")
+        self.timeout = timeout
+
+    def start(self, size):
+        pass
+
+    def capture(self, size):
+        w, h = size
+        # Cap at `timeout` — camera firmware can hang on USB glitches
+        try:
+            proc = subprocess.run(
+                [self._cmd, '-o', '-', '--encoding', 'jpg', '--width', str(w), '--height', str(h),
+                 '--nopreview', '-t', '1000', '--autofocus-mode', 'continuous'],
+                capture_output=True, check=True, timeout=self.timeout,
+            )
+        except subprocess.TimeoutExpired:
+            raise TimeoutError(f"{os.path.basename(self._cmd)} timed out after {self.timeout}s")
+        return decode_frame(proc.stdout, (h, w, 3))
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FileCamera:
+    """Stand-in camera: serves an image file, or each image in a directory
+    in turn. Lets the vision path run without hardware."""
+
+    def __init__(self, path):
+        if os.path.isdir(path):
+            self._paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                                 if name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            self._paths = [path] if os.path.isfile(path) else []
+        if not self._paths:
+            raise CameraUnavailable(f"No images found at {path}")
+        self._next = 0
+
+    def start(self, size):
+        pass
+
+    def capture(self, size):
+        path = self._paths[self._next % len(self._paths)]
+        self._next += 1
+        with open(path, 'rb') as f:
+            return decode_frame(f.read(), (size[1], size[0], 3))
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def open_camera(source="auto"):
+    """Backend for a CAMERA_SOURCE value. Raises CameraUnavailable."""
+    if source == "picamera2":
+        return Picamera2Camera()
+    if source == "rpicam":
+        return RpicamCamera()
+    if source != "auto":
+        return FileCamera(source)
+    try:
+        return Picamera2Camera()
+    except CameraUnavailable as e:
+        logger.info(f"{e}; trying rpicam-still")
+        return RpicamCamera()
+
+
+# ── Service ──────────────────────────────────────────────────────────────────
+class CameraService:
+    """Serialises captures onto one thread and keeps the backend warm.
+
+    The backend is opened lazily, so constructing the service costs nothing
+    on a Pi without a camera. Picamera2 isn't thread-safe, and every call
+    into it happens on the single executor thread.
+    """
+
+    def __init__(self, source="auto", idle_s=60.0, timeout=15.0):
+        self.source = source
+        self.idle_s = idle_s
+        self.timeout = timeout
+        self._camera = None
+        self._last_used = 0.0
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="camera")
+        self._idle_timer = None
+        self._lock = threading.Lock()
+
+    def warm(self, shape=None):
+        """Open the camera and start streaming in the background."""
+        size = self._size_for(shape)
+        self._pool.submit(self._guarded, self._start, size)
+
+    def capture(self, shape=None, dtype=np.uint8):
+        """One RGB frame resized to `shape` (h, w, c) and cast to `dtype`.
+
+        Raises CameraUnavailable if there's no camera, TimeoutError if it
+        doesn't deliver within `timeout` seconds.
+        """
+        shape = shape or DEFAULT_SHAPE
+        t0 = time.monotonic()
+        future = self._pool.submit(self._capture, self._size_for(shape))
+        try:
+            img = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            _CAPTURES.inc(outcome="timeout")
+            raise TimeoutError(f"Camera gave no frame within {self.timeout:g}s")
+        except CameraUnavailable:
+            _CAPTURES.inc(outcome="unavailable")
+            raise
+        except Exception:
+            _CAPTURES.inc(outcome="error")
+            raise
+        _CAPTURES.inc(outcome="ok")
+        _CAPTURE_SECONDS.observe(time.monotonic() - t0)
+        return fit_frame(img, shape, dtype)
+
+    def close(self):
+        with self._lock:
+            if self._idle_timer:
+                self._idle_timer.cancel()
+        self._pool.submit(self._close)
+        self._pool.shutdown(wait=False)
+
+    # ── Camera thread ────────────────────────────────────────────────────
+    @staticmethod
+    def _size_for(shape):
+        h, w = (shape or DEFAULT_SHAPE)[:2]
+        return (w, h)
+
+    def _guarded(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.warning(f"Camera warm-up failed: {e}")
+
+    def _open(self):
+        if self._camera is None:
+            self._camera = open_camera(self.source)
+            logger.info(f"Camera opened: {type(self._camera).__name__}")
+        return self._camera
+
+    def _start(self, size):
+        self._open().start(size)
+        self._touch()
+
+    def _capture(self, size):
+        img = self._open().capture(size)
+        self._touch()
+        return img
+
+    def _touch(self):
+        self._last_used = time.monotonic()
+        with self._lock:
+            if self._idle_timer:
+                self._idle_timer.cancel()
+            self._idle_timer = threading.Timer(self.idle_s, self._pool.submit, args=(self._idle_stop,))
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def _idle_stop(self):
+        if self._camera is not None and time.monotonic() - self._last_used >= self.idle_s:
+            logger.info("Camera idle; stopping stream")
+            self._camera.stop()
+
+    def _close(self):
+        if self._camera is not None:
+            try:
+                self._camera.close()
+            except Exception:
+                pass
+            self._camera = None
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_camera_service() -> CameraService:
+    """Process-wide CameraService for CAMERA_SOURCE (opened on first capture)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            from .config import CAMERA_SOURCE, CAMERA_IDLE_S
+            _service = CameraService(CAMERA_SOURCE, idle_s=CAMERA_IDLE_S)
+        return _service
@@ -0,0 +1,408 @@
+"""Endless procedural chiptunes for JAMMING mode.
+
+Music used to be a handful of prerendered WAVs in sounds/music. JamEngine
+composes in real time instead. It uses the same vocabulary as
+scripts/generate_chiptunes.py: square-wave lead, triangle bass, noise drums,
+equal-tempered notes tuned to A4 = 440 Hz, and a 5 ms attack with a 20 ms
+release. It renders one sixteenth-note step at a time, vectorised with
+NumPy, so CPU cost is a few milliseconds per second of audio (a few hundred
+times real time) no matter how long BMO jams. Every 8 bars it starts a new section with a new key,
+progression, tempo, lead pattern and drum groove. Each section is seeded
+from the engine's RNG, so a given seed always plays the same song.
+
+JamSession streams an engine into aplay and paces itself a fraction of a
+second ahead of playback. It keeps a BeatClock that maps wall-clock time to
+the beat currently being heard, which the face animation uses to bob on
+the beat:
+
+    session = JamSession(JamEngine(), "plughw:UACDemoV10,0", duration=120).start()
+    frame = int(session.clock.beat() * 2) % n_frames   # two frames per beat
+    session.wait()
+
+`python -m core.chiptune --seconds 30 --out jam.wav` renders offline and
+reports the render speed.
+"""
+import logging
+import subprocess
+import threading
+import time
+
+import numpy as np
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 22050
+STEPS_PER_BEAT = 4      # sixteenth notes
+STEPS_PER_BAR = 16
+SECTION_BARS = 8
+ATTACK = 0.005          # seconds, as in scripts/generate_chiptunes.py
+RELEASE = 0.02
+LOOKAHEAD_S = 0.25      # how far JamSession renders ahead of playback
+
+SCALES = {
+    "major": [0, 2, 4, 5, 7, 9, 11],
+    "minor": [0, 2, 3, 5, 7, 8, 10],
+}
+# Chord roots as scale degrees, one chord per bar (looped over the section)
+PROGRESSIONS = {
+    "major": [[0, 4, 5, 3], [0, 5, 3, 4], [0, 3, 4, 4], [5, 3, 0, 4], [0, 3, 0, 4]],
+    "minor": [[0, 5, 2, 6], [0, 3, 4, 0], [0, 6, 5, 6], [0, 5, 3, 4]],
+}
+# 16-step drum grooves: K = kick, S = snare, h = hat, . = rest
+GROOVES = [
+    "K.h.S.h.K.h.S.h.",
+    "K.hhS.h.K.KhS.hh",
+    "K...S...K.K.S...",
+    "KhhhShhhKhhhShhK",
+]
+
+_BLOCK_SECONDS = metrics.histogram("bmo_jam_block_seconds", "Time to render one jam step",
+                                   buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05))
+
+
+def midi_freq(midi):
+    return 440.0 * (2.0 ** ((midi - 69) / 12.0))
+
+
+class Voice:
+    """One monophonic oscillator with a phase accumulator, so a note that
+    spans several steps continues without clicks."""
+
+    def __init__(self, shape, volume, duty=0.5, decay=None, rng=None):
+        self.shape = shape      # "square", "triangle" or "noise"
+        self.volume = volume
+        self.duty = duty
+        self.decay = decay      # seconds; exponential decay instead of sustain (drums)
+        self.sweep = None       # (start Hz, end Hz, seconds): pitch drop for the kick
+        self._rng = rng or np.random.default_rng()
+        self._freq = 0.0
+        self._phase = 0.0
+        self._pos = 0           # samples since note-on
+        self._length = 0        # note length in samples
+
+    def note_on(self, freq, length, sweep=None):
+        self._freq = freq
+        self._pos = 0
+        self._length = length
+        self.sweep = sweep
+
+    def render(self, n, rate=SAMPLE_RATE):
+        if self._pos >= self._length or (self._freq == 0 and self.shape != "noise"):
+            self._pos += n
+            return None
+        idx = self._pos + np.arange(n)
+        t = idx / rate
+        duration = self._length / rate
+        if self.decay:
+            env = np.exp(-t / self.decay)
+        else:
+            env = np.ones(n)
+            tail = t > duration - RELEASE
+            env[tail] = np.maximum(0, (duration - t[tail]) / RELEASE)
+        head = t < ATTACK
+        env[head] *= t[head] / ATTACK
+        env[idx >= self._length] = 0.0
+
+        if self.shape == "noise":
+            wave = self._rng.uniform(-1, 1, n)
+        else:
+            if self.sweep:
+                f0, f1, secs = self.sweep
+                freq = f1 + (f0 - f1) * np.clip(1 - t / secs, 0, 1)
+                phase = (self._phase + np.cumsum(freq) / rate) % 1.0
+            else:
+                phase = (self._phase + np.arange(1, n + 1) * (self._freq / rate)) % 1.0
+            self._phase = float(phase[-1])
+            if self.shape == "square":
+                wave = np.where(phase < self.duty, 1.0, -1.0)
+            else:
+                wave = 4.0 * np.abs(phase - 0.5) - 1.0
+        self._pos += n
+        return wave * env * self.volume
+
+
+class BeatClock:
+    """Which beat is audible right now.
+
+    The renderer adds an anchor whenever the tempo changes: "beat B starts
+    sounding at time T at this bpm". beat() extrapolates from the newest
+    anchor that has already been reached. Anchors are set ahead of time, so
+    a tempo change takes effect exactly when its audio is heard.
+    """
+
+    def __init__(self):
+        self._anchors = []   # [(monotonic time, beat, bpm)], ascending
+        self._lock = threading.Lock()
+
+    def add_anchor(self, at_time, beat, bpm):
+        with self._lock:
+            self._anchors.append((at_time, beat, bpm))
+            if len(self._anchors) > 8:
+                del self._anchors[:-8]
+
+    def _current(self, now):
+        with self._lock:
+            anchors = self._anchors
+            if not anchors:
+                return None
+            for anchor in reversed(anchors):
+                if anchor[0] <= now:
+                    return anchor
+            return anchors[0]
+
+    def beat(self, now=None):
+        """Fractional beat count since the jam started (0.0 before it starts)."""
+        now = time.monotonic() if now is None else now
+        anchor = self._current(now)
+        if anchor is None:
+            return 0.0
+        at, beat, bpm = anchor
+        return max(0.0, beat + (now - at) * bpm / 60.0)
+
+    def bpm(self, now=None):
+        anchor = self._current(time.monotonic() if now is None else now)
+        return anchor[2] if anchor else 0.0
+
+    def time_to_next(self, subdivision=1, now=None):
+        """Seconds until the next 1/subdivision beat boundary."""
+        now = time.monotonic() if now is None else now
+        bpm = self.bpm(now)
+        if not bpm:
+            return None
+        pos = self.beat(now) * subdivision
+        return (np.floor(pos) + 1 - pos) / subdivision * 60.0 / bpm
+
+
+class JamEngine:
+    """Endless chiptune generator, rendered one sixteenth-note step at a time."""
+
+    def __init__(self, seed=None, sample_rate=SAMPLE_RATE, gain=0.8):
+        self.rng = np.random.default_rng(seed)
+        self.sample_rate = sample_rate
+        self.gain = gain
+        self.lead = Voice("square", 0.22, rng=self.rng)
+        self.bass = Voice("triangle", 0.30, rng=self.rng)
+        self.kick = Voice("triangle", 0.45, decay=0.09, rng=self.rng)
+        self.snare = Voice("noise", 0.16, decay=0.07, rng=self.rng)
+        self.hat = Voice("noise", 0.06, decay=0.015, rng=self.rng)
+        self.voices = [self.lead, self.bass, self.kick, self.snare, self.hat]
+        self.step = 0           # global sixteenth count
+        self.beat = 0.0         # beat position at the start of the next block
+        self._carry = 0.0       # fractional samples carried between steps
+        self._new_section()
+
+    # ── Composition ──────────────────────────────────────────────────────
+    def _new_section(self):
+        rng = self.rng
+        self.mode = "major" if rng.random() < 0.7 else "minor"
+        self.root = int(rng.integers(55, 65))                       # G3..E4
+        self.bpm = float(rng.choice([100, 112, 120, 128, 140, 150, 160]))
+        self.progression = PROGRESSIONS[self.mode][rng.integers(len(PROGRESSIONS[self.mode]))]
+        self.groove = GROOVES[rng.integers(len(GROOVES))]
+        self.lead.duty = float(rng.choice([0.125, 0.25, 0.5]))
+        self.lead_style = rng.choice(["arp_up", "arp_down", "melody", "melody"])
+        self.bass_style = rng.choice(["root", "octave", "walk"])
+        # A two-bar motif (scale offsets, None = rest) repeated through the
+        # section, so the melody is recognisable rather than random
+        self.motif = self._make_motif()
+
+    def _make_motif(self):
+        rng = self.rng
+        motif, degree = [], int(rng.integers(0, 5))
+        for step in range(STEPS_PER_BAR * 2):
+            if step % 2 and rng.random() < 0.6:
+                motif.append(motif[-1] if motif else None)  # hold the previous note
+                continue
+            if rng.random() < 0.15:
+                motif.append(None)
+                continue
+            degree = int(np.clip(degree + rng.choice([-2, -1, -1, 0, 1, 1, 2, 3]), -2, 9))
+            motif.append(degree)
+        return motif
+
+    def _scale_midi(self, degree, octave=0):
+        scale = SCALES[self.mode]
+        o, d = divmod(degree, len(scale))
+        return self.root + scale[d] + 12 * (o + octave)
+
+    def _chord(self, bar):
+        """MIDI notes of the bar's triad (root position)."""
+        root_degree = self.progression[bar % len(self.progression)]
+        return [self._scale_midi(root_degree + k) for k in (0, 2, 4)]
+
+    def _trigger(self, step_in_bar, bar, step_len):
+        chord = self._chord(bar)
+        # Lead
+        if self.lead_style == "melody":
+            cur = self.motif[(bar % 2) * STEPS_PER_BAR + step_in_bar]
+            prev = self.motif[(bar % 2) * STEPS_PER_BAR + step_in_bar - 1] if step_in_bar or bar % 2 else None
+            if cur is None:
+                self.lead.note_on(0, 0)
+            elif cur != prev or step_in_bar % 4 == 0:
+                # Nudge the motif onto the current chord so it follows the changes
+                offset = self.progression[bar % len(self.progression)] - self.progression[0]
+                held = 1
+                seq = self.motif[(bar % 2) * STEPS_PER_BAR:]
+                while step_in_bar + held < len(seq) and held < 4 and seq[step_in_bar + held] == cur:
+                    held += 1
+                self.lead.note_on(midi_freq(self._scale_midi(cur + offset, 1)), held * step_len)
+        else:
+            tones = chord + [chord[0] + 12]
+            if self.lead_style == "arp_down":
+                tones = tones[::-1]
+            self.lead.note_on(midi_freq(tones[step_in_bar % 4] + 12), step_len)
+        # Bass: eighth notes
+        if step_in_bar % 2 == 0:
+            eighth = step_in_bar // 2
+            base = chord[0] - 24
+            if self.bass_style == "octave":
+                note = base + (12 if eighth % 2 else 0)
+            elif self.bass_style == "walk":
+                note = [base, base, chord[1] - 24, chord[2] - 24][eighth % 4]
+            else:
+                note = base if eighth % 4 != 3 else chord[2] - 24
+            self.bass.note_on(midi_freq(note), 2 * step_len)
+        # Drums
+        hit = self.groove[step_in_bar]
+        if hit == "K":
+            self.kick.note_on(1.0, 3 * step_len, sweep=(160.0, 45.0, 0.06))
+        elif hit == "S":
+            self.snare.note_on(1.0, 2 * step_len)
+        elif hit == "h":
+            self.hat.note_on(1.0, step_len)
+
+    # ── Rendering ────────────────────────────────────────────────────────
+    def next_block(self):
+        """Render one step. Returns (int16 PCM, start beat, bpm)."""
+        t = time.perf_counter()
+        bar, step_in_bar = divmod(self.step, STEPS_PER_BAR)
+        if bar and step_in_bar == 0 and bar % SECTION_BARS == 0:
+            self._new_section()
+        exact = self.sample_rate * 60.0 / self.bpm / STEPS_PER_BEAT + self._carry
+        n = int(exact)
+        self._carry = exact - n
+        self._trigger(step_in_bar, bar, n)
+
+        mix = np.zeros(n)
+        for voice in self.voices:
+            out = voice.render(n, self.sample_rate)
+            if out is not None:
+                mix += out
+        pcm = (np.clip(mix * self.gain, -1.0, 1.0) * 32767).astype(np.int16)
+
+        start_beat, bpm = self.beat, self.bpm
+        self.step += 1
+        self.beat += 1.0 / STEPS_PER_BEAT
+        _BLOCK_SECONDS.observe(time.perf_counter() - t)
+        return pcm, start_beat, bpm
+
+
+class JamSession:
+    """Streams a JamEngine into aplay until stopped, muted or `duration` runs out."""
+
+    def __init__(self, engine, device, gain=1.0, duration=None):
+        self.engine = engine
+        self.device = device
+        self.gain = gain          # may be changed while playing (volume slider)
+        self.duration = duration
+        self.clock = BeatClock()
+        self.proc = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.proc = subprocess.Popen(
+            ["aplay", "-D", self.device, "-r", str(self.engine.sample_rate), "-f", "S16_LE",
+             "-t", "raw", "-c", "1", "-q", "--buffer-time=200000"],
+            stdin=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        self._thread = threading.Thread(target=self._run, daemon=True, name="jam")
+        self._thread.start()
+        return self
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        self._stop.set()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        rate = self.engine.sample_rate
+        written = 0
+        last_bpm = None
+        t0 = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                audio_t = written / rate
+                if self.duration is not None and audio_t >= self.duration:
+                    break
+                # Stay LOOKAHEAD_S ahead of playback: enough to ride out a
+                # scheduling hiccup, small enough that stop() is prompt.
+                ahead = audio_t - (time.monotonic() - t0)
+                if ahead > LOOKAHEAD_S and self._stop.wait(ahead - LOOKAHEAD_S):
+                    break
+                pcm, beat, bpm = self.engine.next_block()
+                if bpm != last_bpm:
+                    self.clock.add_anchor(t0 + audio_t, beat, bpm)
+                    last_bpm = bpm
+                if self.gain != 1.0:
+                    pcm = (pcm * self.gain).astype(np.int16)
+                self.proc.stdin.write(pcm.tobytes())
+                written += len(pcm)
+        except (BrokenPipeError, OSError, ValueError):
+            pass  # aplay was killed (mute) or the device went away
+        except Exception as e:
+            logger.error(f"Jam session failed: {e}")
+        finally:
+            try:
+                self.proc.stdin.close()
+            except Exception:
+                pass
+            if self._stop.is_set():
+                self.proc.terminate()
+            try:
+                self.proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+def render(engine, seconds):
+    """Render `seconds` of audio offline; returns int16 PCM."""
+    blocks, total = [], 0
+    while total < seconds * engine.sample_rate:
+        pcm, _beat, _bpm = engine.next_block()
+        blocks.append(pcm)
+        total += len(pcm)
+    return np.concatenate(blocks)
+
+
+if __name__ == "__main__":
+    import argparse
+    import wave
+
+    parser = argparse.ArgumentParser(description="Render a procedural jam offline.")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", help="write a WAV file")
+    args = parser.parse_args()
+
+    engine = JamEngine(seed=args.seed)
+    t = time.perf_counter()
+    pcm = render(engine, args.seconds)
+    elapsed = time.perf_counter() - t
+    print(f"Rendered {len(pcm) / engine.sample_rate:.1f}s of audio in {elapsed * 1000:.0f} ms "
+          f"({len(pcm) / engine.sample_rate / elapsed:.0f}x real time), {engine.step // STEPS_PER_BAR} bars")
+    if args.out:
+        with wave.open(args.out, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(engine.sample_rate)
+            w.writeframes(pcm.tobytes())
+        print(f"Saved {args.out}")
@@ -13,7 +13,7 @@ _PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # LLM Settings
 # To offload to your Linux server, change this to: "http://blackbox.clevercode.ts.net:11434/api/chat"
 # Make sure Ollama is running on the blackbox server and listening on 0.0.0.0
-LLM_URL = "http://127.0.0.1:8000/api/chat"
+LLM_URL = os.environ.get("LLM_URL", "http://127.0.0.1:8000/api/chat")
 LLM_MODEL = "qwen2.5-instruct:1.5b" # Native Hailo model for all queries
 FAST_LLM_MODEL = "qwen2.5-instruct:1.5b" # Unify models to prevent NPU swap crashing
 VISION_MODEL = "qwen2-vl-instruct:2b" # Legacy Ollama name (unused — VLM runs via HailoRT directly)
@@ -21,6 +21,26 @@ VISION_MODEL = "qwen2-vl-instruct:2b" # Legacy Ollama name (unused — VLM runs
 # VLM (Vision Language Model) Settings — uses HailoRT Python API directly
 # The HEF file is a precompiled model binary from Hailo's model zoo
 VLM_HEF_PATH = os.environ.get("VLM_HEF_PATH", os.path.join(_PROJECT_ROOT, "models", "Qwen2-VL-2B-Instruct.hef"))
+# One worker thread owns the VLM (core/vlm.py). At most VLM_QUEUE_SIZE requests
+# wait behind it, and each gives up after VLM_TIMEOUT_S.
+VLM_QUEUE_SIZE = 2
+VLM_TIMEOUT_S = 30.0
+# Follow-up questions about the same picture (core/vlm.py AnswerCache): answers
+# are reused for VLM_CACHE_TTL_S, for the same question about a frame that
+# changed by at most VLM_CACHE_MAX_CHANGED (share of the picture, see
+# core/frames.py FrameSignature). A different question continues on the kept
+# image context if the frame changed by at most VLM_FOLLOWUP_MAX_CHANGED. At
+# most VLM_MAX_FOLLOWUPS questions run on one kept context before it is re-encoded.
+VLM_CACHE_TTL_S = 120.0
+VLM_CACHE_MAX_CHANGED = 0.005
+VLM_FOLLOWUP_MAX_CHANGED = 0.01
+VLM_MAX_FOLLOWUPS = 4
+
+# Camera for photo turns (core/camera.py): "auto" (Picamera2, else rpicam-still),
+# "picamera2", "rpicam", or a path to an image file / directory of images to
+# stand in for the camera. The preview stream stops after CAMERA_IDLE_S unused.
+CAMERA_SOURCE = os.environ.get("CAMERA_SOURCE", "auto")
+CAMERA_IDLE_S = 60.0
 
 
 def get_current_context() -> str:
@@ -59,6 +79,85 @@ def get_system_prompt():
         "Minigames: when asked to play, suggest Trivia, Guess the Number, or Text Adventures."
     )
 
+# Remote image cache (display_image). Finished, bordered frames are stored by
+# URL hash; oldest-used files are evicted once the directory exceeds the cap.
+IMAGE_CACHE_DIR = os.environ.get("IMAGE_CACHE_DIR", os.path.join(_PROJECT_ROOT, ".image_cache"))
+IMAGE_CACHE_MAX_MB = 64
+
+# Search cache (core/search.py). Shared SQLite file so the GUI and both web
+# workers reuse each other's results.  TTLs are per search kind, in seconds;
+# an entry past its TTL but inside the stale window is served immediately
+# while a background refresh fetches a new copy.
+SEARCH_CACHE_PATH = os.environ.get("SEARCH_CACHE_PATH", os.path.join(_PROJECT_ROOT, "search_cache.sqlite3"))
+SEARCH_CACHE_TTL = {
+    "weather": 10 * 60,
+    "news": 60 * 60,
+    "text": 3 * 24 * 3600,
+    "images": 7 * 24 * 3600,
+}
+SEARCH_CACHE_STALE = {
+    "weather": 30 * 60,
+    "news": 6 * 3600,
+    "text": 30 * 24 * 3600,
+    "images": 30 * 24 * 3600,
+}
+
+# Web search fan-out: all candidate backends for a query run concurrently and
+# the whole search gives up after this many seconds.
+SEARCH_DEADLINE_S = 8.0
+
+# Per-turn latency traces (core/tracing.py). When set, every finished turn is
+# appended to this JSONL file; summarise it with `python -m core.tracing`.
+TRACE_FILE = os.environ.get("TRACE_FILE") or None
+
+# Metrics (core/metrics.py). The web app serves /metrics on its own port; the
+# agent has no HTTP server, so it starts a small one on METRICS_PORT (0 = off).
+# System stats (CPU, memory, temperature, LLM reachability) are sampled in the
+# background every METRICS_INTERVAL_S seconds.
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9101"))
+METRICS_INTERVAL_S = 15.0
+
+# Web app worker pools (web_app.py). Blocking LLM calls and whisper/Piper
+# subprocesses run on these bounded pools instead of the event loop; extra
+# requests queue for a free worker rather than spawning more threads.
+WEB_LLM_WORKERS = 2
+WEB_MEDIA_WORKERS = 2
+# Largest photo /api/vision accepts. The UI downscales to the VLM's input
+# size first (tens of KB), so only other clients come close.
+VISION_MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+# Web reply audio (core/audio_store.py): kept in memory instead of
+# static/audio, and mirrored to tmpfs so every uvicorn worker can serve it.
+AUDIO_STORE_MAX_MB = 32
+AUDIO_STORE_TTL_S = 600
+AUDIO_SPILL_DIR = os.environ.get("AUDIO_SPILL_DIR",
+                                 "/dev/shm/bmo-audio" if os.path.isdir("/dev/shm") else "") or None
+
+# Timers and reminders (core/timers.py). Pending timers are journaled here so
+# they survive a restart; ones missed by more than TIMER_MAX_LATE_S while BMO
+# was off are dropped instead of ringing late.
+TIMER_JOURNAL = os.environ.get("TIMER_JOURNAL", os.path.join(_PROJECT_ROOT, "timers.json"))
+TIMER_MAX_LATE_S = 6 * 3600
+
+# Agent state machine (core/statebus.py). Transitions outside the table in
+# agent_hailo.py are logged and counted; set STRICT_STATE_TRANSITIONS=1 while
+# developing to make them raise instead.
+STRICT_STATE_TRANSITIONS = os.environ.get("STRICT_STATE_TRANSITIONS") == "1"
+
+# Idle power governor (core/power.py). In the screensaver the animation
+# slows to POWER_IDLE_FRAME_MS per frame, and during QUIET_HOURS (start, end
+# hour, local time) to POWER_NIGHT_FRAME_MS, with expression changes paused.
+# WAKE_GATE puts an energy VAD in front of the wake-word model: "night"
+# (quiet hours only), "always" or "off".
+QUIET_HOURS = (22, 8)
+POWER_IDLE_FRAME_MS = 250
+POWER_NIGHT_FRAME_MS = 500
+WAKE_GATE = os.environ.get("WAKE_GATE", "night")
+
+# JAMMING mode music (core/chiptune.py): generated live, one jam lasts this
+# long unless the music corner is tapped again to stop it.
+JAM_DURATION_S = 120
+
 # TTS Settings — absolute paths ensure the BMO voice is always used,
 # regardless of which directory the process was launched from.
 PIPER_CMD = os.path.join(_PROJECT_ROOT, "piper", "piper")
@@ -80,6 +179,9 @@ WHISPER_MODEL = os.path.join(_PROJECT_ROOT, "models", "ggml-base.en.bin")
 MIC_SAMPLE_RATE = 48000
 WAKE_WORD_MODEL = os.path.join(_PROJECT_ROOT, "wakeword.onnx")
 WAKE_WORD_THRESHOLD = 0.35
+# Web wake-word streams (core/wakeword.py) are batched: the worker waits this
+# long after audio arrives so frames from other connections join the batch.
+WAKE_WORD_TICK_S = 0.08
 
 # Robustly find Audio Devices
 def find_audio_devices():
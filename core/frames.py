@@ -0,0 +1,176 @@
+"""Image bytes -> VLM input frames, decoding as little as possible.
+
+The VLM wants a small RGB frame (e.g. 336x336) while a phone upload is
+often 12 MP. Decoding the whole JPEG, converting it to RGB and then
+resizing it allocates several full-size frames (~36 MB each at 12 MP)
+only to throw almost all of the pixels away. decode_frame instead:
+
+  - reads the size from the JPEG header and asks libjpeg to decode at
+    1/2, 1/4 or 1/8 scale (IMREAD_REDUCED_*). It picks the smallest scale
+    that still covers the target, so the IDCT skips the detail the resize
+    would have discarded anyway;
+  - resizes that near-target image straight into the output buffer;
+  - does the BGR->RGB swap in place on the small output frame, not on
+    the decoded image.
+
+FramePool hands out reusable output buffers. A buffer returns to the pool
+only once the VLM worker has finished with the request that holds it.
+FrameSignature tells the VLM answer cache whether two frames show the
+same picture.
+
+    python tests/bench_preprocess.py    # old vs new on phone-sized JPEGs
+"""
+import struct
+import threading
+
+import numpy as np
+
+# libjpeg scale factors OpenCV exposes, largest first
+_REDUCED = ((8, "IMREAD_REDUCED_COLOR_8"), (4, "IMREAD_REDUCED_COLOR_4"), (2, "IMREAD_REDUCED_COLOR_2"))
+
+# SOFn markers carry the frame size (C4/C8/CC are DHT/JPG/DAC)
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_size(data):
+    """(width, height) from a JPEG's SOF header, or None if `data` isn't a JPEG."""
+    if data[:2] != b"\xff\xd8":
+        return None
+    i, n = 2, len(data)
+    while i + 9 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:          # fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # no length field
+            i += 2
+            continue
+        if marker in _SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        i += 2 + struct.unpack(">H", data[i + 2:i + 4])[0]
+    return None
+
+
+def reduction_for(src_size, shape):
+    """Largest libjpeg scale (8, 4, 2 or 1) that still covers `shape` (h, w, ...).
+
+    EXIF rotation can swap width and height after decoding, so the short
+    side has to cover the target's long side.
+    """
+    need = max(shape[0], shape[1])
+    short = min(src_size)
+    for factor, _flag in _REDUCED:
+        if -(-short // factor) >= need:  # libjpeg rounds scaled sizes up
+            return factor
+    return 1
+
+
+def decode_frame(data, shape, dtype=np.uint8, out=None):
+    """Decode JPEG/PNG bytes into an RGB array of `shape` (h, w, 3).
+
+    Writes into `out` when given (it must have `shape` and `dtype`).
+    Raises ValueError if the bytes aren't an image.
+    """
+    import cv2
+
+    flag = cv2.IMREAD_COLOR
+    size = jpeg_size(data)
+    if size is not None:
+        factor = reduction_for(size, shape)
+        if factor > 1:
+            flag = getattr(cv2, dict(_REDUCED)[factor])
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+    if img is None:
+        raise ValueError("Failed to decode image")
+    return _resize_to(img, shape, dtype, out, bgr=True)
+
+
+def fit_frame(img, shape, dtype=np.uint8, out=None):
+    """Resize an RGB array to `shape` (h, w, c) and cast it for the VLM."""
+    if out is None and img.shape[:2] == tuple(shape[:2]):
+        return np.ascontiguousarray(img, dtype=dtype)
+    return _resize_to(img, shape, dtype, out, bgr=False)
+
+
+def _resize_to(img, shape, dtype, out, bgr):
+    import cv2
+
+    h, w = shape[0], shape[1]
+    if out is None:
+        out = np.empty((h, w, 3), dtype=dtype)
+    # Resize/convert in uint8, then cast once into `out` if the VLM wants another dtype
+    target = out if out.dtype == np.uint8 else np.empty((h, w, 3), dtype=np.uint8)
+    if img.shape[:2] == (h, w):
+        np.copyto(target, img)
+    else:
+        # Past 2:1, INTER_AREA is needed to avoid aliasing. Below that (always
+        # the case after a reduced decode) INTER_LINEAR looks the same and
+        # is ~10x cheaper than INTER_AREA at fractional ratios.
+        ratio = min(img.shape[0] / h, img.shape[1] / w)
+        interp = cv2.INTER_AREA if ratio >= 2 else cv2.INTER_LINEAR
+        cv2.resize(img, (w, h), dst=target, interpolation=interp)
+    if bgr:
+        cv2.cvtColor(target, cv2.COLOR_BGR2RGB, dst=target)
+    if target is not out:
+        np.copyto(out, target, casting="unsafe")
+    return out
+
+
+class FrameSignature:
+    """A frame's 64x64 grey thumbnail, for "is this the same picture?".
+
+    changed() is the share of thumbnail pixels that moved by more than
+    LEVEL grey levels. A re-shot of a still scene (sensor noise, JPEG,
+    small exposure shifts) scores ~0. A new object in hand or a different
+    page of text changes a few percent of the picture. A perceptual hash
+    can't see that: both score within a bit or two of the original.
+    Frames too flat to compare (dark room, covered lens) never match anything.
+    """
+
+    SIZE = 64
+    LEVEL = 16
+    MIN_SPREAD = 4.0
+
+    def __init__(self, frame):
+        import cv2
+
+        img = np.asarray(frame)
+        if img.dtype != np.uint8:
+            img = np.clip(img, 0, 255).astype(np.uint8)
+        grey = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+        self.thumb = cv2.resize(grey, (self.SIZE, self.SIZE), interpolation=cv2.INTER_AREA)
+        self.flat = float(self.thumb.std()) < self.MIN_SPREAD
+
+    def changed(self, other):
+        """Fraction (0-1) of the picture that differs; 1.0 if either is flat."""
+        if self.flat or other.flat:
+            return 1.0
+        diff = np.abs(self.thumb.astype(np.int16) - other.thumb.astype(np.int16))
+        return float(np.count_nonzero(diff > self.LEVEL)) / diff.size
+
+
+class FramePool:
+    """Reusable output buffers, keyed by (shape, dtype)."""
+
+    def __init__(self, keep=4):
+        self.keep = keep
+        self._free = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, shape, dtype=np.uint8):
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                return free.pop()
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, buf):
+        key = (buf.shape, buf.dtype.str)
+        with self._lock:
+            free = self._free.setdefault(key, [])
+            if len(free) < self.keep:
+                free.append(buf)
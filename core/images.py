@@ -0,0 +1,199 @@
+import hashlib
+import logging
+import os
+import threading
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from .config import IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_MB
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_EVENTS = metrics.counter("bmo_image_cache_events_total", "Display image cache lookups", ["event"])
+IMAGE_PENDING = metrics.gauge("bmo_image_pending", "Display image downloads queued or in flight")
+
+# Full screen size and BMO frame around the picture (inner LCD bezel + teal casing).
+SCREEN_SIZE = (800, 480)
+BEZEL_PX = 10
+CASING_PX = 20
+BEZEL_COLOR = "#1c201a"
+CASING_COLOR = "#38b5a0"
+
+
+def safe_url(url: str) -> str:
+    """Re-quote the path and query so URLs with spaces or unicode subjects
+    (loremflickr tags, DDG results) don't make urllib raise."""
+    parts = urllib.parse.urlparse(url)
+    path = urllib.parse.quote(urllib.parse.unquote(parts.path))
+    query = urllib.parse.quote(urllib.parse.unquote(parts.query), safe='=&')
+    return urllib.parse.urlunparse((parts.scheme, parts.netloc, path, parts.params, query, parts.fragment))
+
+
+def lcd_size(screen_size=SCREEN_SIZE):
+    """Size of the picture area inside the border."""
+    pad = 2 * (BEZEL_PX + CASING_PX)
+    return screen_size[0] - pad, screen_size[1] - pad
+
+
+def apply_bmo_border(img: Image.Image, screen_size=SCREEN_SIZE) -> Image.Image:
+    """Cover-resize and centre-crop into the LCD area, then add the bezel and casing."""
+    lcd_w, lcd_h = lcd_size(screen_size)
+    if img.width / img.height > lcd_w / lcd_h:
+        # Wider than the LCD: scale to height, crop width
+        new_w, new_h = int(lcd_h * img.width / img.height), lcd_h
+    else:
+        # Taller: scale to width, crop height
+        new_w, new_h = lcd_w, int(lcd_w * img.height / img.width)
+    img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
+    left = (new_w - lcd_w) // 2
+    top = (new_h - lcd_h) // 2
+    img = img.crop((left, top, left + lcd_w, top + lcd_h))
+    img = ImageOps.expand(img, border=BEZEL_PX, fill=BEZEL_COLOR)
+    return ImageOps.expand(img, border=CASING_PX, fill=CASING_COLOR)
+
+
+def decode_for_screen(raw: bytes, screen_size=SCREEN_SIZE) -> Image.Image:
+    """Decode downloaded bytes into a finished, bordered screen frame.
+
+    JPEGs are decoded in draft mode: libjpeg scales by 1/2, 1/4 or 1/8 during
+    the IDCT, down to the smallest size that still covers the LCD. A 4000px
+    photo then never gets fully decoded just to be shrunk to 740x420.
+    """
+    img = Image.open(BytesIO(raw))
+    if img.format == "JPEG":
+        img.draft("RGB", lcd_size(screen_size))
+    return apply_bmo_border(img.convert("RGB"), screen_size)
+
+
+class ImageService:
+    """Fetches display images in the background and caches finished frames.
+
+    prefetch() starts work as soon as a URL is known, which is usually while
+    the lead-in sentence is still being spoken. get() waits for that work, or
+    starts it if nothing was prefetched. Finished frames go to disk by URL
+    hash. The directory is trimmed to max_bytes by least-recent use, since
+    hits refresh the file's mtime.
+    """
+
+    def __init__(self, cache_dir=IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_MB * 1024 * 1024,
+                 screen_size=SCREEN_SIZE, workers=2, download_timeout=15):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.screen_size = tuple(screen_size)
+        self.download_timeout = download_timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bmo-image")
+        self._pending = {}  # url -> Future
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        IMAGE_PENDING.set_function(lambda: len(self._pending))
+
+    def _cache_path(self, url):
+        # Screen size is part of the key so a resolution change can't serve stale frames
+        key = f"{self.screen_size[0]}x{self.screen_size[1]}|{url}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg")
+
+    def prefetch(self, url):
+        """Start fetching `url` in the background (no-op if already in flight)."""
+        if not url:
+            return None
+        with self._lock:
+            fut = self._pending.get(url)
+            if fut is not None:
+                return fut
+            fut = self._pool.submit(self._load, url)
+            self._pending[url] = fut
+        # Outside the lock: an already-finished future (fast cache hit) runs
+        # the callback right here, and _forget takes the lock itself.
+        fut.add_done_callback(lambda f, u=url: self._forget(u, f))
+        return fut
+
+    def get(self, url, timeout=15):
+        """Return the bordered frame for `url`, blocking up to `timeout` seconds.
+
+        Raises whatever the download/decode raised, or TimeoutError.
+        """
+        return self.prefetch(url).result(timeout=timeout)
+
+    def _forget(self, url, fut):
+        with self._lock:
+            # Only drop our own entry, never a newer fetch of the same URL
+            if self._pending.get(url) is fut:
+                del self._pending[url]
+
+    def _load(self, url):
+        path = self._cache_path(url)
+        try:
+            img = Image.open(path)
+            img.load()
+            os.utime(path)  # LRU: a hit counts as a use
+            logger.info(f"Image cache hit: {url}")
+            IMAGE_CACHE_EVENTS.inc(event="hit")
+            return img
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cached image {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        IMAGE_CACHE_EVENTS.inc(event="miss")
+        req = urllib.request.Request(safe_url(url), headers={'User-Agent': 'Mozilla/5.0'})
+        with urllib.request.urlopen(req, timeout=self.download_timeout) as u:
+            raw = u.read()
+        if not raw:
+            raise ValueError("Empty image download")
+        logger.info(f"Downloaded {len(raw)} bytes: {url}")
+
+        img = decode_for_screen(raw, self.screen_size)
+        try:
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            img.save(tmp, format="JPEG", quality=90)
+            os.replace(tmp, path)
+            self._evict()
+        except OSError as e:
+            logger.warning(f"Could not cache image: {e}")
+        return img
+
+    def _evict(self):
+        """Delete least-recently-used frames until the cache fits max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".jpg"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        for _mtime, size, name in sorted(entries):
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+            except OSError:
+                pass
+            if total <= self.max_bytes:
+                break
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_image_service() -> ImageService:
+    """Process-wide ImageService (created on first use)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ImageService()
+        return _service
@@ -1,74 +1,66 @@
 import base64
+import contextlib
 import os
 import requests
 import logging
 import re
+import time
+import uuid
 import json
 import urllib.parse
 import numpy as np
-from .config import LLM_URL, LLM_MODEL, FAST_LLM_MODEL, VISION_MODEL, VLM_HEF_PATH, get_system_prompt, get_current_context
+from .config import LLM_URL, LLM_MODEL, FAST_LLM_MODEL, VISION_MODEL, VLM_TIMEOUT_S, get_system_prompt, get_current_context
 from .tts import add_pronunciation
 from .search import search_web, search_images
+from .frames import FramePool, FrameSignature, decode_frame, fit_frame
+from .vlm import STOP_TOKENS, VLMTimeout, VLMUnavailable, get_answer_cache, get_vlm_worker
+from . import metrics, tracing
 
 logger = logging.getLogger(__name__)
 
-# --------------------------------------------------------------------------- #
-#  Hailo VLM (Vision Language Model) singleton
-# --------------------------------------------------------------------------- #
-# Lazy-loaded on first image analysis request.  Kept alive so subsequent
-# requests don't pay the ~3 s init cost again.
-_vlm_instance = None
-_vlm_vdevice = None
+LLM_REQUESTS = metrics.counter("bmo_llm_requests_total", "LLM HTTP calls by model, mode and outcome",
+                               ["model", "mode", "outcome"])
+LLM_SECONDS = metrics.histogram("bmo_llm_request_seconds", "LLM call duration (streams: until the stream closes)",
+                                ["model", "mode"])
+LLM_TTFT = metrics.histogram("bmo_llm_ttft_seconds", "Streaming LLM request to first token", ["model"])
+LLM_INFLIGHT = metrics.gauge("bmo_llm_inflight", "LLM requests currently in flight")
+LLM_INFLIGHT.set(0)
 
 
-def _get_vlm():
-    """Return a (vlm, frame_shape, frame_dtype) tuple, initialising on first call."""
-    global _vlm_instance, _vlm_vdevice
+@contextlib.contextmanager
+def track_llm_request(model, mode):
+    """Count, time and track in-flight for one LLM HTTP call.
 
-    if _vlm_instance is not None:
-        shape = _vlm_instance.input_frame_shape()
-        dtype = _vlm_instance.input_frame_format_type()
-        return _vlm_instance, shape, dtype
-
-    hef = VLM_HEF_PATH
-    if not os.path.isabs(hef):
-        # Resolve relative to project root (where the scripts live)
-        hef = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), hef)
-
-    if not os.path.exists(hef):
-        raise FileNotFoundError(f"VLM HEF not found at {hef}. Run setup.sh to download it.")
-
-    from hailo_platform import VDevice
-    from hailo_platform.genai import VLM
+    Callers set result["outcome"] (default "ok"); an exception counts as "error".
+    """
+    result = {"outcome": "ok"}
+    LLM_INFLIGHT.inc()
+    t = time.perf_counter()
+    try:
+        yield result
+    except Exception:
+        result["outcome"] = "error"
+        raise
+    finally:
+        LLM_INFLIGHT.dec()
+        LLM_SECONDS.observe(time.perf_counter() - t, model=model, mode=mode)
+        LLM_REQUESTS.inc(model=model, mode=mode, outcome=result["outcome"])
 
-    logger.info(f"Initialising Hailo VLM from {hef} ...")
-    _vlm_vdevice = VDevice()
-    _vlm_instance = VLM(_vlm_vdevice, hef)
-    shape = _vlm_instance.input_frame_shape()
-    dtype = _vlm_instance.input_frame_format_type()
-    logger.info(f"VLM ready — frame shape {shape}, dtype {dtype}")
-    return _vlm_instance, shape, dtype
+# Output buffers for decoded uploads, reused once the VLM is done with them
+_FRAME_POOL = FramePool()
 
 
-def _decode_image_to_frame(image_b64: str, target_shape, target_dtype=np.uint8):
-    """Decode a base64 JPEG/PNG into a numpy array matching VLM input requirements."""
-    import cv2
+def _decode_image_to_frame(image_b64, target_shape, target_dtype=np.uint8, out=None):
+    """Decode a base64 (or raw bytes) JPEG/PNG into a numpy array matching VLM input requirements.
 
-    raw = base64.b64decode(image_b64)
-    arr = np.frombuffer(raw, dtype=np.uint8)
-    img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-    if img is None:
+    JPEGs are decoded at reduced scale near the target size (core/frames.py).
+    """
+    try:
+        raw = image_b64 if isinstance(image_b64, (bytes, bytearray)) else base64.b64decode(image_b64)
+        return decode_frame(raw, target_shape, target_dtype, out=out)
+    except ValueError:
         raise ValueError("Failed to decode image from base64 data")
 
-    # OpenCV loads BGR; VLM expects RGB
-    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-
-    h, w, c = target_shape
-    if img.shape[0] != h or img.shape[1] != w:
-        img = cv2.resize(img, (w, h), interpolation=cv2.INTER_LINEAR)
-
-    return img.astype(target_dtype)
-
 # Keep at most this many messages (plus the system prompt) to avoid
 # unbounded memory growth on memory-constrained devices like a Pi.
 MAX_HISTORY_MESSAGES = 20
@@ -181,7 +173,68 @@ def strip_prompt_leakage(content: str) -> str:
     return content
 
 
-MEMORY_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "memory.json")
+MEMORY_FILE = os.environ.get(
+    "MEMORY_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "memory.json")
+)
+
+def _strip_stop_tokens(text):
+    """Remove VLM end-of-turn markers (they can straddle streamed tokens)."""
+    if not text:
+        return text
+    for tok in STOP_TOKENS:
+        text = text.replace(tok, "")
+    return text if text.strip() else None
+
+
+class SentenceBuffer:
+    """Accumulates streamed text and releases it a sentence at a time for TTS.
+
+    Shared by stream_think and stream_analyze_image so LLM and VLM answers
+    are chunked identically.
+    """
+
+    _ABBREVIATIONS = (
+        ' dr.', ' mr.', ' mrs.', ' ms.', ' jr.', ' sr.',
+        ' st.', ' vs.', ' etc.', ' e.g.', ' i.e.',
+    )
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, chunk):
+        """Add a streamed chunk; returns a finished sentence or None."""
+        self.buffer += chunk
+        buffer = self.buffer
+        # If buffer ends with strong punctuation or newline, yield it.
+        # Skip flush for: (a) digit-period-digit ("$4.99"),
+        # (b) common abbreviations (Dr., Mr., Mrs., e.g., i.e.),
+        # (c) buffers shorter than 10 chars (avoids "It's." flushing as a sentence)
+        ends_punct = any(buffer.endswith(p) for p in ['.', '!', '?', '\n'])
+        mid_decimal = (
+            len(buffer) >= 2 and buffer.endswith('.')
+            and buffer[-2].isdigit()
+        )
+        # Treat short buffers as not ready to flush
+        trimmed = buffer.strip()
+        too_short = len(trimmed) < 10
+        # Common abbrev. tail check (case-insensitive)
+        abbrev_tail = any(trimmed.lower().endswith(a) for a in self._ABBREVIATIONS)
+        ready = ends_punct and not mid_decimal and not too_short and not abbrev_tail
+        if ready or "\n\n" in buffer:
+            return self._take()
+        return None
+
+    def flush(self):
+        """Whatever is left at the end of the stream, or None."""
+        return self._take() if self.buffer.strip() else None
+
+    def _take(self):
+        # Strip system prompt leakage and ensure BMO spelling before yielding
+        cleaned = strip_prompt_leakage(self.buffer)
+        self.buffer = ""
+        out_chunk = re.sub(r'\bBeemo\b', 'BMO', cleaned, flags=re.IGNORECASE)
+        return out_chunk if out_chunk.strip() else None
+
 
 def _quick_lead_in(user_text: str, intent: str) -> str:
     """Return a one-line BMO acknowledgement before a pre-routed action runs.
@@ -223,7 +276,10 @@ def _quick_lead_in(user_text: str, intent: str) -> str:
             "stream": False,
             "options": {"temperature": 0.8, "num_predict": 30},
         }
-        r = requests.post(LLM_URL, json=payload, timeout=0.6)
+        with track_llm_request(FAST_LLM_MODEL, "lead_in") as req:
+            r = requests.post(LLM_URL, json=payload, timeout=0.6)
+            if r.status_code != 200:
+                req["outcome"] = f"http_{r.status_code}"
         if r.status_code == 200:
             txt = r.json().get("message", {}).get("content", "").strip().strip('"').strip("'")
             txt = re.sub(r"\s+", " ", txt)
@@ -359,6 +415,7 @@ class Brain:
 
 
         lower_text = user_text.lower()
+        t_route = time.perf_counter()
 
         # Pre-LLM camera check — same logic as stream_think
         camera_keywords = [
@@ -371,6 +428,7 @@ class Brain:
             "what's that", "what is that",
         ]
         if any(kw in lower_text for kw in camera_keywords):
+            tracing.record("route", time.perf_counter() - t_route)
             action = '{"action": "take_photo"}'
             lead_in = _quick_lead_in(user_text, "photo")
             combined = (lead_in + " " + action).strip() if lead_in else action
@@ -380,6 +438,7 @@ class Brain:
         # Pre-LLM display_image check — handle image generation requests
         # directly instead of relying on the small model to emit correct JSON
         if any(kw in lower_text for kw in _DISPLAY_IMAGE_KEYWORDS):
+            tracing.record("route", time.perf_counter() - t_route)
             action = _build_display_image_action(user_text)
             matched_kw = next(kw for kw in _DISPLAY_IMAGE_KEYWORDS if kw in lower_text)
             print(f"[LLM] Image keyword MATCHED: '{matched_kw}' in '{lower_text[:60]}'")
@@ -392,6 +451,7 @@ class Brain:
         # Pre-LLM music check — emit play_music directly rather than
         # relying on the small model to emit correct JSON
         if any(kw in lower_text for kw in _MUSIC_KEYWORDS):
+            tracing.record("route", time.perf_counter() - t_route)
             action = '{"action": "play_music"}'
             matched_kw = next(kw for kw in _MUSIC_KEYWORDS if kw in lower_text)
             print(f"[LLM] Music keyword MATCHED: '{matched_kw}' in '{lower_text[:60]}'")
@@ -402,6 +462,7 @@ class Brain:
             return combined
 
         print(f"[LLM] No pre-LLM action matched for: '{lower_text[:60]}'")
+        tracing.record("route", time.perf_counter() - t_route)
 
         # Pre-LLM web search — same logic as stream_think
         realtime_keywords = [
@@ -453,7 +514,10 @@ class Brain:
         assistant_appended = False
         try:
             logger.info(f"Sending request to LLM ({chosen_model}): {LLM_URL}")
-            response = requests.post(LLM_URL, json=payload, timeout=180)
+            with tracing.span("llm"), track_llm_request(chosen_model, "chat") as req:
+                response = requests.post(LLM_URL, json=payload, timeout=180)
+                if response.status_code != 200:
+                    req["outcome"] = f"http_{response.status_code}"
 
             if response.status_code == 200:
                 data = response.json()
@@ -493,7 +557,10 @@ class Brain:
                                 "stream": False
                             }
                             
-                            summary_response = requests.post(LLM_URL, json=summary_payload, timeout=180)
+                            with track_llm_request(FAST_LLM_MODEL, "summary") as req:
+                                summary_response = requests.post(LLM_URL, json=summary_payload, timeout=180)
+                                if summary_response.status_code != 200:
+                                    req["outcome"] = f"http_{summary_response.status_code}"
                             if summary_response.status_code == 200:
                                 content = summary_response.json().get("message", {}).get("content", "")
                             else:
@@ -569,6 +636,7 @@ class Brain:
 
 
         lower_text = user_text.lower()
+        t_route = time.perf_counter()
 
         # Pre-LLM camera check: if user asks to take a photo / look at something,
         # emit the action JSON directly without calling the LLM.
@@ -583,6 +651,7 @@ class Brain:
             "what's that", "what is that",
         ]
         if any(kw in lower_text for kw in camera_keywords):
+            tracing.record("route", time.perf_counter() - t_route)
             action = '{"action": "take_photo"}'
             lead_in = _quick_lead_in(user_text, "photo")
             if lead_in:
@@ -593,6 +662,7 @@ class Brain:
 
         # Pre-LLM display_image check
         if any(kw in lower_text for kw in _DISPLAY_IMAGE_KEYWORDS):
+            tracing.record("route", time.perf_counter() - t_route)
             action = _build_display_image_action(user_text)
             matched_kw = next(kw for kw in _DISPLAY_IMAGE_KEYWORDS if kw in lower_text)
             print(f"[LLM-STREAM] Image keyword MATCHED: '{matched_kw}' in '{lower_text[:60]}'")
@@ -605,6 +675,7 @@ class Brain:
 
         # Pre-LLM music check — emit play_music directly
         if any(kw in lower_text for kw in _MUSIC_KEYWORDS):
+            tracing.record("route", time.perf_counter() - t_route)
             action = '{"action": "play_music"}'
             matched_kw = next(kw for kw in _MUSIC_KEYWORDS if kw in lower_text)
             print(f"[LLM-STREAM] Music keyword MATCHED: '{matched_kw}' in '{lower_text[:60]}'")
@@ -616,6 +687,7 @@ class Brain:
             return
 
         print(f"[LLM-STREAM] No pre-LLM action matched for: '{lower_text[:60]}'")
+        tracing.record("route", time.perf_counter() - t_route)
 
         # Pre-LLM keyword check: if the question likely needs real-time info,
         # do the web search now rather than relying on the model to emit JSON.
@@ -672,12 +744,15 @@ class Brain:
         }
 
         full_content = ""
-        buffer = ""
+        sentences = SentenceBuffer()
         assistant_appended = False
 
         try:
             logger.info(f"Stream request to LLM ({chosen_model}): {LLM_URL}")
-            with requests.post(LLM_URL, json=payload, stream=True, timeout=180) as response:
+            t_request = time.perf_counter()
+            got_first_token = False
+            with track_llm_request(chosen_model, "stream") as req, \
+                    requests.post(LLM_URL, json=payload, stream=True, timeout=180) as response:
                 if response.status_code == 200:
                     for line in response.iter_lines():
                         if line:
@@ -686,51 +761,26 @@ class Brain:
                                 chunk = data.get("message", {}).get("content", "")
                                 if not chunk:
                                     continue
-                                    
+                                if not got_first_token:
+                                    got_first_token = True
+                                    ttft = time.perf_counter() - t_request
+                                    tracing.record("llm_ttft", ttft)
+                                    LLM_TTFT.observe(ttft, model=chosen_model)
+
                                 # Replace smart quotes
                                 chunk = chunk.replace('“', '"').replace('”', '"').replace('‘', "'").replace('’', "'")
-                                
-                                buffer += chunk
                                 full_content += chunk
-                                
-                                # If buffer ends with strong punctuation or newline, yield it.
-                                # Skip flush for: (a) digit-period-digit ("$4.99"),
-                                # (b) common abbreviations (Dr., Mr., Mrs., e.g., i.e.),
-                                # (c) buffers shorter than 10 chars (avoids "It's." flushing as a sentence)
-                                ends_punct = any(buffer.endswith(p) for p in ['.', '!', '?', '\n'])
-                                mid_decimal = (
-                                    len(buffer) >= 2 and buffer.endswith('.')
-                                    and buffer[-2].isdigit()
-                                )
-                                # Treat short buffers as not ready to flush
-                                trimmed = buffer.strip()
-                                too_short = len(trimmed) < 10
-                                # Common abbrev. tail check (case-insensitive)
-                                abbrev_tail = any(
-                                    trimmed.lower().endswith(a) for a in (
-                                        ' dr.', ' mr.', ' mrs.', ' ms.', ' jr.', ' sr.',
-                                        ' st.', ' vs.', ' etc.', ' e.g.', ' i.e.',
-                                    )
-                                )
-                                ready = ends_punct and not mid_decimal and not too_short and not abbrev_tail
-                                if ready or "\n\n" in buffer:
-                                    # Strip system prompt leakage
-                                    cleaned = strip_prompt_leakage(buffer)
-                                    # Ensure BMO spelling before yielding
-                                    out_chunk = re.sub(r'\bBeemo\b', 'BMO', cleaned, flags=re.IGNORECASE)
-                                    if out_chunk.strip():
-                                        yield out_chunk
-                                    buffer = ""
-                                    
+                                sentence = sentences.feed(chunk)
+                                if sentence:
+                                    yield sentence
+
                             except json.JSONDecodeError:
                                 pass
                                 
                     # Yield any remaining buffer
-                    if buffer.strip():
-                        cleaned = strip_prompt_leakage(buffer)
-                        out_chunk = re.sub(r'\bBeemo\b', 'BMO', cleaned, flags=re.IGNORECASE)
-                        if out_chunk.strip():
-                            yield out_chunk
+                    sentence = sentences.flush()
+                    if sentence:
+                        yield sentence
                         
                     # Handle json actions at the very end if applicable
                     final_action, _ = extract_json_object(full_content)
@@ -753,6 +803,7 @@ class Brain:
                     self._trim_history()
 
                 else:
+                    req["outcome"] = f"http_{response.status_code}"
                     logger.error(f"LLM Stream Error: {response.status_code} - {response.text}")
                     yield "I'm having trouble thinking."
         except requests.exceptions.RequestException as e:
@@ -793,20 +844,59 @@ class Brain:
         on the NPU via the HailoRT Python API.  Falls back to a polite error
         message if the HEF isn't available or the hardware can't be reached.
         """
-        # Strip data URI prefix if present (browser sends "data:image/jpeg;base64,...")
-        if "," in image_base64:
-            image_base64 = image_base64.split(",")[1]
+        return " ".join(part.strip() for part in self.stream_analyze_image(image_base64, user_text))
 
+    def stream_analyze_image(self, image_base64: str, user_text: str, frame=None):
+        """
+        Like analyze_image, but yields sentences while the NPU is still
+        decoding so speech can start after the first one (same chunking as
+        stream_think). image_base64 may also be the raw encoded bytes
+        (/api/vision uploads). Pass an RGB `frame` (core.camera) instead
+        to skip decoding altogether.
+        """
         # We don't append the image to the main history to save context window,
         # but we do append the user's question and the assistant's answer.
         self.history.append({"role": "user", "content": user_text})
-        assistant_appended = False
+        full_content = ""
+        sentences = SentenceBuffer()
+        buffer = request = None
 
+        # One VLM_TIMEOUT_S budget for the whole look, cold model load included
+        deadline = time.monotonic() + VLM_TIMEOUT_S
         try:
-            vlm, frame_shape, frame_dtype = _get_vlm()
+            worker = get_vlm_worker()
+            frame_shape, frame_dtype = worker.wait_ready(timeout=VLM_TIMEOUT_S)
 
-            # Decode the base64 image into a numpy frame the VLM expects
-            frame = _decode_image_to_frame(image_base64, frame_shape, frame_dtype)
+            if frame is not None:
+                # Camera frames usually arrive at frame_shape already
+                frame = fit_frame(frame, frame_shape, frame_dtype)
+            else:
+                # Strip data URI prefix if present (browser sends "data:image/jpeg;base64,...")
+                if isinstance(image_base64, str) and "," in image_base64:
+                    image_base64 = image_base64.split(",")[1]
+                # Decode the base64 image into a numpy frame the VLM expects
+                buffer = _FRAME_POOL.acquire(frame_shape, frame_dtype)
+                frame = _decode_image_to_frame(image_base64, frame_shape, frame_dtype, out=buffer)
+
+            question = user_text or "What do you see in this image?"
+            # Same picture, same question within a couple of minutes: no VLM call
+            signature = FrameSignature(frame)
+            answers = get_answer_cache()
+            cached, context_key = answers.lookup(signature, question)
+            if cached is not None:
+                logger.info(f"VLM cache hit: {question!r}")
+                full_content = cached
+                # Chunked exactly like a live answer
+                for piece in re.findall(r"\s*\S+", cached):
+                    sentence = sentences.feed(piece)
+                    if sentence:
+                        yield sentence
+                sentence = sentences.flush()
+                if sentence:
+                    yield sentence
+                return
+            # No matching picture: a fresh key, so nothing continues on another image's context
+            context_key = context_key or uuid.uuid4().hex
 
             # Build the structured prompt expected by the Qwen2-VL model
             prompt = [
@@ -815,60 +905,65 @@ class Brain:
                 ]},
                 {"role": "user", "content": [
                     {"type": "image"},
-                    {"type": "text", "text": user_text or "What do you see in this image?"}
+                    {"type": "text", "text": question}
                 ]}
             ]
+            # A different question about the same picture continues on the
+            # image context the worker kept from the last answer, if it still has it
+            followup = [{"role": "user", "content": [{"type": "text", "text": question}]}]
 
             logger.info("Running VLM inference on Hailo NPU ...")
-            vlm.clear_context()
-
-            # Run generate_all with a hard timeout so a hung/throttled NPU
-            # doesn't freeze the agent indefinitely.
-            import threading
-            result = {"content": None, "exc": None}
-
-            def _run():
-                try:
-                    result["content"] = vlm.generate_all(
-                        prompt=prompt,
-                        frames=[frame],
-                        max_generated_tokens=150,
-                        temperature=0.4,
-                    )
-                except Exception as e:
-                    result["exc"] = e
-
-            t = threading.Thread(target=_run, daemon=True)
-            t.start()
-            t.join(timeout=30)
-            if t.is_alive():
-                logger.error("VLM inference timed out after 30s.")
-                return "My eyes are taking too long to focus right now."
-            if result["exc"] is not None:
-                raise result["exc"]
-            content = result["content"] or ""
-
-            # Clean up any smart quotes, stop tokens, or stray formatting
-            content = content.replace('\u201c', '"').replace('\u201d', '"')
-            content = content.replace('\u2018', "'").replace('\u2019', "'")
-            for tok in ("<|im_end|>", "<|endoftext|>", "<|im_start|>"):
-                content = content.replace(tok, "")
-            content = content.strip()
-
-            logger.info(f"VLM response ({len(content)} chars): {content[:120]}...")
-
-            self.history.append({"role": "assistant", "content": content})
-            assistant_appended = True
-            return content
-
+            # The worker enforces the deadline between tokens and stops
+            # decoding, so a slow NPU never keeps running behind our back.
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise VLMTimeout(f"VLM took all of {VLM_TIMEOUT_S:g}s to load")
+            request = worker.submit(prompt, [frame], max_tokens=150, temperature=0.4,
+                                    timeout=remaining, context_key=context_key,
+                                    followup_prompt=followup)
+            for token in request:
+                # Clean up any smart quotes or stray formatting
+                token = token.replace('\u201c', '"').replace('\u201d', '"')
+                token = token.replace('\u2018', "'").replace('\u2019', "'")
+                if not token:
+                    continue
+                if not full_content:
+                    tracing.record("vlm_ttft", time.monotonic() - request.submitted)
+                full_content += token
+                sentence = _strip_stop_tokens(sentences.feed(token))
+                if sentence:
+                    yield sentence
+            sentence = _strip_stop_tokens(sentences.flush())
+            if sentence:
+                yield sentence
+            full_content = _strip_stop_tokens(full_content) or ""
+
+            logger.info(f"VLM response ({len(full_content)} chars): {full_content.strip()[:120]}...")
+            answers.put(signature, question, full_content.strip(), context_key)
+
+        except VLMTimeout as e:
+            logger.error(f"VLM inference timed out: {e}")
+            yield "My eyes are taking too long to focus right now."
+        except VLMUnavailable as e:
+            logger.warning(f"VLM unavailable: {e}")
+            yield "I tried to look, but my eyes aren't working right now."
         except FileNotFoundError as e:
             logger.warning(f"VLM HEF not found: {e}")
-            return "BMO's vision model isn't installed yet. Run setup.sh to download it!"
+            yield "BMO's vision model isn't installed yet. Run setup.sh to download it!"
         except Exception as e:
             logger.error(f"VLM Exception: {e}", exc_info=True)
-            return "I tried to look, but my eyes aren't working right now."
+            yield "I tried to look, but my eyes aren't working right now."
         finally:
-            # Preserve user/assistant alternation if any error path bailed.
-            if not assistant_appended:
-                if self.history and self.history[-1].get("role") == "user":
-                    self.history.pop()
+            if buffer is not None:
+                # The worker may still be reading the frame after we give up
+                if request is not None:
+                    request.add_done_callback(lambda _req: _FRAME_POOL.release(buffer))
+                else:
+                    _FRAME_POOL.release(buffer)
+            # Keep user/assistant alternation: record what we got (even a
+            # partial answer), or drop the dangling question.
+            answer = (_strip_stop_tokens(full_content) or "").strip()
+            if answer:
+                self.history.append({"role": "assistant", "content": answer})
+            elif self.history and self.history[-1].get("role") == "user":
+                self.history.pop()
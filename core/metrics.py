@@ -0,0 +1,361 @@
+"""Process-wide metrics registry with Prometheus text exposition.
+
+Modules declare their metrics once at import time, and re-declaring a name
+returns the existing metric:
+
+    from . import metrics
+    LLM_SECONDS = metrics.histogram("bmo_llm_request_seconds", "LLM call latency", ["model"])
+    ...
+    with LLM_SECONDS.time(model=chosen_model):
+        ...
+
+REGISTRY.exposition() renders every metric in text format version 0.0.4.
+web_app serves it at /metrics. The agent serves it from its own small HTTP
+server (start_http_server). System stats (CPU, memory, temperature, LLM
+reachability, recent journal lines) are sampled by SystemCollector on a
+background thread, so nothing blocks inside a request.
+"""
+import contextlib
+import logging
+import math
+import os
+import subprocess
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt_value(v):
+    if v == math.inf:
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def items(self):
+        """[(labels dict, value)] for every label combination seen."""
+        with self._lock:
+            return [(dict(zip(self.labelnames, k)), v) for k, v in self._values.items()]
+
+    def expose(self):
+        lines = self._header()
+        for labels, v in sorted(self.items(), key=lambda kv: tuple(kv[0].values())):
+            lines.append(f"{self.name}{_fmt_labels(self.labelnames, labels.values())} {_fmt_value(v)}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._functions = {}
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn, **labels):
+        """Evaluate fn() at exposition time (queue depths, pool sizes)."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def value(self, **labels):
+        key = self._key(labels)
+        with self._lock:
+            fn = self._functions.get(key)
+            if fn is None:
+                return self._values.get(key)
+        try:
+            return fn()
+        except Exception:
+            return None
+
+    def expose(self):
+        lines = self._header()
+        with self._lock:
+            keys = sorted(set(self._values) | set(self._functions))
+        for key in keys:
+            v = self.value(**dict(zip(self.labelnames, key)))
+            if v is None:
+                continue
+            lines.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(v)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._data = {}  # key -> [bucket counts (non-cumulative)], sum, count
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            d = self._data.get(key)
+            if d is None:
+                d = self._data[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    d[0][i] += 1
+                    break
+            d[1] += value
+            d[2] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t, **labels)
+
+    def snapshot(self, **labels):
+        """(cumulative bucket counts by upper bound, sum, count) for one label set."""
+        with self._lock:
+            d = self._data.get(self._key(labels))
+            if d is None:
+                return {b: 0 for b in self.buckets}, 0.0, 0
+            counts, total, n = list(d[0]), d[1], d[2]
+        cumulative, running = {}, 0
+        for bound, c in zip(self.buckets, counts):
+            running += c
+            cumulative[bound] = running
+        return cumulative, total, n
+
+    def label_sets(self):
+        with self._lock:
+            return [dict(zip(self.labelnames, k)) for k in self._data]
+
+    def expose(self):
+        lines = self._header()
+        for labels in sorted(self.label_sets(), key=lambda d: tuple(d.values())):
+            cumulative, total, n = self.snapshot(**labels)
+            values = labels.values()
+            for bound, c in cumulative.items():
+                le = f'le="{_fmt_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, values, [le])} {c}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, values)} {_fmt_value(total)}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, values)} {n}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(m, cls):
+                raise ValueError(f"{name} already registered as {m.kind}")
+            return m
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def exposition(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for m in metrics:
+            lines.extend(m.expose())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY._get_or_create(Counter, name, documentation, labelnames)
+
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY._get_or_create(Gauge, name, documentation, labelnames)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+# --------------------------------------------------------------------------- #
+#  Background system collector
+# --------------------------------------------------------------------------- #
+
+class SystemCollector:
+    """Samples system stats every `interval` seconds on a daemon thread.
+
+    The latest sample is in `last` (dict) and in bmo_system_* gauges. Recent
+    journal lines for `journal_unit` are kept for /api/debug rather than
+    exported as metrics.
+    """
+
+    def __init__(self, interval=15.0, journal_unit=None, llm_health_url=None):
+        self.interval = interval
+        self.journal_unit = journal_unit
+        self.llm_health_url = llm_health_url
+        self.last = {}
+        self.journal = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._cpu = gauge("bmo_system_cpu_percent", "System-wide CPU utilisation since the last sample")
+        self._mem = gauge("bmo_system_memory_percent", "System memory in use")
+        self._load = gauge("bmo_system_load1", "1-minute load average")
+        self._temp = gauge("bmo_system_cpu_temp_celsius", "SoC temperature")
+        self._rss = gauge("bmo_process_rss_bytes", "Resident memory of this process")
+        self._llm_up = gauge("bmo_llm_up", "1 if the LLM server answered the last health check")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="metrics-collector")
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        try:
+            import psutil
+        except ImportError:
+            psutil = None
+            logger.warning("psutil not installed — system metrics limited")
+        if psutil is not None:
+            psutil.cpu_percent(interval=None)  # prime: the first call always returns 0.0
+        delay = 1.0  # short first window so /api/debug has numbers soon after startup
+        while not self._stop.wait(delay):
+            try:
+                self.sample(psutil)
+            except Exception as e:
+                logger.warning(f"Metrics collection failed: {e}")
+            delay = self.interval
+
+    def sample(self, psutil=None):
+        s = {"ts": time.time()}
+        if psutil is not None:
+            s["cpu_percent"] = psutil.cpu_percent(interval=None)
+            s["memory_percent"] = psutil.virtual_memory().percent
+            s["rss_bytes"] = psutil.Process().memory_info().rss
+            self._cpu.set(s["cpu_percent"])
+            self._mem.set(s["memory_percent"])
+            self._rss.set(s["rss_bytes"])
+        try:
+            s["load1"] = os.getloadavg()[0]
+            self._load.set(s["load1"])
+        except OSError:
+            pass
+        try:
+            with open("/sys/class/thermal/thermal_zone0/temp") as f:
+                s["cpu_temp_c"] = int(f.read().strip()) / 1000.0
+            self._temp.set(s["cpu_temp_c"])
+        except (OSError, ValueError):
+            pass
+
+        if self.llm_health_url:
+            import requests
+            try:
+                r = requests.get(self.llm_health_url, timeout=2)
+                s["llm_status"] = "online" if r.status_code == 200 else f"error ({r.status_code})"
+                s["llm_error"] = None
+            except Exception as e:
+                s["llm_status"], s["llm_error"] = "offline", str(e)
+            self._llm_up.set(1 if s["llm_status"] == "online" else 0)
+
+        if self.journal_unit:
+            try:
+                result = subprocess.run(
+                    ["journalctl", "-u", self.journal_unit, "-n", "10", "--no-pager"],
+                    capture_output=True, text=True, timeout=2,
+                )
+                self.journal = result.stdout.splitlines()
+            except Exception as e:
+                self.journal = [f"Could not fetch logs: {e}"]
+        self.last = s
+        return s
+
+
+def start_http_server(port, host="0.0.0.0"):
+    """Serve REGISTRY at http://host:port/metrics from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.exposition().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    logger.info(f"Metrics on http://{host}:{port}/metrics")
+    return server
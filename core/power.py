@@ -0,0 +1,189 @@
+"""Idle power governor for the agent.
+
+Nothing used to slow down when nobody was around. update_animation
+rescheduled itself every 120 ms, the screensaver re-picked an expression
+every 8-18 s, and every mic chunk louder than a fixed level went through
+decimation and wake-word inference, all night long. PowerGovernor picks a
+mode from the agent state and the clock, and the agent asks it what to do:
+
+  active  anything but the screensaver: full frame rate, normal wake word
+  idle    screensaver by day: frames at POWER_IDLE_FRAME_MS at most
+  night   screensaver in QUIET_HOURS: frames at POWER_NIGHT_FRAME_MS, no
+          mood/expression churn, and the mic goes through WakeGate first
+
+WakeGate is an energy VAD: a chunk must stand out from an adaptive noise
+floor (fans, fridge hum) for `attack` chunks before the wake-word model
+runs. The chunks that opened the gate are replayed first, so the start of
+"Hey BMO" isn't lost. It stays open for `hangover_s` after the last loud
+chunk.
+
+CPU time (process-wide) and wakeups (frame ticks, mic reads, wake-word
+inferences) are accounted per mode. They're exported as
+bmo_power_{seconds,cpu_seconds,wakeups}_total{mode}, and report() gives
+the averages. The agent logs them whenever the mode changes.
+"""
+import collections
+import logging
+import threading
+import time
+
+import numpy as np
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = "active"
+IDLE = "idle"
+NIGHT = "night"
+MODES = (ACTIVE, IDLE, NIGHT)
+
+_MODE = metrics.gauge("bmo_power_mode", "1 for the current power mode", ["mode"])
+_SECONDS = metrics.counter("bmo_power_seconds_total", "Wall time spent in each power mode", ["mode"])
+_CPU = metrics.counter("bmo_power_cpu_seconds_total", "Process CPU time used in each power mode", ["mode"])
+_WAKEUPS = metrics.counter("bmo_power_wakeups_total", "Loop wakeups by power mode and source", ["mode", "source"])
+_GATE = metrics.counter("bmo_wake_gate_chunks_total", "Mic chunks that did or didn't run the wake-word model",
+                        ["result"])
+
+
+def in_quiet_hours(hour, quiet_hours):
+    """True if `hour` falls in (start, end), which may wrap past midnight."""
+    start, end = quiet_hours
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+class PowerGovernor:
+    """Current power mode plus per-mode CPU/wakeup accounting."""
+
+    def __init__(self, quiet_hours=(22, 8), idle_frame_ms=250, night_frame_ms=500, gate="night"):
+        self.quiet_hours = quiet_hours
+        self.idle_frame_ms = idle_frame_ms
+        self.night_frame_ms = night_frame_ms
+        self.gate = gate  # "off", "night" or "always"
+        self.mode = ACTIVE
+        self._lock = threading.Lock()
+        self._since = time.monotonic()
+        self._cpu_since = time.process_time()
+        self._totals = {m: {"seconds": 0.0, "cpu": 0.0, "wakeups": collections.Counter()} for m in MODES}
+        for m in MODES:
+            _MODE.set(1 if m == ACTIVE else 0, mode=m)
+
+    def update(self, screensaver, now=None):
+        """Re-evaluate the mode (`now` is a time.struct_time, default local time).
+        Returns the previous mode if it changed, else None."""
+        if not screensaver:
+            mode = ACTIVE
+        else:
+            hour = (now or time.localtime()).tm_hour
+            mode = NIGHT if in_quiet_hours(hour, self.quiet_hours) else IDLE
+        if mode == self.mode:
+            return None
+        with self._lock:
+            old = self.mode
+            self._close_span()
+            self.mode = mode
+        _MODE.set(0, mode=old)
+        _MODE.set(1, mode=mode)
+        return old
+
+    @property
+    def churn_paused(self):
+        return self.mode == NIGHT
+
+    @property
+    def gate_enabled(self):
+        return self.gate == "always" or (self.gate == "night" and self.mode == NIGHT)
+
+    def frame_interval(self, interval_ms):
+        """Stretch the animation interval the active mode would use."""
+        if self.mode == NIGHT:
+            return max(interval_ms, self.night_frame_ms)
+        if self.mode == IDLE:
+            return max(interval_ms, self.idle_frame_ms)
+        return interval_ms
+
+    def wakeup(self, source):
+        mode = self.mode
+        with self._lock:
+            self._totals[mode]["wakeups"][source] += 1
+        _WAKEUPS.inc(mode=mode, source=source)
+
+    def _close_span(self):
+        """Charge wall and CPU time since the last switch to the current mode (lock held)."""
+        now, cpu = time.monotonic(), time.process_time()
+        seconds, cpu_s = now - self._since, cpu - self._cpu_since
+        self._since, self._cpu_since = now, cpu
+        totals = self._totals[self.mode]
+        totals["seconds"] += seconds
+        totals["cpu"] += cpu_s
+        _SECONDS.inc(seconds, mode=self.mode)
+        _CPU.inc(cpu_s, mode=self.mode)
+
+    def report(self):
+        """{mode: {seconds, cpu_pct, wakeups_per_s, by_source}} for modes seen so far."""
+        with self._lock:
+            self._close_span()
+            out = {}
+            for mode, t in self._totals.items():
+                if t["seconds"] <= 0:
+                    continue
+                out[mode] = {
+                    "seconds": round(t["seconds"], 1),
+                    "cpu_pct": round(100 * t["cpu"] / t["seconds"], 2),
+                    "wakeups_per_s": round(sum(t["wakeups"].values()) / t["seconds"], 2),
+                    "by_source": {s: round(n / t["seconds"], 2) for s, n in sorted(t["wakeups"].items())},
+                }
+            return out
+
+
+class WakeGate:
+    """Energy VAD in front of the wake-word model (see module docstring)."""
+
+    def __init__(self, min_rms=150.0, ratio=3.0, attack=2, hangover_s=1.5, chunk_s=0.08, preroll=8):
+        self.min_rms = min_rms
+        self.ratio = ratio
+        self.attack = attack
+        self.hangover = max(1, int(round(hangover_s / chunk_s)))
+        self.floor = None
+        self._recent = collections.deque(maxlen=max(preroll, attack))
+        self._loud = 0
+        self._left = 0  # chunks until the gate closes; 0 = closed
+
+    @property
+    def is_open(self):
+        return self._left > 0
+
+    def reset(self):
+        self._recent.clear()
+        self._loud = 0
+        self._left = 0
+
+    def feed(self, chunk):
+        """Chunks to run the wake-word model on now ([] while the gate is shut)."""
+        rms = float(np.sqrt(np.mean(np.square(chunk, dtype=np.float32))))
+        if self.floor is None:
+            self.floor = rms
+        loud = rms >= max(self.min_rms, self.floor * self.ratio)
+        # Follow the room's noise: quickly while it's quiet (~2 s), slowly while
+        # loud (~40 s) so a heater switching on doesn't hold the gate open all night
+        self.floor += (0.002 if loud else 0.04) * (rms - self.floor)
+
+        if self._left:
+            self._left = self.hangover if loud else self._left - 1
+            _GATE.inc(result="passed")
+            return [chunk]
+
+        self._recent.append(chunk)
+        self._loud = self._loud + 1 if loud else 0
+        if self._loud < self.attack:
+            _GATE.inc(result="skipped")
+            return []
+        # Open: replay what led up to this chunk so the model sees the whole onset
+        chunks = list(self._recent)
+        self._recent.clear()
+        self._loud = 0
+        self._left = self.hangover
+        _GATE.inc(result="passed")
+        return chunks
@@ -1,86 +1,350 @@
 import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 try:
     from ddgs import DDGS  # new package name (pip install ddgs)
 except ImportError:
     from duckduckgo_search import DDGS  # fallback for older installs
 
+from .config import SEARCH_CACHE_PATH, SEARCH_CACHE_TTL, SEARCH_CACHE_STALE, SEARCH_DEADLINE_S
+from . import metrics
+
 logger = logging.getLogger(__name__)
 
+NEWS_KEYWORDS = ["news", "latest", "today", "happening", "current"]
+
+# Results that mean "nothing useful" — never cached, so the next call retries.
+_UNCACHEABLE = {"", "SEARCH_EMPTY", "SEARCH_ERROR"}
+
+
+# --- Result cache ------------------------------------------------------------
+
+class SearchCache:
+    """Persistent (kind, normalized query) -> result cache with TTL tiers.
+
+    Lookups return (value, fresh). A fresh entry is younger than the kind's TTL.
+    A stale entry is past the TTL but still inside the kind's stale window;
+    the caller serves it and refreshes it in the background. Anything older
+    counts as a miss.
+    """
+
+    def __init__(self, path=SEARCH_CACHE_PATH, ttl=SEARCH_CACHE_TTL, stale=SEARCH_CACHE_STALE):
+        self.path = path
+        self.ttl = ttl
+        self.stale = stale
+        self._lock = threading.Lock()
+        self._conn = None
+        self._events = metrics.counter("bmo_search_cache_events_total",
+                                       "Search cache lookups and background refreshes", ["kind", "event"])
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                " kind TEXT NOT NULL, query TEXT NOT NULL, value TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL, PRIMARY KEY (kind, query))"
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Case/whitespace/trailing-punctuation insensitive key."""
+        q = re.sub(r"\s+", " ", query.lower()).strip()
+        return q.strip(" ?!.,;:'\"")
+
+    def count(self, kind, event):
+        self._events.inc(kind=kind, event=event)
+
+    def get(self, kind, query):
+        try:
+            with self._lock:
+                row = self._db().execute(
+                    "SELECT value, fetched_at FROM search_cache WHERE kind=? AND query=?",
+                    (kind, self.normalize(query)),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Search cache read failed: {e}")
+            return None, False
+        if row is None:
+            return None, False
+        value, fetched_at = row
+        age = time.time() - fetched_at
+        if age < self.ttl.get(kind, 0):
+            return value, True
+        if age < self.stale.get(kind, 0):
+            return value, False
+        return None, False
+
+    def put(self, kind, query, value):
+        if not value or value in _UNCACHEABLE:
+            return
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO search_cache (kind, query, value, fetched_at) VALUES (?, ?, ?, ?)",
+                    (kind, self.normalize(query), value, time.time()),
+                )
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Search cache write failed: {e}")
+
+    def stats(self) -> dict:
+        out = {}
+        for labels, n in self._events.items():
+            c = out.setdefault(labels["kind"], {"hit": 0, "stale": 0, "miss": 0, "refresh": 0})
+            c[labels["event"]] = n
+        for c in out.values():
+            looked_up = c["hit"] + c["stale"] + c["miss"]
+            c["hit_rate"] = round((c["hit"] + c["stale"]) / looked_up, 3) if looked_up else 0.0
+        return out
+
+
+_cache = SearchCache()
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _refresh_in_background(kind, query, fetch):
+    key = (kind, SearchCache.normalize(query))
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            _cache.put(kind, query, fetch())
+            _cache.count(kind, "refresh")
+        except Exception as e:
+            logger.warning(f"Background refresh failed for {kind} '{query}': {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, daemon=True, name="search-refresh").start()
+
+
+def _cached(kind, query, fetch):
+    value, fresh = _cache.get(kind, query)
+    if value is not None:
+        if fresh:
+            _cache.count(kind, "hit")
+        else:
+            _cache.count(kind, "stale")
+            _refresh_in_background(kind, query, fetch)
+        logger.info(f"Search cache {'hit' if fresh else 'stale hit'} ({kind}): {query}")
+        return value
+    _cache.count(kind, "miss")
+    value = fetch()
+    _cache.put(kind, query, value)
+    return value
+
+
+def cache_stats() -> dict:
+    """Hit/stale/miss/refresh counters per search kind (this process)."""
+    return _cache.stats()
+
+
+def search_kind(query: str) -> str:
+    """Which TTL tier a web query belongs to."""
+    query_lower = query.lower()
+    if "weather" in query_lower:
+        return "weather"
+    if any(k in query_lower for k in NEWS_KEYWORDS):
+        return "news"
+    return "text"
+
+
+# --- Backends ----------------------------------------------------------------
+
 def search_web(query: str) -> str:
     """
     Searches DuckDuckGo for the given query and returns a summary of the top result.
     Special cases: Weather uses wttr.in for better accuracy.
+    Results are cached per search kind (see SEARCH_CACHE_TTL in core/config.py).
     """
-    logger.info(f"Searching web for: {query}")
+    return _cached(search_kind(query), query, lambda: _search_web_uncached(query))
+
+
+# Latency histogram bucket upper bounds (seconds); the last bucket is +Inf.
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0)
+
+_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="search")
+_BACKEND_SECONDS = metrics.histogram("bmo_search_backend_seconds", "Search backend latency (completed calls)",
+                                     ["backend"], buckets=LATENCY_BUCKETS)
+_BACKEND_OUTCOMES = metrics.counter("bmo_search_backend_outcomes_total",
+                                    "Search backend calls by outcome (ok/empty/error/timeout)", ["backend", "outcome"])
+
+
+def _record_backend(name, seconds, outcome):
+    """One outcome per backend call. `seconds` is None for a call cancelled
+    before it started (it has no latency)."""
+    _BACKEND_OUTCOMES.inc(backend=name, outcome=outcome)
+    if seconds is not None:
+        _BACKEND_SECONDS.observe(seconds, backend=name)
+
+
+def backend_stats() -> dict:
+    """Per-backend latency histograms and outcome counts (this process)."""
+    names = {l["backend"] for l in _BACKEND_SECONDS.label_sets()}
+    names |= {l["backend"] for l, _n in _BACKEND_OUTCOMES.items()}
+    out = {}
+    for name in sorted(names):
+        cumulative, total, count = _BACKEND_SECONDS.snapshot(backend=name)
+        out[name] = {
+            "le": {("+Inf" if b == math.inf else str(b)): n for b, n in cumulative.items()},
+            "avg_s": round(total / count, 3) if count else None,
+            "count": count,
+            **{k: _BACKEND_OUTCOMES.value(backend=name, outcome=k) for k in ("ok", "empty", "error", "timeout")},
+        }
+    return out
+
+
+def _region(query_lower):
+    # Use Canadian region if Ontario is mentioned or if it's a general request in this fork
+    # This makes BMO feel more local to the user's setup.
+    return 'ca-en' if any(k in query_lower for k in ['ontario', 'canada', 'brantford', 'toronto']) else 'wt-wt'
+
+
+def _format_results(query, results):
+    # Combine up to 3 results for richer context
+    parts = []
+    for r in results[:3]:
+        title = r.get('title', 'No Title')
+        body = r.get('body', r.get('snippet', 'No Body'))
+        parts.append(f"Title: {title}\nSnippet: {body[:400]}")
+    return f"SEARCH RESULTS for '{query}':\n" + "\n---\n".join(parts)
+
+
+def _backend_wttr(query, timeout):
+    import requests
     query_lower = query.lower()
-    
-    # 0. Special Case: Weather
-    if "weather" in query_lower:
-        location = "Brantford" # Default
-        if "in " in query_lower:
-            location = query_lower.split("in ")[1].split(",")[0].strip().replace(" ", "+")
-        
-        try:
-            import requests
-            # Using format v2 with 0 days (just today's detailed table)
-            url = f"https://wttr.in/{location}?format=v2&0"
-            resp = requests.get(url, timeout=10)
-            if resp.status_code == 200:
-                result = f"LIVE WEATHER DATA for {location}:\n{resp.text}"
-                logger.info(f"Weather fetched from wttr.in: {location}")
-                return result
-        except Exception as e:
-            logger.warning(f"wttr.in Weather Error: {e}")
-            # Fall through to DDG if wttr.in fails
+    location = "Brantford" # Default
+    if "in " in query_lower:
+        location = query_lower.split("in ")[1].split(",")[0].strip().replace(" ", "+")
+    # Using format v2 with 0 days (just today's detailed table)
+    resp = requests.get(f"https://wttr.in/{location}?format=v2&0", timeout=timeout)
+    if resp.status_code != 200:
+        raise RuntimeError(f"wttr.in returned {resp.status_code}")
+    logger.info(f"Weather fetched from wttr.in: {location}")
+    return f"LIVE WEATHER DATA for {location}:\n{resp.text}"
+
+
+def _backend_ddg_news(query, timeout):
+    with DDGS(timeout=timeout) as ddgs:
+        results = list(ddgs.news(query, region=_region(query.lower()), max_results=5))
+    return _format_results(query, results) if results else None
+
+
+def _backend_ddg_text(query, timeout):
+    with DDGS(timeout=timeout) as ddgs:
+        results = list(ddgs.text(query, region=_region(query.lower()), max_results=3))
+    return _format_results(query, results) if results else None
+
 
+_BACKENDS = {
+    "wttr": _backend_wttr,
+    "ddg_news": _backend_ddg_news,
+    "ddg_text": _backend_ddg_text,
+}
+
+
+def _plan(query):
+    """Candidate backends for a query, best first."""
+    kind = search_kind(query)
+    if kind == "weather":
+        return ["wttr", "ddg_text"]
+    if kind == "news":
+        return ["ddg_news", "ddg_text"]
+    return ["ddg_text"]
+
+
+def _run_backend(name, query, timeout, abandoned):
+    """Run one backend and record its outcome. If the search gave up on it
+    (`abandoned` set at the deadline), that outcome is "timeout", with the
+    real duration, whatever the backend eventually returned."""
+    t0 = time.monotonic()
     try:
-        with DDGS(timeout=10) as ddgs:
-            results = []
-            
-            # Use Canadian region if Ontario is mentioned or if it's a general request in this fork
-            # This makes BMO feel more local to the user's setup.
-            region = 'ca-en' if any(k in query_lower for k in ['ontario', 'canada', 'brantford', 'toronto']) else 'wt-wt'
-            
-            # 1. Try News search first for current events (skip for weather)
-            if any(k in query_lower for k in ["news", "latest", "today", "happening", "current"]):
-                try:
-                    logger.info(f"Searching News (region={region})...")
-                    results = list(ddgs.news(query, region=region, max_results=5))
-                    if results:
-                        logger.info(f"Found {len(results)} news items.")
-                except Exception as e:
-                    logger.warning(f"News Search Error: {e}")
-            
-            # 2. Fallback to Text search
-            if not results:
-                logger.info(f"Trying text search (region={region})...")
-                try:
-                    results = list(ddgs.text(query, region=region, max_results=3))
-                    if results:
-                        logger.info(f"Found Text: {results[0].get('title')}")
-                except Exception as e:
-                    logger.warning(f"Text Search Error: {e}")
+        result = _BACKENDS[name](query, timeout)
+    except Exception as e:
+        _record_backend(name, time.monotonic() - t0, "timeout" if abandoned.is_set() else "error")
+        logger.warning(f"{name} search error: {e}")
+        raise
+    outcome = "ok" if result else "empty"
+    _record_backend(name, time.monotonic() - t0, "timeout" if abandoned.is_set() else outcome)
+    return result
 
-            if results:
-                # Combine up to 3 results for richer context
-                parts = []
-                for r in results[:3]:
-                    title = r.get('title', 'No Title')
-                    body = r.get('body', r.get('snippet', 'No Body'))
-                    parts.append(f"Title: {title}\nSnippet: {body[:400]}")
-                return f"SEARCH RESULTS for '{query}':\n" + "\n---\n".join(parts)
+
+def _search_web_uncached(query: str, deadline_s: float = SEARCH_DEADLINE_S) -> str:
+    """Run every candidate backend at once; return the best-priority good result.
+
+    A lower-priority result is only returned once every backend ranked above
+    it has failed or come back empty, or when the deadline passes. Backends
+    still queued at that point are cancelled. Ones already running can't be
+    interrupted, but they are bounded by the same timeout and nobody waits
+    for them.
+    """
+    plan = _plan(query)
+    logger.info(f"Searching web for: {query} (backends: {', '.join(plan)})")
+    deadline = time.monotonic() + deadline_s
+    abandoned = threading.Event()
+    futures = [(name, _executor.submit(_run_backend, name, query, deadline_s, abandoned)) for name in plan]
+    pending = {f for _, f in futures}
+
+    try:
+        while True:
+            for name, fut in futures:
+                if not fut.done():
+                    break  # a better-ranked backend may still win — keep waiting
+                if fut.exception() is None and fut.result():
+                    logger.info(f"Search answered by {name}")
+                    return fut.result()
             else:
+                # Every backend finished without a usable result
+                if all(f.exception() is not None for _, f in futures):
+                    return "SEARCH_ERROR"
                 logger.info("Search returned 0 results.")
                 return "SEARCH_EMPTY"
-                
-    except Exception as e:
-        logger.error(f"Connection/Library Error during search: {e}")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+        # Deadline passed: settle for the best good result that did arrive
+        for name, fut in futures:
+            if fut.done() and fut.exception() is None and fut.result():
+                logger.info(f"Search deadline hit; using {name}")
+                return fut.result()
+        logger.warning(f"Search deadline ({deadline_s}s) hit with no result for: {query}")
         return "SEARCH_ERROR"
+    finally:
+        timed_out = time.monotonic() >= deadline
+        if timed_out:
+            abandoned.set()  # still-running backends record "timeout" when they finish
+        for name, fut in futures:
+            # A backend that never started records nothing itself
+            if fut.cancel() and timed_out:
+                _record_backend(name, None, "timeout")
+
 
 def search_images(query: str) -> str:
     """
     Searches DuckDuckGo for the given query and returns the first image URL.
+    Cached under the "images" kind.
     """
+    return _cached("images", query, lambda: _search_images_uncached(query))
+
+
+def _search_images_uncached(query: str) -> str:
     logger.info(f"Searching images for: {query}")
     try:
         with DDGS(timeout=10) as ddgs:
@@ -0,0 +1,125 @@
+"""The agent's state, as a validated state machine that wakes its waiters.
+
+BotGUI kept current_state in a plain attribute, so everything that cared
+about it polled. _wait_until_idle checked every 0.5-1 s, the thinking
+sound every 0.1 s, the mic loop every 0.5 s while busy, and the watchdog
+every 30 s, around the clock. StateBus owns the state behind a Condition:
+
+  - set() checks the transition against an allowed-sources table. A bad
+    one is logged and counted (bmo_state_invalid_transitions_total), or
+    raises InvalidTransition when strict. Unknown states are never applied.
+  - Every change wakes all wait_for() callers. They then re-check their
+    predicate, so a waiter reacts the moment the state moves.
+  - Predicates may read other flags too (busy, queued events). Whoever
+    changes such a flag calls notify() so the waiters re-check.
+  - subscribe() hands out a queue of (old, new, reason, at) events for
+    consumers that want the transitions themselves rather than a wait.
+  - close() releases every waiter (wait_for returns False) at shutdown.
+"""
+import logging
+import queue
+import threading
+import time
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_TRANSITIONS = metrics.counter("bmo_state_transitions_total", "Agent state changes by new state", ["state"])
+_INVALID = metrics.counter("bmo_state_invalid_transitions_total", "State changes the transition table doesn't allow",
+                           ["from_state", "to_state"])
+
+
+class InvalidTransition(ValueError):
+    """A state change that the transition table doesn't allow (strict mode only)."""
+
+
+class StateBus:
+    """Current state + Condition. `allowed` maps a target state to the set of
+    states it may be entered from; targets not in it may be entered from any."""
+
+    def __init__(self, initial, states, allowed=None, strict=False):
+        self.states = frozenset(states)
+        if initial not in self.states:
+            raise InvalidTransition(f"unknown initial state {initial!r}")
+        self.allowed = dict(allowed or {})
+        self.strict = strict
+        self.version = 0
+        self.changed_at = time.time()
+        self._state = initial
+        self._cond = threading.Condition()
+        self._subscribers = []
+        self._closed = False
+
+    @property
+    def state(self):
+        return self._state
+
+    def set(self, state, reason=""):
+        """Move to `state`. Returns True if the state changed."""
+        with self._cond:
+            old = self._state
+            if state == old:
+                return False
+            problem = self._check(old, state)
+            if problem:
+                _INVALID.inc(from_state=old, to_state=str(state))
+                if self.strict:
+                    raise InvalidTransition(problem)
+                logger.warning(problem)
+                if state not in self.states:
+                    return False
+            self._state = state
+            self.version += 1
+            self.changed_at = time.time()
+            event = (old, state, reason, self.changed_at)
+            for q in self._subscribers:
+                try:
+                    q.put_nowait(event)
+                except queue.Full:
+                    pass  # a slow subscriber loses events, never blocks set()
+            self._cond.notify_all()
+        _TRANSITIONS.inc(state=state)
+        return True
+
+    def _check(self, old, new):
+        if new not in self.states:
+            return f"unknown state {new!r} (from {old})"
+        sources = self.allowed.get(new)
+        if sources is not None and old not in sources:
+            return f"invalid transition {old} -> {new}"
+        return None
+
+    def notify(self):
+        """Wake waiters to re-check predicates that read flags outside the bus."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait_for(self, predicate, timeout=None):
+        """Block until predicate() is true. It is re-checked on every set() and
+        notify(). Returns False on timeout or after close()."""
+        with self._cond:
+            if self._closed:
+                return False
+            ok = self._cond.wait_for(lambda: self._closed or predicate(), timeout)
+            return bool(ok) and not self._closed
+
+    def wait_while(self, states, timeout=None):
+        """Block while the state is in `states`. False on timeout/close."""
+        return self.wait_for(lambda: self._state not in states, timeout)
+
+    def subscribe(self, maxsize=64):
+        q = queue.Queue(maxsize=maxsize)
+        with self._cond:
+            self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._cond:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -1,11 +1,44 @@
+import io
 import subprocess
 import logging
 import os
 import re
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+
 from .config import WHISPER_CMD, WHISPER_MODEL
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
+STT_RUNS = metrics.counter("bmo_stt_runs_total", "whisper.cpp transcriptions by outcome", ["outcome"])
+STT_SECONDS = metrics.histogram("bmo_stt_seconds", "whisper.cpp wall time per transcription")
+DECODE_SECONDS = metrics.histogram("bmo_stt_decode_seconds", "Browser upload decode + resample to 16 kHz")
+
+# Optional: PyAV decodes in-process. Otherwise ffmpeg runs as a pipe (stdin -> stdout).
+try:
+    import av
+except ImportError:
+    av = None
+
+# whisper-cli reads a WAV from stdin with `-f -`. Builds that predate this
+# reject '-'. The first upload probes once with a known-good WAV (half a
+# second of silence); if that fails, uploads go via a WAV in /dev/shm (RAM).
+# A failure on a real upload says nothing about stdin, so it never flips this.
+_whisper_stdin_ok = None  # None = not probed yet
+_probe_lock = threading.Lock()
+
+
+def _observe(t, text):
+    STT_SECONDS.observe(time.perf_counter() - t)
+    STT_RUNS.inc(outcome="error" if text is None else ("ok" if text else "empty"))
+    return text or ""
+
+
 def transcribe_audio(audio_filepath: str) -> str:
     """
     Run whisper.cpp on a 16 kHz mono WAV file produced by record_audio().
@@ -15,22 +48,94 @@ def transcribe_audio(audio_filepath: str) -> str:
     if not os.path.exists(audio_filepath):
         logger.error(f"Audio file not found: {audio_filepath}")
         return ""
+    t = time.perf_counter()
+    return _observe(t, _run_whisper(audio_filepath))
+
+
+def _wav_bytes(pcm, sample_rate):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(np.asarray(pcm, dtype=np.int16).tobytes())
+    return buf.getvalue()
+
 
+def _stdin_supported():
+    """Whether this whisper-cli build accepts `-f -` (probed once)."""
+    global _whisper_stdin_ok
+    with _probe_lock:
+        if _whisper_stdin_ok is None:
+            if not os.path.exists(WHISPER_CMD):
+                return False  # nothing to probe; _run_whisper reports the missing binary
+            _whisper_stdin_ok = _run_whisper("-", _wav_bytes(np.zeros(8000, dtype=np.int16), 16000)) is not None
+            if not _whisper_stdin_ok:
+                logger.warning("whisper-cli can't read stdin (-f -); using /dev/shm for uploads")
+        return _whisper_stdin_ok
+
+
+def transcribe_pcm(pcm: np.ndarray, sample_rate: int = 16000) -> str:
+    """Transcribe mono int16 PCM without writing it to disk."""
+    wav_bytes = _wav_bytes(pcm, sample_rate)
+    t = time.perf_counter()
+    if _stdin_supported():
+        return _observe(t, _run_whisper("-", wav_bytes))
+    shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    with tempfile.NamedTemporaryFile(suffix=".wav", dir=shm_dir) as f:
+        f.write(wav_bytes)
+        f.flush()
+        return _observe(t, _run_whisper(f.name))
+
+
+def decode_upload(data: bytes, rate: int = 16000) -> np.ndarray:
+    """Decode a browser recording (webm/opus, ogg, mp4/aac, wav) to mono int16 PCM at `rate`, in memory."""
+    t = time.perf_counter()
+    if av is not None:
+        chunks = []
+        with av.open(io.BytesIO(data)) as container:
+            resampler = av.AudioResampler(format="s16", layout="mono", rate=rate)
+            # Streaming: each decoded frame is resampled as it arrives
+            for frame in container.decode(audio=0):
+                for out in resampler.resample(frame):
+                    chunks.append(out.to_ndarray().reshape(-1))
+            for out in resampler.resample(None):  # flush the resampler's tail
+                chunks.append(out.to_ndarray().reshape(-1))
+        pcm = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16)
+    else:
+        proc = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+             "-f", "s16le", "-ac", "1", "-ar", str(rate), "pipe:1"],
+            input=data, capture_output=True, timeout=30,
+        )
+        if proc.returncode != 0:
+            raise ValueError(f"ffmpeg could not decode upload: {proc.stderr.decode(errors='replace')[-200:]}")
+        pcm = np.frombuffer(proc.stdout, dtype=np.int16)
+    DECODE_SECONDS.observe(time.perf_counter() - t)
+    return pcm
+
+
+def _run_whisper(source: str, stdin_bytes: bytes = None):
+    """Run whisper.cpp on a WAV path (or "-" with the WAV on stdin).
+
+    Returns the cleaned transcript ("" if it was only noise/hallucination),
+    or None if whisper itself failed.
+    """
     try:
         # Run whisper.cpp directly on the 16 kHz WAV.
         # -nt  no timestamps (we strip them anyway, skip the compute)
         # -t 3 leave one of the Pi 5's four cores free for Piper / Tk so we
         #      don't thermal-throttle when STT and TTS overlap mid-turn
         # -l en force English, skipping the language-detection pass
-        cmd = [WHISPER_CMD, "-m", WHISPER_MODEL, "-f", audio_filepath, "-nt", "-t", "3", "-l", "en"]
+        cmd = [WHISPER_CMD, "-m", WHISPER_MODEL, "-f", source, "-nt", "-t", "3", "-l", "en"]
         logger.info(f"Running whisper.cpp transcription on the CPU... CMD: {' '.join(cmd)}")
         try:
             # stderr=DEVNULL: whisper prints verbose debug/timing info to stderr.
             # We only want the clean transcript from stdout.
-            output = subprocess.check_output(cmd, stderr=subprocess.DEVNULL).decode("utf-8").strip()
+            output = subprocess.check_output(cmd, input=stdin_bytes, stderr=subprocess.DEVNULL).decode("utf-8").strip()
         except subprocess.CalledProcessError as e:
             logger.error(f"Whisper CPU process failed with exit code {e.returncode}")
-            return ""
+            return None
 
         # 3. Clean up output (remove timestamps like [00:00:00.000 --> 00:00:02.000] or [BLANK_AUDIO])
         output = re.sub(r'\[.*?\]', '', output).strip()
@@ -59,9 +164,6 @@ def transcribe_audio(audio_filepath: str) -> str:
         return output
 
 
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Whisper CPU process failed: {e}")
-        return ""
     except Exception as e:
         logger.error(f"Transcription Error: {e}")
-        return ""
+        return None
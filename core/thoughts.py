@@ -0,0 +1,315 @@
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+
+import requests
+
+from .config import LLM_URL, FAST_LLM_MODEL
+from .llm import extract_json_object, strip_prompt_leakage, track_llm_request
+from .search import search_web, search_images
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Topics BMO might wonder about — used as web search seeds when the LLM
+# can't suggest one of its own.
+SEARCH_TOPICS = [
+    "interesting fun fact of the day",
+    "weather forecast today in Brantford, Ontario",
+    "this day in history",
+    "cool science discovery this week",
+    "funny animal fact",
+    "random wholesome internet story",
+    "video game history fact",
+    "weird food fact",
+    "Adventure Time lore or trivia",
+    "today's astronomy picture",
+    "best joke of the day",
+    "random Wikipedia article summary",
+    "latest space news from NASA",
+    "strange laws in Canada",
+    "mythology fun fact",
+    "how a computer works for kids",
+    "cool deep sea creatures",
+    "interesting insect facts",
+    "history of robots",
+    "why do cats purr",
+    "fastest land animals",
+    "tallest buildings in the world",
+    "invention of the telephone",
+    "what is a black hole",
+    "funny dad jokes",
+    "hilarious puns",
+    "knock knock jokes",
+    "short funny stories",
+    "unusual world records",
+    "history of board games",
+    "how honey is made",
+    "origins of common idioms",
+    "mysteries of the pyramids",
+    "first mission to the moon",
+    "evolution of video game consoles",
+    "how to make a paper airplane",
+    "why the sky is blue",
+    "fun facts about penguins",
+    "discovery of dinosaurs",
+    "life on Mars possibilities",
+    "history of ice cream",
+    "how the internet works for kids",
+    "cool chemistry experiments",
+    "amazing origami facts",
+    "the world's oldest trees",
+]
+
+# Spoken when search/LLM fail and something still has to be said
+FALLBACK_PHRASES = [
+    "I wonder what Finn and Jake are doing right now.",
+    "Does anyone want to play a video game? No? ...Okay.",
+    "La la la la la... BMO is the best!",
+    "Sometimes BMO just likes to hum a little tune.",
+    "Football... is a tough little guy.",
+    "Is it time for a video game yet? I have a new one!",
+    "I hope everyone is having a wonderful day. Especially you!",
+    "Sometimes I like to just sit and think about... well, everything!",
+    "Being a robot is pretty cool, but being BMO is even better!",
+]
+
+
+class Thought:
+    """A ready-to-speak musing: text, optional image URL and optional
+    pre-synthesized Piper PCM (22050 Hz S16_LE mono)."""
+
+    __slots__ = ("topic", "text", "image_url", "pcm", "created_at")
+
+    def __init__(self, topic, text, image_url=None, pcm=b""):
+        self.topic = topic
+        self.text = text
+        self.image_url = image_url
+        self.pcm = pcm
+        self.created_at = time.time()
+
+
+class _Abort(Exception):
+    """Raised mid-generation when the NPU is needed for something else."""
+
+
+def _llm_call(messages, options, timeout, llm_lock=None):
+    """One non-streaming chat call. With llm_lock, only runs if the lock is free
+    (never queue behind a user turn) and raises _Abort otherwise."""
+    if llm_lock is not None and not llm_lock.acquire(blocking=False):
+        raise _Abort("LLM busy")
+    try:
+        payload = {"model": FAST_LLM_MODEL, "messages": messages, "stream": False, "options": options}
+        with track_llm_request(FAST_LLM_MODEL, "thought") as req:
+            resp = requests.post(LLM_URL, json=payload, timeout=timeout)
+            if resp.status_code != 200:
+                req["outcome"] = f"http_{resp.status_code}"
+                return None
+        return resp.json().get("message", {}).get("content", "").strip()
+    finally:
+        if llm_lock is not None:
+            llm_lock.release()
+
+
+def pick_topic(recent=(), llm_lock=None) -> str:
+    """Ask the LLM for a random topic; fall back to SEARCH_TOPICS, avoiding recent ones."""
+    topic = None
+    try:
+        topic = _llm_call(
+            [
+                {"role": "system", "content": "You are BMO's brain. Suggest one very specific, random, and interesting topic for BMO to learn about today. Examples: 'history of the first toaster', 'why do wombats have square poop', 'the mystery of the Voynich manuscript'. Keep it under 10 words. Provide ONLY the topic, no quotes or preamble."},
+                {"role": "user", "content": "Give me a random topic."},
+            ],
+            {"temperature": 1.0, "num_predict": 20}, timeout=10, llm_lock=llm_lock,
+        )
+        if topic:
+            topic = topic.strip('"').strip("'")
+            # Remove any BMO tags or prefix if the LLM leaked them
+            topic = re.sub(r'^Topic:|^BMO topic:|^I want to learn about: ', '', topic, flags=re.IGNORECASE).strip()
+    except _Abort:
+        raise
+    except Exception as e:
+        logger.warning(f"LLM topic generation failed: {e}")
+
+    if not topic or len(topic) < 3:
+        topic = random.choice(SEARCH_TOPICS)
+        # Avoid picking the same topic too often
+        for _ in range(3):
+            if topic in recent:
+                topic = random.choice(SEARCH_TOPICS)
+            else:
+                break
+    return topic
+
+
+def muse(topic, search_result, llm_lock=None):
+    """Turn search results into a short BMO musing (raw model output, may contain a JSON action)."""
+    # Wrap the actual reply in [BMO]...[/BMO]. The stripper isolates
+    # whatever's between the markers, so any rule-echo or numbered
+    # preamble outside the tags is automatically discarded.
+    thought_prompt = (
+        "Read this real-world info, then share a short charming musing "
+        "as BMO (under 50 words, finish the thought).\n"
+        "Wrap your final reply between [BMO] and [/BMO] markers — only "
+        "what's between the markers will be spoken.\n"
+        "If the topic is visual, include ONE JSON action AFTER [/BMO]:\n"
+        '  {"action": "display_image", "subject": "<short visual phrase>"}\n\n'
+        f"Topic: {topic}\n"
+        f"Info: {search_result[:1500]}"
+    )
+    try:
+        content = _llm_call(
+            [
+                {"role": "system", "content":
+                 "You are BMO, a cute robot musing to yourself. Always wrap your "
+                 "spoken reply in [BMO]...[/BMO] tags. Be concise and specific."},
+                {"role": "user", "content": thought_prompt},
+            ],
+            {"temperature": 0.8, "num_predict": 256}, timeout=60, llm_lock=llm_lock,
+        )
+    except _Abort:
+        raise
+    except Exception as e:
+        logger.warning(f"Thought generation error: {e}")
+        return None
+    if not content or "connect" in content.lower() or "error" in content.lower():
+        return None
+    # Left raw: the display_image action sits after [/BMO], and
+    # strip_prompt_leakage would drop it. split_image_action cleans up.
+    return content
+
+
+def split_image_action(phrase):
+    """Strip JSON actions from a musing; return (phrase, image_url or None)."""
+    image_url = None
+    while True:
+        action_data, span = extract_json_object(phrase)
+        if action_data is None:
+            break
+        if action_data.get("action") == "display_image":
+            subject = action_data.get("subject") or action_data.get("image_url")
+            if subject:
+                image_url = subject if "://" in subject else (search_images(subject) or None)
+            phrase = (phrase[:span[0]] + phrase[span[1]:]).strip()
+            break  # Only one image
+        elif "action" in action_data:
+            # Other action — strip it and keep scanning
+            phrase = (phrase[:span[0]] + phrase[span[1]:]).strip()
+        else:
+            # Bare {} or non-action JSON — stop the loop
+            break
+    return strip_prompt_leakage(phrase), image_url
+
+
+def make_thought(recent=(), llm_lock=None, synthesize=False, should_continue=None):
+    """Topic -> search -> musing -> image -> (optional) audio. Returns a Thought or None.
+
+    should_continue() is checked between stages so background generation
+    can back off as soon as the user shows up.
+    """
+    def check():
+        if should_continue is not None and not should_continue():
+            raise _Abort("no longer idle")
+
+    try:
+        topic = pick_topic(recent, llm_lock)
+        check()
+        logger.info(f"Pondering about: {topic}")
+        search_result = search_web(topic)
+        if not search_result or search_result in ("SEARCH_EMPTY", "SEARCH_ERROR"):
+            return None
+        check()
+        phrase = muse(topic, search_result, llm_lock)
+        if not phrase:
+            return None
+        phrase, image_url = split_image_action(phrase)
+        if not phrase:
+            return None
+        pcm = b""
+        if synthesize:
+            check()
+            from .tts import synthesize_pcm
+            pcm = synthesize_pcm(phrase)
+        return Thought(topic, phrase, image_url, pcm)
+    except _Abort as e:
+        logger.info(f"Thought generation abandoned: {e}")
+        return None
+
+
+class ThoughtPool:
+    """Bounded pool of ready-to-speak thoughts, refilled in the background.
+
+    The refill thread only works while idle_check() is true. It uses the LLM
+    only when llm_lock is free, and rechecks idleness between stages. The
+    expensive topic, search, musing and TTS work therefore happens in dead
+    time rather than while a user waits. take() never blocks. Thoughts older
+    than max_age are dropped, since weather and news go stale.
+    """
+
+    def __init__(self, capacity=3, idle_check=None, llm_lock=None, synthesize=False,
+                 max_age=3600, poll_interval=20):
+        self.capacity = capacity
+        self.idle_check = idle_check or (lambda: True)
+        self.llm_lock = llm_lock
+        self.synthesize = synthesize
+        self.max_age = max_age
+        self.poll_interval = poll_interval
+        self.recent = deque(maxlen=20)  # topics already used (avoid repeats)
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        metrics.gauge("bmo_thought_pool_size", "Ready-to-speak thoughts waiting in the pool").set_function(self.__len__)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refill_loop, daemon=True, name="thought-pool")
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def take(self):
+        """Pop the oldest fresh thought, or None if the pool is empty."""
+        now = time.time()
+        with self._lock:
+            while self._items:
+                thought = self._items.popleft()
+                if now - thought.created_at <= self.max_age:
+                    return thought
+        return None
+
+    def make_now(self):
+        """Generate a thought synchronously (pool was empty and someone is waiting)."""
+        thought = make_thought(self.recent, llm_lock=self.llm_lock, synthesize=False)
+        if thought:
+            self.recent.append(thought.topic)
+        return thought
+
+    def refill_once(self):
+        """Add one thought if there's room and idle_check() holds. Called by the
+        refill thread, or by a caller that runs it on its own bounded pool."""
+        if len(self) >= self.capacity or not self.idle_check():
+            return False
+        t0 = time.time()
+        thought = make_thought(self.recent, llm_lock=self.llm_lock,
+                               synthesize=self.synthesize, should_continue=self.idle_check)
+        if thought is None:
+            return False
+        self.recent.append(thought.topic)
+        with self._lock:
+            self._items.append(thought)
+        logger.info(f"Thought pool +1 ({len(self)}/{self.capacity}) in {time.time() - t0:.1f}s: {thought.topic}")
+        return True
+
+    def _refill_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            self.refill_once()
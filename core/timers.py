@@ -0,0 +1,279 @@
+"""Timers and reminders: one scheduler thread, persisted across restarts.
+
+The agent used to start a daemon thread per set_timer, sleeping for up to 12
+hours, and any pending timer was lost when the process restarted or crashed.
+TimerService keeps every pending timer in a min-heap keyed on its deadline.
+A single worker sleeps on a condition until the nearest deadline, or until
+add/cancel/snooze changes the head of the heap. Due timers are handed to the
+on_fire callback. The agent queues them as events and rings them between
+turns, so the worker never has to poll for BMO to become idle.
+
+Pending timers are journaled to a small JSON file after every change. On
+start, timers that came due while BMO was off fire straight away, unless
+they are older than max_late_s.
+
+The heap orders by time.monotonic(), so an NTP step at boot (the Pi has no
+RTC) can't fire timers early or late. Wall-clock due times exist only for
+the journal and for reading back "how long is left".
+"""
+import heapq
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_PENDING = metrics.gauge("bmo_timers_pending", "Timers waiting to fire")
+_FIRED = metrics.counter("bmo_timers_fired_total", "Timers delivered", ["late"])
+
+
+class Timer:
+    """One pending reminder. `due` is wall-clock (epoch seconds)."""
+
+    __slots__ = ("id", "due", "message", "created", "_deadline")
+
+    def __init__(self, due, message, timer_id=None, created=None):
+        self.id = timer_id or uuid.uuid4().hex[:8]
+        self.due = float(due)
+        self.message = message
+        self.created = created if created is not None else time.time()
+        self._deadline = time.monotonic() + (self.due - time.time())
+
+    def remaining(self):
+        return max(0.0, self._deadline - time.monotonic())
+
+    def to_dict(self):
+        return {"id": self.id, "due": self.due, "message": self.message, "created": self.created}
+
+    def __repr__(self):
+        return f"Timer({self.id}, in {self.remaining():.0f}s, {self.message!r})"
+
+
+class TimerService:
+    """Min-heap of Timers with a single worker thread and a JSON journal."""
+
+    def __init__(self, journal_path, on_fire, max_late_s=6 * 3600):
+        self.journal_path = journal_path
+        self.on_fire = on_fire
+        self.max_late_s = max_late_s
+        self.last_fired = None  # for "snooze" after an alarm has rung
+        self._timers = {}       # id -> Timer (cancelled/snoozed entries linger in the heap)
+        self._heap = []         # (monotonic deadline, seq, id)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+        _PENDING.set_function(lambda: len(self._timers))
+
+    def start(self):
+        self._load()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="timers")
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+
+    # ── Operations ───────────────────────────────────────────────────────
+    def add(self, seconds, message):
+        timer = Timer(time.time() + seconds, message)
+        with self._cond:
+            self._schedule_locked(timer)
+            self._save_locked()
+        logger.info(f"Timer {timer.id} set for {format_duration(seconds)}: {message!r}")
+        return timer
+
+    def list(self):
+        """Pending timers, soonest first."""
+        with self._cond:
+            return sorted(self._timers.values(), key=lambda t: t._deadline)
+
+    def cancel(self, timer_id=None):
+        """Cancel one timer (the soonest if no id is given). Returns it, or None."""
+        with self._cond:
+            timer = self._pick_locked(timer_id)
+            if timer is None:
+                return None
+            del self._timers[timer.id]
+            self._save_locked()
+            self._cond.notify()
+        logger.info(f"Timer {timer.id} cancelled")
+        return timer
+
+    def cancel_all(self):
+        with self._cond:
+            cancelled = list(self._timers.values())
+            self._timers.clear()
+            self._heap.clear()
+            self._save_locked()
+            self._cond.notify()
+        return cancelled
+
+    def snooze(self, seconds, timer_id=None):
+        """Push a pending timer back by `seconds`, or re-arm the alarm that just
+        rang if nothing is pending. Returns the rescheduled Timer, or None."""
+        with self._cond:
+            timer = self._pick_locked(timer_id)
+            if timer is not None:
+                del self._timers[timer.id]
+                timer = Timer(timer.due + seconds, timer.message, timer.id, timer.created)
+            elif timer_id is None and self.last_fired is not None:
+                timer = Timer(time.time() + seconds, self.last_fired.message, self.last_fired.id)
+                self.last_fired = None
+            else:
+                return None
+            self._schedule_locked(timer)
+            self._save_locked()
+        logger.info(f"Timer {timer.id} snoozed; rings in {format_duration(timer.remaining())}")
+        return timer
+
+    # ── Internals ────────────────────────────────────────────────────────
+    def _pick_locked(self, timer_id):
+        if timer_id is not None:
+            return self._timers.get(timer_id)
+        return min(self._timers.values(), key=lambda t: t._deadline, default=None)
+
+    def _schedule_locked(self, timer):
+        self._timers[timer.id] = timer
+        heapq.heappush(self._heap, (timer._deadline, next(self._seq), timer.id))
+        if self._heap[0][2] == timer.id:
+            self._cond.notify()  # new head — the worker's wait is now too long
+
+    def _run(self):
+        while True:
+            with self._cond:
+                due = []
+                while not self._stop:
+                    now = time.monotonic()
+                    while self._heap:
+                        deadline, _seq, timer_id = self._heap[0]
+                        timer = self._timers.get(timer_id)
+                        if timer is None or timer._deadline != deadline:
+                            heapq.heappop(self._heap)  # cancelled or snoozed
+                        elif deadline <= now:
+                            heapq.heappop(self._heap)
+                            del self._timers[timer_id]
+                            due.append(timer)
+                        else:
+                            break
+                    if due:
+                        self.last_fired = due[-1]
+                        self._save_locked()
+                        break
+                    self._cond.wait(self._heap[0][0] - now if self._heap else None)
+                if self._stop:
+                    return
+            for timer in due:
+                late = time.time() - timer.due > 60
+                _FIRED.inc(late=str(late).lower())
+                logger.info(f"Timer {timer.id} fired: {timer.message!r}")
+                try:
+                    self.on_fire(timer)
+                except Exception as e:
+                    logger.error(f"Timer callback failed for {timer.id}: {e}")
+
+    def _load(self):
+        try:
+            with open(self.journal_path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable timer journal {self.journal_path}: {e}")
+            return
+        now = time.time()
+        with self._cond:
+            for d in entries:
+                try:
+                    timer = Timer(d["due"], d["message"], d["id"], d.get("created"))
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if now - timer.due > self.max_late_s:
+                    logger.info(f"Dropping timer {timer.id} missed by {format_duration(now - timer.due)}")
+                    continue
+                self._schedule_locked(timer)
+            self._save_locked()
+        if self._timers:
+            logger.info(f"Restored {len(self._timers)} timer(s) from {self.journal_path}")
+
+    def _save_locked(self):
+        entries = [t.to_dict() for t in sorted(self._timers.values(), key=lambda t: t._deadline)]
+        tmp = self.journal_path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp, self.journal_path)
+        except OSError as e:
+            logger.warning(f"Could not write timer journal: {e}")
+
+
+def format_duration(seconds):
+    """Spoken-style duration: '1 hour 5 minutes', '30 seconds'."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} second{'s' if seconds != 1 else ''}"
+    # Round to whole minutes first so 1:59:59 reads "2 hours", not "1 hour 60 minutes"
+    hours, minutes = divmod((seconds + 30) // 60, 60)
+    parts = []
+    if hours:
+        parts.append(f"{hours} hour{'s' if hours != 1 else ''}")
+    if minutes:
+        parts.append(f"{minutes} minute{'s' if minutes != 1 else ''}")
+    return " ".join(parts)
+
+
+# parse_timer_command runs on every utterance before the LLM, so these only
+# match command phrasing at the start of the utterance ("snooze it", "cancel
+# my timer", "what timers do I have"), never a question that merely mentions
+# alarms or snoozing.
+_LEAD = r"^(?:(?:hey |ok(?:ay)?,? )?bmo[,.!]?\s+|please\s+|ok(?:ay)?[,.]?\s+|(?:can|could|would) you\s+)*"
+_KIND = r"(?:timers?|reminders?|alarms?)"
+_SNOOZE_RE = re.compile(
+    _LEAD + r"snooze(?:\s+(?:it|that|this|again|the\s+" + _KIND + r"|my\s+" + _KIND + r"))?"
+    r"(?:\s+for(?:\s+another)?\s+(\d+(?:\.\d+)?)\s*(second|sec|minute|min|hour)s?)?"
+    r"(?:,?\s+please)?[\s.!?]*$"
+)
+_CANCEL_RE = re.compile(
+    _LEAD + r"(?:cancel|delete|remove|clear|stop|turn off)\s+(?:(?:all|every)\s+(?:of\s+)?)?"
+    r"(?:(?:my|the|this|that|these|those)\s+)?(?:\d+[\s-]*(?:second|sec|minute|min|hour)s?\s+)?(?:[\w-]+\s+)?" + _KIND + r"\b"
+)
+_LIST_RE = re.compile(
+    _LEAD + r"(?:"
+    r"(?:list|show|read|check|tell me|what(?:'s| is| are))\s+(?:me\s+)?(?:all\s+)?(?:of\s+)?(?:my|the)\s+" + _KIND + r"\b"
+    r"|list\s+(?:all\s+)?" + _KIND + r"\b"
+    r"|(?:what|which|how many|any)\s+" + _KIND + r"\s+"
+    r"(?:do i have|have i (?:got|set)|are (?:there|set|running|going|left|pending|on))\b"
+    r"|do i have any\s+" + _KIND + r"\b"
+    r"|(?:is|are) there (?:a|an|any)\s+" + _KIND + r"(?:\s+(?:set|running|going|on))?[\s.!?]*$"
+    r"|how (?:much time|long) (?:is )?left(?:\s+on\s+(?:my|the)\s+" + _KIND + r")?[\s.!?]*$"
+    r")"
+)
+_UNIT_SECONDS = {"second": 1, "sec": 1, "minute": 60, "min": 60, "hour": 3600}
+
+
+def parse_timer_command(text):
+    """Recognise timer management phrases.
+
+    Returns ("list", None), ("cancel", all?), ("snooze", seconds), or None.
+    Setting a timer stays with the LLM's set_timer action.
+    """
+    t = text.lower().strip()
+    m = _SNOOZE_RE.search(t)
+    if m:
+        seconds = float(m.group(1)) * _UNIT_SECONDS[m.group(2)] if m.group(1) else 5 * 60
+        return "snooze", seconds
+    if _CANCEL_RE.search(t):
+        return "cancel", bool(re.search(r"\ball\b|\bevery\b", t))
+    if _LIST_RE.search(t):
+        return "list", None
+    return None
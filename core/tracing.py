@@ -0,0 +1,267 @@
+"""Lightweight per-turn latency tracing.
+
+A *turn* is one user interaction (wake -> reply audio, or one web request).
+Code along the pipeline records stage timings into the active turn:
+
+    with tracing.start_turn("voice") as turn:
+        with tracing.span("stt"):
+            text = transcribe(...)
+        tracing.mark("first_sentence")      # ms since turn start
+
+Stage helpers are no-ops when no turn is active, so library code (core/llm,
+core/stt) can call them unconditionally. Finished turns go into a ring
+buffer; summary() reports p50/p95/p99 per stage. If TRACE_FILE is set, each
+turn is also appended to it as one JSON line, which the CLI reads:
+
+    python -m core.tracing [path/to/trace.jsonl] [--last N]
+"""
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Canonical pipeline order (used for display; unknown stages are listed after).
+STAGE_ORDER = [
+    "wake_detect",      # wake-word inference on the chunk that fired
+    "record",           # mic capture until end-of-speech
+    "resample",         # 48 kHz -> 16 kHz + WAV write
+    "decode",           # browser upload (webm/opus) -> 16 kHz PCM in memory (web)
+    "stt",              # whisper.cpp
+    "route",            # pre-LLM keyword/intent routing
+    "llm_ttft",         # LLM request -> first streamed token
+    "llm",              # whole non-streaming LLM call (think())
+    "vlm_ttft",         # VLM request submitted -> first decoded token (photo turns)
+    "first_sentence",   # turn start -> first sentence handed to TTS
+    "piper_first_pcm",  # turn start -> first PCM bytes out of Piper
+    "first_audio",      # turn start -> first PCM written to aplay
+    "tts",              # whole TTS synthesis (web)
+    "turn_end",         # turn start -> turn finished
+]
+
+_current = contextvars.ContextVar("bmo_trace_turn", default=None)
+
+TURN_STAGE_SECONDS = metrics.histogram("bmo_turn_stage_seconds", "Per-turn stage timings (see STAGE_ORDER)",
+                                       ["kind", "stage"])
+
+
+def _percentile(sorted_vals, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_vals:
+        return None
+    k = max(0, math.ceil(pct / 100.0 * len(sorted_vals)) - 1)
+    return sorted_vals[k]
+
+
+class Turn:
+    """Stage timings (ms) for one interaction. The first value recorded for a
+    stage wins, so repeated marks (e.g. every sentence) keep the earliest."""
+
+    def __init__(self, tracer, kind="voice"):
+        self.tracer = tracer
+        self.kind = kind
+        self.started_at = time.time()
+        self.t0 = time.perf_counter()
+        self.stages = {}
+        self._token = None
+        self._ended = False
+
+    def record(self, stage, seconds):
+        self.stages.setdefault(stage, round(seconds * 1000.0, 1))
+
+    def mark(self, stage):
+        """Record time elapsed since the turn started."""
+        self.record(stage, time.perf_counter() - self.t0)
+
+    @contextlib.contextmanager
+    def span(self, stage):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - t)
+
+    def activate(self):
+        """Make this the current turn for the calling thread/task."""
+        self._token = _current.set(self)
+        return self
+
+    def end(self):
+        """Finish the turn (idempotent) and deactivate it."""
+        if self._token is not None:
+            try:
+                _current.reset(self._token)
+            except ValueError:
+                pass  # ended from a different thread/context than it was activated in
+            self._token = None
+        if self._ended:
+            return
+        self._ended = True
+        self.mark("turn_end")
+        self.tracer._finish(self)
+
+    def as_dict(self):
+        return {"kind": self.kind, "ts": round(self.started_at, 3), "stages": dict(self.stages)}
+
+    def __enter__(self):
+        return self.activate()
+
+    def __exit__(self, *exc):
+        self.end()
+        return False
+
+
+class Tracer:
+    """Ring buffer of finished turns plus per-stage percentile summaries."""
+
+    def __init__(self, maxlen=500, trace_file=None):
+        self.turns = deque(maxlen=maxlen)
+        self.trace_file = trace_file
+        self._lock = threading.Lock()
+
+    def start_turn(self, kind="voice"):
+        return Turn(self, kind)
+
+    def add(self, turn_dict):
+        with self._lock:
+            self.turns.append(turn_dict)
+
+    def _finish(self, turn):
+        d = turn.as_dict()
+        self.add(d)
+        for stage, ms in d["stages"].items():
+            TURN_STAGE_SECONDS.observe(ms / 1000.0, kind=d["kind"], stage=stage)
+        if self.trace_file:
+            try:
+                with self._lock, open(self.trace_file, "a") as f:
+                    f.write(json.dumps(d) + "\n")
+            except OSError as e:
+                logger.warning(f"Could not append trace: {e}")
+
+    def summary(self, kind=None, last=None):
+        """{"turns": n, "stages": {stage: {n, p50, p95, p99, max}}} in ms."""
+        with self._lock:
+            turns = [t for t in self.turns if kind is None or t["kind"] == kind]
+        if last:
+            turns = turns[-last:]
+        samples = {}
+        for t in turns:
+            for stage, ms in t["stages"].items():
+                samples.setdefault(stage, []).append(ms)
+        order = [s for s in STAGE_ORDER if s in samples] + sorted(s for s in samples if s not in STAGE_ORDER)
+        stages = {}
+        for stage in order:
+            vals = sorted(samples[stage])
+            stages[stage] = {
+                "n": len(vals),
+                "p50": _percentile(vals, 50),
+                "p95": _percentile(vals, 95),
+                "p99": _percentile(vals, 99),
+                "max": vals[-1],
+            }
+        return {"turns": len(turns), "stages": stages}
+
+    def format_table(self, kind=None, last=None):
+        s = self.summary(kind, last)
+        lines = [f"{s['turns']} turn(s)",
+                 f"{'stage':<16}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for stage, r in s["stages"].items():
+            lines.append(f"{stage:<16}{r['n']:>6}{r['p50']:>10.1f}{r['p95']:>10.1f}{r['p99']:>10.1f}{r['max']:>10.1f}")
+        return "\n".join(lines)
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer (TRACE_FILE from core.config, if set)."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            from .config import TRACE_FILE
+            _tracer = Tracer(trace_file=TRACE_FILE)
+        return _tracer
+
+
+def start_turn(kind="voice") -> Turn:
+    """New turn on the process tracer; use as a context manager to make it current."""
+    return get_tracer().start_turn(kind)
+
+
+def current():
+    """The turn active in this thread/task, or None."""
+    return _current.get()
+
+
+def record(stage, seconds):
+    turn = _current.get()
+    if turn is not None:
+        turn.record(stage, seconds)
+
+
+def mark(stage):
+    turn = _current.get()
+    if turn is not None:
+        turn.mark(stage)
+
+
+def span(stage):
+    turn = _current.get()
+    return turn.span(stage) if turn is not None else contextlib.nullcontext()
+
+
+def traced(kind):
+    """Decorator: run each call of a (sync or async) function as its own turn.
+    functools.wraps keeps the signature visible to FastAPI."""
+    def deco(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with start_turn(kind):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with start_turn(kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def main(argv=None):
+    import argparse
+    from .config import TRACE_FILE
+
+    parser = argparse.ArgumentParser(description="Per-stage latency percentiles from a BMO trace file.")
+    parser.add_argument("file", nargs="?", default=TRACE_FILE, help="JSONL trace file (default: TRACE_FILE)")
+    parser.add_argument("--last", type=int, default=None, help="only the most recent N turns")
+    parser.add_argument("--kind", default=None, help="only turns of this kind (voice, web_chat, cli, ...)")
+    args = parser.parse_args(argv)
+    if not args.file:
+        parser.error("no trace file given and TRACE_FILE is not set")
+
+    tracer = Tracer(maxlen=None)
+    with open(args.file) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    tracer.add(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    print(tracer.format_table(kind=args.kind, last=args.last))
+
+
+if __name__ == "__main__":
+    main()
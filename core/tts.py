@@ -3,10 +3,16 @@ import logging
 import os
 import re
 import json
+import time
 from .config import PIPER_CMD, PIPER_MODEL  # ALSA_DEVICE imported lazily inside play_audio_on_hardware
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
+# mode: "hardware" (Piper -> aplay), "pcm" (pre-baked raw audio), "file" (WAV for the browser)
+TTS_RUNS = metrics.counter("bmo_tts_synth_total", "Piper synthesis runs by mode and outcome", ["mode", "outcome"])
+TTS_SECONDS = metrics.histogram("bmo_tts_synth_seconds", "Piper synthesis wall time", ["mode"])
+
 PRONUNCIATION_FILE = "pronunciations.json"
 
 def load_pronunciations() -> dict:
@@ -135,46 +141,60 @@ def play_audio_on_hardware(text: str):
             piper_cmd = f"cat {temp_text_path} | {PIPER_CMD} --model {PIPER_MODEL} --output_raw | aplay -D {ALSA_DEVICE} -r 22050 -f S16_LE -t raw --buffer-time=500000"
             
             # Retry loop for busy audio device
+            t = time.perf_counter()
+            outcome = "error"
             for attempt in range(5):
                 try:
                     subprocess.run(piper_cmd, shell=True, check=True, stderr=subprocess.PIPE)
+                    outcome = "ok"
                     break
                 except subprocess.CalledProcessError as e:
                     if b"Device or resource busy" in e.stderr:
                         logger.warning(f"Audio device busy, retrying (attempt {attempt+1}/5)...")
-                        import time
                         time.sleep(0.5)
                     else:
                         logger.error(f"Hardware TTS Error: {e.stderr.decode()}")
                         break
+            TTS_SECONDS.observe(time.perf_counter() - t, mode="hardware")
+            TTS_RUNS.inc(mode="hardware", outcome=outcome)
         finally:
             if os.path.exists(temp_text_path):
                 os.remove(temp_text_path)
     except Exception as e:
         logger.error(f"Hardware TTS Error: {e}")
 
-def generate_audio_file(text: str, filename: str) -> str:
-    """Generates a WAV file using Piper for the browser to play."""
-    try:
-        clean_text = clean_text_for_speech(text)
-        if not clean_text or not any(c.isalnum() for c in clean_text):
-            return None
-            
-        logger.info(f"Generating audio file: {filename}")
-        
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as tf:
-            tf.write(clean_text)
-            temp_text_path = tf.name
+def synthesize_pcm(text: str, timeout: float = 60) -> bytes:
+    """Render text to raw 22050 Hz S16_LE mono PCM with Piper (no playback).
 
-        try:
-            filepath = os.path.join("static", "audio", filename)
-            piper_cmd = f"cat {temp_text_path} | {PIPER_CMD} --model {PIPER_MODEL} --output_file {filepath}"
-            subprocess.run(piper_cmd, shell=True, check=True)
-            return f"/static/audio/{filename}"
-        finally:
-            if os.path.exists(temp_text_path):
-                os.remove(temp_text_path)
+    Used to pre-bake audio ahead of time (screensaver thoughts) so it can be
+    played back instantly later. Returns b"" if there is nothing to say or
+    Piper fails.
+    """
+    clean_text = clean_text_for_speech(text)
+    if not clean_text or not any(c.isalnum() for c in clean_text):
+        return b""
+    t = time.perf_counter()
+    try:
+        proc = subprocess.run(
+            [PIPER_CMD, "--model", PIPER_MODEL, "--output_raw"],
+            input=clean_text.encode("utf-8"), capture_output=True, timeout=timeout,
+        )
+        TTS_SECONDS.observe(time.perf_counter() - t, mode="pcm")
+        if proc.returncode != 0:
+            logger.error(f"Piper synthesis failed: {proc.stderr.decode(errors='replace')[-200:]}")
+            TTS_RUNS.inc(mode="pcm", outcome="error")
+            return b""
+        TTS_RUNS.inc(mode="pcm", outcome="ok")
+        return proc.stdout
     except Exception as e:
-        logger.error(f"File TTS Error: {e}")
-        return None
+        logger.error(f"Piper synthesis error: {e}")
+        TTS_RUNS.inc(mode="pcm", outcome="error")
+        return b""
+
+def synthesize_wav(text: str, timeout: float = 60) -> bytes:
+    """Render text to an in-memory 22050 Hz mono WAV (b"" if nothing to say)."""
+    pcm = synthesize_pcm(text, timeout)
+    if not pcm:
+        return b""
+    from .audio_store import pcm_to_wav
+    return pcm_to_wav(pcm, 22050)
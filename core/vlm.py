@@ -0,0 +1,451 @@
+"""Hailo VLM (Qwen2-VL) behind a single worker thread.
+
+analyze_image used to call vlm.generate_all on a fresh thread and abandon
+it after a 30 s join. The abandoned thread kept the NPU busy, and the next
+request could then run on the same VLM object alongside it. VLMWorker
+fixes both:
+
+  - One thread owns the VDevice and the VLM. It is the only code that ever
+    touches them, so requests can't overlap.
+  - Requests wait in a small bounded queue. When it's full, submit() fails
+    straight away instead of stacking up more work behind a slow NPU.
+  - Tokens stream back to the caller as they are decoded, so speech can
+    start before generation ends.
+  - Deadlines are cooperative. The worker checks the deadline and the
+    caller's cancel flag between tokens, then stops decoding and clears the
+    context. The caller never waits past its own deadline, even if the NPU
+    wedges in the middle of a token.
+  - health() reports loading / ready / busy / stalled / failed.
+    A failed load or a stalled generation makes submit() raise
+    VLMUnavailable immediately, so callers can answer "my eyes aren't
+    working" instead of queueing behind a dead device. A missing HEF is
+    the exception: the next wait_ready()/submit() tries loading again, so
+    running setup.sh while BMO is up works without a restart.
+  - Follow-up questions about the same picture reuse work. AnswerCache
+    serves a repeated question about the same picture (compared by
+    frames.FrameSignature) without calling the VLM at all. A different
+    question continues on the image context the worker kept, so the vision
+    encoder and image prefill don't run again.
+
+    worker = get_vlm_worker()
+    req = worker.submit(prompt, [frame], max_tokens=150, timeout=30)
+    for token in req:          # raises VLMTimeout / VLMUnavailable
+        ...
+"""
+import logging
+import os
+import queue
+import re
+import threading
+import time
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+STOP_TOKENS = ("<|im_end|>", "<|endoftext|>", "<|im_start|>")
+
+_REQUESTS = metrics.counter("bmo_vlm_requests_total", "VLM requests by outcome", ["outcome"])
+_SECONDS = metrics.histogram("bmo_vlm_request_seconds", "VLM request duration, queue wait included")
+_TTFT = metrics.histogram("bmo_vlm_ttft_seconds", "VLM submit to first token")
+_QUEUE = metrics.gauge("bmo_vlm_queue_depth", "VLM requests waiting for the worker")
+_CACHE_EVENTS = metrics.counter("bmo_vlm_cache_events_total",
+                                "VLM answer cache: hit (VLM call avoided), miss, followup (image context reused)",
+                                ["event"])
+
+_DONE = object()
+_RELOAD = object()  # queued by callers to make the worker retry a missing-HEF load
+
+
+class VLMUnavailable(RuntimeError):
+    """The VLM can't take this request (not installed, failed, stalled or saturated)."""
+
+
+class VLMTimeout(RuntimeError):
+    """The request's deadline passed before generation finished."""
+
+
+class VLMRequest:
+    """One queued generation. Iterate it for tokens; cancel() to give up."""
+
+    def __init__(self, prompt, frames, max_tokens, temperature, timeout,
+                 context_key=None, followup_prompt=None):
+        self.prompt = prompt
+        self.frames = frames
+        self.context_key = context_key
+        self.followup_prompt = followup_prompt
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.submitted = time.monotonic()
+        self.deadline = self.submitted + timeout
+        self.first_token_at = None
+        self._tokens = queue.Queue()
+        self._cancelled = threading.Event()
+        self._done = False
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def expired(self):
+        return time.monotonic() >= self.deadline
+
+    def __iter__(self):
+        try:
+            while True:
+                remaining = self.deadline - time.monotonic()
+                try:
+                    item = self._tokens.get(timeout=max(0.0, remaining))
+                except queue.Empty:
+                    raise VLMTimeout(f"VLM gave no answer within {self.deadline - self.submitted:g}s")
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Stops the worker at its next token if the caller bailed early
+            self.cancel()
+
+    def add_done_callback(self, fn):
+        """Call fn(request) once the worker has let go of it (served,
+        rejected or expired); straight away if it already has."""
+        with self._lock:
+            if not self._done:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def text(self):
+        """Block for the whole answer (stop tokens removed)."""
+        content = "".join(self)
+        for tok in STOP_TOKENS:
+            content = content.replace(tok, "")
+        return content.strip()
+
+    # Worker side
+    def _put(self, item):
+        if self.first_token_at is None and isinstance(item, str):
+            self.first_token_at = time.monotonic()
+            _TTFT.observe(self.first_token_at - self.submitted)
+        self._tokens.put(item)
+
+    def _finish(self):
+        with self._lock:
+            self._done = True
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            try:
+                fn(self)
+            except Exception as e:
+                logger.error(f"VLM request callback failed: {e}")
+
+
+def load_hailo_vlm(hef_path):
+    """(vdevice, vlm) for a Qwen2-VL HEF. Runs on the worker thread."""
+    if not os.path.exists(hef_path):
+        raise FileNotFoundError(f"VLM HEF not found at {hef_path}. Run setup.sh to download it.")
+    from hailo_platform import VDevice
+    from hailo_platform.genai import VLM
+
+    logger.info(f"Initialising Hailo VLM from {hef_path} ...")
+    vdevice = VDevice()
+    return vdevice, VLM(vdevice, hef_path)
+
+
+class VLMWorker:
+    """Owns the VLM on one thread and serves a bounded request queue."""
+
+    def __init__(self, loader, max_queue=2, stall_s=20.0, max_followups=4):
+        self._loader = loader
+        self._requests = queue.Queue(maxsize=max_queue)
+        self.stall_s = stall_s
+        self.max_followups = max_followups
+        self.state = "loading"
+        self.last_error = None
+        self.frame_shape = None
+        self.frame_dtype = None
+        self._ready = threading.Event()
+        self._load_lock = threading.Lock()
+        self._last_progress = time.monotonic()
+        self._vdevice = None
+        self._vlm = None
+        self._context_key = None  # image whose prefill is still in the VLM's context
+        self._followups = 0
+        _QUEUE.set_function(self._requests.qsize)
+        threading.Thread(target=self._run, daemon=True, name="vlm").start()
+
+    # ── Caller API ───────────────────────────────────────────────────────
+    def health(self):
+        state = self.state
+        if state == "busy" and time.monotonic() - self._last_progress > self.stall_s:
+            state = "stalled"
+        return {"state": state, "queued": self._requests.qsize(), "last_error": self.last_error}
+
+    def wait_ready(self, timeout=None):
+        """Block until the model is loaded. Returns (frame_shape, frame_dtype);
+        raises FileNotFoundError / VLMUnavailable if it can't be."""
+        self._retry_missing()
+        if not self._ready.wait(timeout):
+            raise VLMUnavailable("VLM is still loading")
+        if self.state == "failed":
+            if isinstance(self.last_error, FileNotFoundError):
+                raise self.last_error
+            raise VLMUnavailable(f"VLM failed to load: {self.last_error}")
+        return self.frame_shape, self.frame_dtype
+
+    def submit(self, prompt, frames, max_tokens=150, temperature=0.4, timeout=30.0,
+               context_key=None, followup_prompt=None):
+        """Queue a generation. With a context_key, a later request carrying the
+        same key and a followup_prompt is answered from the context this one
+        leaves behind (no image, no re-prefill), if nothing ran in between."""
+        self._retry_missing()
+        state = self.health()["state"]
+        if state in ("failed", "stalled"):
+            _REQUESTS.inc(outcome="rejected")
+            raise VLMUnavailable(f"VLM is {state}" + (f": {self.last_error}" if self.last_error else ""))
+        req = VLMRequest(prompt, frames, max_tokens, temperature, timeout, context_key, followup_prompt)
+        try:
+            self._requests.put_nowait(req)
+        except queue.Full:
+            _REQUESTS.inc(outcome="rejected")
+            raise VLMUnavailable("VLM is busy with other requests")
+        return req
+
+    def generate(self, prompt, frames, **kwargs):
+        """submit() and wait for the full text."""
+        return self.submit(prompt, frames, **kwargs).text()
+
+    def _retry_missing(self):
+        """After a load failed on a missing HEF, queue another attempt."""
+        with self._load_lock:
+            if self.state != "failed" or not isinstance(self.last_error, FileNotFoundError):
+                return
+            self.state = "loading"
+            self._ready.clear()
+            # Queued under the lock so no request can get ahead of the reload.
+            # Failed-state requests drain instantly, so there's room soon.
+            self._requests.put(_RELOAD)
+
+    # ── Worker thread ────────────────────────────────────────────────────
+    def _load(self):
+        try:
+            vdevice, vlm = self._loader()
+            frame_shape, frame_dtype = vlm.input_frame_shape(), vlm.input_frame_format_type()
+        except Exception as e:
+            logger.warning(f"VLM unavailable: {e}")
+            vdevice = vlm = frame_shape = frame_dtype = None
+            error = e
+        else:
+            logger.info(f"VLM ready — frame shape {frame_shape}, dtype {frame_dtype}")
+            error = None
+        # Published under the lock so _retry_missing can't queue a reload
+        # between the state change and _ready.set()
+        with self._load_lock:
+            self._vdevice, self._vlm = vdevice, vlm
+            self.frame_shape, self.frame_dtype = frame_shape, frame_dtype
+            self.last_error = error
+            self.state = "failed" if error else "ready"
+            self._ready.set()
+
+    def _run(self):
+        self._load()
+        while True:
+            req = self._requests.get()
+            if req is _RELOAD:
+                self._load()
+                continue
+            try:
+                if self.state == "failed":
+                    req._put(VLMUnavailable(f"VLM failed to load: {self.last_error}"))
+                elif self._vlm is None:
+                    req._put(VLMUnavailable("VLM is still loading"))
+                elif req.cancelled or req.expired():
+                    _REQUESTS.inc(outcome="expired")
+                    req._put(VLMTimeout("VLM request expired while queued"))
+                else:
+                    self._serve(req)
+            finally:
+                req._finish()
+
+    def _serve(self, req):
+        self.state = "busy"
+        self._last_progress = time.monotonic()
+        outcome = "ok"
+        reused = False
+        try:
+            if self._can_follow_up(req):
+                try:
+                    outcome = self._generate(req, req.followup_prompt, [])
+                    reused = True
+                except Exception as e:
+                    if req.first_token_at is not None:
+                        raise
+                    # Runtime refused a text-only turn on the kept context
+                    logger.info(f"VLM follow-up on kept context failed, re-running with the image: {e}")
+            if not reused:
+                self._context_key, self._followups = None, 0
+                self._vlm.clear_context()
+                outcome = self._generate(req, req.prompt, req.frames)
+            if outcome == "timeout":
+                req._put(VLMTimeout("VLM generation hit its deadline"))
+            else:
+                req._put(_DONE)
+        except Exception as e:
+            outcome = "error"
+            self.last_error = e
+            logger.error(f"VLM generation failed: {e}")
+            req._put(e)
+        finally:
+            if outcome == "ok":
+                if reused:
+                    self._followups += 1
+                    _CACHE_EVENTS.inc(event="followup")
+                else:
+                    self._context_key = req.context_key
+            else:
+                # Abandoned generations leave KV state behind
+                self._context_key = None
+                try:
+                    self._vlm.clear_context()
+                except Exception:
+                    pass
+            self.state = "ready"
+            _REQUESTS.inc(outcome=outcome)
+            _SECONDS.observe(time.monotonic() - req.submitted)
+
+    def _can_follow_up(self, req):
+        return (req.followup_prompt is not None and req.context_key is not None
+                and req.context_key == self._context_key and self._followups < self.max_followups)
+
+    def _generate(self, req, prompt, frames):
+        """Stream one generation into req. Returns "ok", "cancelled" or "timeout"."""
+        if hasattr(self._vlm, "generate"):
+            with self._vlm.generate(prompt=prompt, frames=frames,
+                                    temperature=req.temperature,
+                                    max_generated_tokens=req.max_tokens) as generation:
+                for token in generation:
+                    self._last_progress = time.monotonic()
+                    if req.cancelled or req.expired():
+                        return "cancelled" if req.cancelled else "timeout"
+                    req._put(token)
+        else:
+            # Older HailoRT without streaming: one chunk at the end
+            req._put(self._vlm.generate_all(prompt=prompt, frames=frames,
+                                            temperature=req.temperature,
+                                            max_generated_tokens=req.max_tokens))
+        return "ok"
+
+
+class AnswerCache:
+    """Short-lived (picture, question) -> answer cache for the VLM.
+
+    An answer is only reused for the same question about a frame that has
+    changed by at most max_changed (see frames.FrameSignature): a re-shot
+    of a still scene, or the same upload again. A slightly looser
+    followup_max_changed decides whether a different question may
+    continue on the image context the worker kept (VLMWorker.submit);
+    lookup() returns that context key with a miss.
+    """
+
+    def __init__(self, ttl_s=120.0, max_changed=0.005, followup_max_changed=0.01, max_entries=32):
+        self.ttl_s = ttl_s
+        self.max_changed = max_changed
+        self.followup_max_changed = max(max_changed, followup_max_changed)
+        self.max_entries = max_entries
+        self._entries = []  # [created, signature, question, answer, context_key], newest last
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(question):
+        q = (question or "").lower().replace("\u2019", "'")
+        q = q.replace("what's", "what is").replace("who's", "who is")
+        q = re.sub(r"[^\w\s]", " ", q)
+        q = re.sub(r"\b(hey|bmo|please|can you|could you|tell me)\b", " ", q)
+        return " ".join(q.split())
+
+    def lookup(self, signature, question):
+        """(answer or None, context_key or None) for the same picture seen recently."""
+        question = self.normalize(question)
+        cutoff = time.monotonic() - self.ttl_s
+        context_key = None
+        with self._lock:
+            self._entries = [e for e in self._entries if e[0] >= cutoff]
+            for created, sig, q, answer, key in reversed(self._entries):
+                changed = signature.changed(sig)
+                if changed > self.followup_max_changed:
+                    continue
+                if q == question and changed <= self.max_changed:
+                    _CACHE_EVENTS.inc(event="hit")
+                    return answer, key
+                context_key = context_key or key
+        _CACHE_EVENTS.inc(event="miss")
+        return None, context_key
+
+    def put(self, signature, question, answer, context_key):
+        if not answer:
+            return
+        with self._lock:
+            self._entries.append([time.monotonic(), signature, self.normalize(question), answer, context_key])
+            del self._entries[:-self.max_entries]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_vlm_worker():
+    """Process-wide worker for VLM_HEF_PATH; starts loading on first call."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            from .config import VLM_HEF_PATH, VLM_QUEUE_SIZE, VLM_MAX_FOLLOWUPS
+            hef = VLM_HEF_PATH
+            if not os.path.isabs(hef):
+                # Resolve relative to project root (where the scripts live)
+                hef = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), hef)
+            _worker = VLMWorker(lambda: load_hailo_vlm(hef), max_queue=VLM_QUEUE_SIZE,
+                                max_followups=VLM_MAX_FOLLOWUPS)
+        return _worker
+
+
+def vlm_health():
+    """Worker health for diagnostics, without starting a load ({"state": "idle"} if never used)."""
+    if _worker is None:
+        return {"state": "idle", "queued": 0, "last_error": None, "frame_shape": None}
+    h = _worker.health()
+    h["last_error"] = str(h["last_error"]) if h["last_error"] else None
+    shape = _worker.frame_shape
+    h["frame_shape"] = [int(v) for v in shape] if shape is not None else None
+    return h
+
+
+_answers = None
+
+
+def get_answer_cache():
+    """Process-wide AnswerCache (VLM_CACHE_TTL_S / VLM_CACHE_MAX_CHANGED / VLM_FOLLOWUP_MAX_CHANGED)."""
+    global _answers
+    with _worker_lock:
+        if _answers is None:
+            from .config import VLM_CACHE_TTL_S, VLM_CACHE_MAX_CHANGED, VLM_FOLLOWUP_MAX_CHANGED
+            _answers = AnswerCache(VLM_CACHE_TTL_S, VLM_CACHE_MAX_CHANGED, VLM_FOLLOWUP_MAX_CHANGED)
+        return _answers
+
+
+def cache_stats():
+    """hit / miss / followup counts for this process, and the VLM calls avoided."""
+    out = {"hit": 0, "miss": 0, "followup": 0}
+    for labels, n in _CACHE_EVENTS.items():
+        out[labels["event"]] = n
+    out["calls_avoided"] = out["hit"]
+    return out
@@ -0,0 +1,240 @@
+"""Shared wake-word detection for many concurrent audio streams.
+
+openwakeword's Model keeps its streaming buffers (raw audio, mel frames,
+embeddings, prediction history) on the model object. One global Model fed
+by several browsers therefore mixes their audio together. It also runs one
+ONNX call chain per client chunk.
+
+WakeWordService loads the three ONNX graphs once (melspectrogram, speech
+embedding and the wake-word classifier). Each connection gets a small
+WakeWordStream holding only its own buffers. A single worker thread wakes
+every tick, takes one 80 ms frame from every stream that has one, and runs
+the mel and embedding models once for the whole batch. A batched ONNX call
+costs far less than N single calls, so CPU grows sublinearly with connected
+clients, and idle connections cost nothing.
+
+The per-stream math mirrors openwakeword.utils.AudioFeatures:
+    - 1280-sample frames
+    - 480 samples of left context for the mel model
+    - x/10 + 2 mel transform
+    - 76-frame embedding windows
+    - the first 5 predictions after a (re)start are ignored
+"""
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+FRAME = 1280            # 80 ms @ 16 kHz — one embedding step
+CONTEXT = 160 * 3       # extra left samples the mel model needs per frame
+MEL_WINDOW = 76         # mel frames per embedding
+WARMUP_PREDICTIONS = 5  # openwakeword zeroes the first 5 scores after reset
+MAX_BACKLOG = 16000     # drop audio older than ~1 s if a client outruns us
+
+_STREAMS = metrics.gauge("bmo_wakeword_streams", "Open wake-word streams")
+_BATCH = metrics.histogram("bmo_wakeword_batch_size", "Streams per batched wake-word inference",
+                           buckets=(1, 2, 4, 8, 16, 32))
+_INFER = metrics.histogram("bmo_wakeword_infer_seconds", "Wake-word inference time per batch")
+_DETECTIONS = metrics.counter("bmo_wakeword_detections_total", "Wake words detected on web streams")
+
+
+class OnnxBackend:
+    """The three openwakeword ONNX graphs, loaded once and called batched."""
+
+    def __init__(self, model_path, melspec_path=None, embedding_path=None, threads=1):
+        import onnxruntime as ort
+
+        if melspec_path is None or embedding_path is None:
+            import openwakeword
+            base = os.path.join(os.path.dirname(openwakeword.__file__), "resources", "models")
+            melspec_path = melspec_path or os.path.join(base, "melspectrogram.onnx")
+            embedding_path = embedding_path or os.path.join(base, "embedding_model.onnx")
+
+        opts = ort.SessionOptions()
+        opts.inter_op_num_threads = threads
+        opts.intra_op_num_threads = threads
+        providers = ["CPUExecutionProvider"]
+        self._mel = ort.InferenceSession(melspec_path, sess_options=opts, providers=providers)
+        self._emb = ort.InferenceSession(embedding_path, sess_options=opts, providers=providers)
+        self._ww = ort.InferenceSession(model_path, sess_options=opts, providers=providers)
+
+        inp = self._ww.get_inputs()[0]
+        self._ww_input = inp.name
+        self.n_feature_frames = int(inp.shape[1])
+        # Exported classifiers usually have a fixed batch of 1
+        self._ww_batched = not isinstance(inp.shape[0], int) or inp.shape[0] != 1
+        self.name = os.path.splitext(os.path.basename(model_path))[0]
+
+    def melspec(self, audio):
+        """(B, samples) int16 -> (B, frames, 32) float32 (openwakeword transform applied)."""
+        out = self._mel.run(None, {"input": audio.astype(np.float32)})[0]
+        return out.reshape(audio.shape[0], -1, 32) / 10.0 + 2.0
+
+    def embed(self, mel_windows):
+        """(B, 76, 32) -> (B, 96)."""
+        x = mel_windows[:, :, :, None].astype(np.float32)
+        return self._emb.run(None, {"input_1": x})[0].reshape(x.shape[0], -1)
+
+    def score(self, features):
+        """(B, n_feature_frames, 96) -> (B,) wake-word probabilities."""
+        features = features.astype(np.float32)
+        if self._ww_batched:
+            out = self._ww.run(None, {self._ww_input: features})[0]
+            return out.reshape(features.shape[0], -1)[:, 0]
+        return np.array([
+            self._ww.run(None, {self._ww_input: f[None]})[0].reshape(-1)[0] for f in features
+        ])
+
+
+class WakeWordStream:
+    """Streaming state for one audio source (one WebSocket connection)."""
+
+    def __init__(self, service, on_detect):
+        self.on_detect = on_detect
+        self.last_score = 0.0
+        self._service = service
+        self._pending = np.zeros(0, dtype=np.int16)
+        self.reset()
+
+    def reset(self):
+        # Zero context for the very first frame (openwakeword uses a shorter
+        # first window; zeros keep every row the same length for batching)
+        self._context = np.zeros(CONTEXT, dtype=np.int16)
+        self._mel = np.ones((MEL_WINDOW, 32), dtype=np.float32)
+        self._features = self._service.initial_features.copy()
+        self._predictions = 0
+
+    def push(self, audio):
+        """Queue int16 PCM (16 kHz mono). Detection happens on the worker thread."""
+        self._service._push(self, np.asarray(audio, dtype=np.int16))
+
+
+class WakeWordService:
+    """One set of ONNX sessions, many WakeWordStreams, batched per tick."""
+
+    def __init__(self, backend, threshold, tick_s=0.08):
+        self.backend = backend
+        self.threshold = threshold
+        self.tick_s = tick_s
+        self._streams = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.initial_features = self._noise_features()
+        _STREAMS.set_function(lambda: len(self._streams))
+        threading.Thread(target=self._run, daemon=True, name="wakeword").start()
+
+    def _noise_features(self):
+        """Embedding history to start from, like openwakeword's random warm-up
+        audio (seeded, and computed once instead of per connection)."""
+        noise = np.random.default_rng(0).integers(-1000, 1000, 16000 * 4).astype(np.int16)
+        mel = self.backend.melspec(noise[None])[0]
+        windows = np.stack([mel[i:i + MEL_WINDOW] for i in range(0, mel.shape[0] - MEL_WINDOW + 1, 8)])
+        feats = self.backend.embed(windows)
+        return feats[-self.backend.n_feature_frames:]
+
+    def open(self, on_detect):
+        """New stream; on_detect(model_name, score) is called from the worker thread."""
+        stream = WakeWordStream(self, on_detect)
+        with self._lock:
+            self._streams.add(stream)
+        return stream
+
+    def close(self, stream):
+        with self._lock:
+            self._streams.discard(stream)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _push(self, stream, audio):
+        with self._lock:
+            pending = np.concatenate((stream._pending, audio))
+            if len(pending) > MAX_BACKLOG:
+                drop = (len(pending) - MAX_BACKLOG + FRAME - 1) // FRAME * FRAME
+                stream._context = pending[drop - CONTEXT:drop]
+                pending = pending[drop:]
+            stream._pending = pending
+        if len(pending) >= FRAME:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            # Short coalescing window so frames from other clients join the batch
+            time.sleep(self.tick_s)
+            try:
+                while self.step():
+                    pass
+            except Exception as e:
+                logger.error(f"Wake-word inference failed: {e}")
+
+    def step(self):
+        """Process one frame from every stream that has one. Returns the batch size."""
+        with self._lock:
+            ready = [s for s in self._streams if len(s._pending) >= FRAME]
+            frames = []
+            for s in ready:
+                frames.append(np.concatenate((s._context, s._pending[:FRAME])))
+                s._context = s._pending[FRAME - CONTEXT:FRAME]
+                s._pending = s._pending[FRAME:]
+        if not ready:
+            return 0
+
+        t = time.perf_counter()
+        b = self.backend
+        mel = b.melspec(np.stack(frames))
+        windows = np.empty((len(ready), MEL_WINDOW, 32), dtype=np.float32)
+        for i, s in enumerate(ready):
+            s._mel = np.vstack((s._mel, mel[i]))[-MEL_WINDOW:]
+            windows[i] = s._mel
+        emb = b.embed(windows)
+        feats = np.empty((len(ready), b.n_feature_frames, emb.shape[1]), dtype=np.float32)
+        for i, s in enumerate(ready):
+            s._features = np.vstack((s._features, emb[i:i + 1]))[-b.n_feature_frames:]
+            feats[i] = s._features
+        scores = b.score(feats)
+        _INFER.observe(time.perf_counter() - t)
+        _BATCH.observe(len(ready))
+
+        for s, score in zip(ready, scores):
+            s._predictions += 1
+            score = float(score) if s._predictions > WARMUP_PREDICTIONS else 0.0
+            s.last_score = score
+            if score > self.threshold:
+                _DETECTIONS.inc()
+                with self._lock:
+                    s.reset()
+                try:
+                    s.on_detect(b.name, score)
+                except Exception as e:
+                    logger.warning(f"Wake-word callback failed: {e}")
+        return len(ready)
+
+
+_service = None
+_service_lock = threading.Lock()
+_service_failed = False
+
+
+def get_wakeword_service():
+    """Process-wide service for WAKE_WORD_MODEL, or None if it can't be loaded."""
+    global _service, _service_failed
+    with _service_lock:
+        if _service is None and not _service_failed:
+            from .config import WAKE_WORD_MODEL, WAKE_WORD_THRESHOLD, WAKE_WORD_TICK_S
+            try:
+                _service = WakeWordService(OnnxBackend(WAKE_WORD_MODEL), WAKE_WORD_THRESHOLD, WAKE_WORD_TICK_S)
+                logger.info(f"Loaded wake-word service: {WAKE_WORD_MODEL}")
+            except Exception as e:
+                _service_failed = True
+                logger.warning(f"Could not load wake-word service: {e}")
+        return _service
@@ -5,10 +5,17 @@ Each SVG is normalised so the face content is centred in the output and
 faces that are very large (ooooooh, heart eyes, shocked) are gently scaled
 down to keep expressions comparable in size.  Bounce / shake animations are
 specified in output pixels and converted to SVG-viewBox units automatically.
+
+Builds are incremental: every rendered frame is cached on disk under
+.face_cache/ keyed by a hash of the final SVG text + output size, and the
+normalised viewBoxes are stored in a manifest keyed by SVG content hash.
+Unchanged SVG + parameter combinations are never re-rendered, and each
+expression state is generated in its own worker process.
 """
 
-import glob, io, math, os, re, shutil
+import argparse, glob, hashlib, io, json, math, os, re, shutil, time
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import cairosvg
 import numpy as np
 from PIL import Image
@@ -20,6 +27,14 @@ NS             = "http://www.w3.org/2000/svg"
 BMO_BG         = "#C9E4C3"
 BMO_BG_RGB     = (201, 228, 195)
 
+# Persistent build cache.  Bump RENDER_VERSION whenever _render() changes in
+# a way that alters pixels (resampling filter, compositing) so stale PNGs
+# are not reused.
+CACHE_DIR      = ".face_cache"
+RENDER_DIR     = os.path.join(CACHE_DIR, "renders")
+MANIFEST_PATH  = os.path.join(CACHE_DIR, "manifest.json")
+RENDER_VERSION = 1
+
 ET.register_namespace("", NS)
 ET.register_namespace("xlink", "http://www.w3.org/1999/xlink")
 
@@ -29,14 +44,23 @@ ET.register_namespace("xlink", "http://www.w3.org/1999/xlink")
 MAX_W_PX = 620
 MAX_H_PX = 360
 
+# Per-process build counters, reset by _run_generator() for every state.
+_STATS = {"rendered": 0, "cached": 0, "written": 0, "unchanged": 0}
+# Output frame path → content hash, from the previous build (read-only in
+# workers) and for the current generator (returned to the parent).
+_PREV_FRAMES: dict[str, str] = {}
+_FRAMES: dict[str, str] = {}
+
 # ── Core render / IO helpers ──────────────────────────────────────────────────
 
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:24]
+
 def _read(name: str) -> str:
     with open(f"{SVG_DIR}/{name}", encoding="utf-8") as f:
         return f.read()
 
-def _render(svg_text: str, ss: int = SUPERSAMPLE) -> Image.Image:
-    """Render SVG at native resolution (×ss) → resize to OUT_W × OUT_H."""
+def _rasterize(svg_text: str, ss: int) -> Image.Image:
     png = cairosvg.svg2png(
         bytestring=svg_text.encode(),
         output_width=1280 * ss, output_height=720 * ss,
@@ -50,10 +74,45 @@ def _render(svg_text: str, ss: int = SUPERSAMPLE) -> Image.Image:
         img = img.convert("RGB")
     return img.resize((OUT_W, OUT_H), Image.LANCZOS)
 
+def _render(svg_text: str, ss: int = SUPERSAMPLE, cache: bool = True) -> Image.Image:
+    """Render SVG at native resolution (×ss) → resize to OUT_W × OUT_H.
+
+    Results are cached on disk by a hash of the SVG text, so the same
+    viewBox / blink / critter position is only rasterised once across builds."""
+    if not cache:
+        return _rasterize(svg_text, ss)
+    key = _sha(f"{RENDER_VERSION}|{OUT_W}x{OUT_H}|{ss}|{svg_text}".encode())
+    path = os.path.join(RENDER_DIR, f"{key}.png")
+    if os.path.exists(path):
+        try:
+            img = Image.open(path)
+            img.load()
+            _STATS["cached"] += 1
+            return img.convert("RGB")
+        except OSError:
+            pass  # truncated / corrupt cache entry — re-render below
+    img = _rasterize(svg_text, ss)
+    os.makedirs(RENDER_DIR, exist_ok=True)
+    # Write-then-rename so a concurrent worker never reads a partial PNG
+    tmp = f"{path}.{os.getpid()}.tmp"
+    img.save(tmp, format="PNG")
+    os.replace(tmp, path)
+    _STATS["rendered"] += 1
+    return img
+
 def _save(img: Image.Image, directory: str, n: int) -> None:
     os.makedirs(directory, exist_ok=True)
     stem = os.path.basename(directory)
-    img.save(f"{directory}/{stem}_{n:02d}.png")
+    path = f"{directory}/{stem}_{n:02d}.png"
+    digest = _sha(img.tobytes())
+    _FRAMES[path] = digest
+    # Skip the PNG encode + SD-card write when the frame is byte-identical
+    # to what the previous build left on disk.
+    if _PREV_FRAMES.get(path) == digest and os.path.exists(path):
+        _STATS["unchanged"] += 1
+        return
+    img.save(path)
+    _STATS["written"] += 1
 
 # ── ViewBox normalisation ─────────────────────────────────────────────────────
 
@@ -61,7 +120,7 @@ _VB_CACHE: dict[str, str] = {}
 
 def _content_bbox(svg_text: str):
     """Return (x1, y1, x2, y2) bounding box of non-bg content in output px."""
-    img = _render(svg_text, ss=1)
+    img = _render(svg_text, ss=1, cache=False)
     arr = np.array(img)
     bg  = np.array(BMO_BG_RGB, dtype=int)
     mask = ~np.all(np.abs(arr.astype(int) - bg) < 20, axis=2)
@@ -104,6 +163,10 @@ def _get_vb(name: str) -> str:
         _VB_CACHE[name] = _compute_vb(name)
     return _VB_CACHE[name]
 
+def _vb_entry(name: str) -> tuple:
+    """Worker task: (name, svg content hash, normalised viewBox)."""
+    return name, _sha(_read(name).encode()), _compute_vb(name)
+
 def _apply_vb(svg_text: str, vb: str, dy_px: float = 0, dx_px: float = 0) -> str:
     """Replace viewBox and optionally add bounce/shift offsets (in output px)."""
     parts = list(map(float, vb.split()))
@@ -408,31 +471,120 @@ GENERATORS = [
     gen_error, gen_capturing, gen_warmup,
 ]
 
-if __name__ == "__main__":
-    # Pre-compute all normalised viewBoxes (measures content bbox per SVG)
-    needed = {
-        "smile.svg", "happy.svg", "frown.svg", "cheeky.svg", "hmmm.svg",
-        "side eye.svg", "ooooooh.svg", "shocked and wonder.svg",
-        "tired and happy.svg", "confused and mad.svg", "relax.svg",
-        "meep.svg", "shouting.svg", "exasperated.svg", "dizzy.svg",
-        "heart eyes.svg", "star eyes 2.svg", "open mouth.svg",
-    }
-    print("Computing normalised viewBoxes…")
-    for name in sorted(needed):
-        vb = _get_vb(name)
-        scale_w = 1280 / float(vb.split()[2])
-        print(f"  {name:<30}  scale={scale_w:.3f}  vb={vb}")
-
-    print()
-    for gen in GENERATORS:
-        d = gen.__defaults__[0]
-        print(f"  {d}…", end=" ", flush=True)
-        if os.path.exists(d):
-            shutil.rmtree(d)
-        gen()
-        n = len(glob.glob(f"{d}/*.png"))
-        print(f"{n} frames")
+# SVGs whose normalised viewBox is needed by the generators above
+NEEDED_SVGS = {
+    "smile.svg", "happy.svg", "frown.svg", "cheeky.svg", "hmmm.svg",
+    "side eye.svg", "ooooooh.svg", "shocked and wonder.svg",
+    "tired and happy.svg", "confused and mad.svg", "relax.svg",
+    "meep.svg", "shouting.svg", "exasperated.svg", "dizzy.svg",
+    "heart eyes.svg", "star eyes 2.svg", "open mouth.svg",
+}
+
+def _load_manifest():
+    """Return (viewboxes, frames) from the previous build, or empty dicts."""
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}, {}
+    if manifest.get("version") != RENDER_VERSION:
+        return {}, {}
+    return manifest.get("viewboxes", {}), manifest.get("frames", {})
+
+def _save_manifest(viewboxes: dict, frames: dict) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": RENDER_VERSION, "viewboxes": viewboxes,
+                   "frames": frames}, f, indent=1, sort_keys=True)
+    os.replace(tmp, MANIFEST_PATH)
+
+def _run_generator(gen_name: str, vb_cache: dict, prev_frames: dict) -> dict:
+    """Worker task: run one state generator and report what it did."""
+    gen = globals()[gen_name]
+    d = gen.__defaults__[0]
+    _VB_CACHE.clear(); _VB_CACHE.update(vb_cache)
+    _PREV_FRAMES.clear(); _PREV_FRAMES.update(prev_frames)
+    _FRAMES.clear()
+    for k in _STATS:
+        _STATS[k] = 0
+
+    t0 = time.perf_counter()
+    gen()
+    # Drop frames left over from a previous build with more frames
+    for f in glob.glob(f"{d}/*.png"):
+        if f not in _FRAMES:
+            os.remove(f)
+    return {"dir": d, "frames": dict(_FRAMES), "seconds": time.perf_counter() - t0,
+            **_STATS}
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Render BMO face frames from svg_faces/.")
+    parser.add_argument("states", nargs="*",
+                        help="only rebuild these states (e.g. idle speaking); default: all")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true",
+                        help="discard the build cache and re-render every frame")
+    args = parser.parse_args(argv)
+
+    gens = [g for g in GENERATORS
+            if not args.states or os.path.basename(g.__defaults__[0]) in args.states]
+    if args.force and os.path.isdir(CACHE_DIR):
+        shutil.rmtree(CACHE_DIR)
+    viewboxes, frames = _load_manifest()
+
+    t_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        # Only re-measure SVGs whose content changed since the last build
+        stale = [n for n in sorted(NEEDED_SVGS)
+                 if viewboxes.get(n, {}).get("sha") != _sha(_read(n).encode())]
+        print(f"Computing normalised viewBoxes… ({len(stale)} changed, "
+              f"{len(NEEDED_SVGS) - len(stale)} cached)")
+        for name, sha, vb in pool.map(_vb_entry, stale):
+            viewboxes[name] = {"sha": sha, "vb": vb}
+        for name in sorted(NEEDED_SVGS):
+            vb = viewboxes[name]["vb"]
+            scale_w = 1280 / float(vb.split()[2])
+            print(f"  {name:<30}  scale={scale_w:.3f}  vb={vb}")
+        vb_cache = {n: e["vb"] for n, e in viewboxes.items()}
+
+        print()
+        futures = {}
+        for gen in gens:
+            d = gen.__defaults__[0]
+            prev = {p: h for p, h in frames.items() if p.startswith(d + "/")}
+            futures[pool.submit(_run_generator, gen.__name__, vb_cache, prev)] = d
+        results = {}
+        for fut in as_completed(futures):
+            r = fut.result()
+            results[r["dir"]] = r
+            print(f"  {r['dir']}… {len(r['frames'])} frames ({r['seconds']:.1f}s)", flush=True)
+
+    for r in results.values():
+        frames = {p: h for p, h in frames.items() if not p.startswith(r["dir"] + "/")}
+        frames.update(r["frames"])
+    _save_manifest(viewboxes, frames)
 
     for f in glob.glob("faces/**/* *.png", recursive=True):
         os.remove(f)
-    print("\nDone.")
+
+    # Per-state timing report, in generator order
+    wall = time.perf_counter() - t_start
+    print(f"\n  {'state':<20} {'frames':>6} {'rendered':>9} {'cached':>7} "
+          f"{'written':>8} {'time':>7}")
+    totals = {"frames": 0, "rendered": 0, "cached": 0, "written": 0, "seconds": 0.0}
+    for gen in gens:
+        r = results[gen.__defaults__[0]]
+        n = len(r["frames"])
+        print(f"  {os.path.basename(r['dir']):<20} {n:>6} {r['rendered']:>9} "
+              f"{r['cached']:>7} {r['written']:>8} {r['seconds']:>6.1f}s")
+        totals["frames"] += n
+        for k in ("rendered", "cached", "written", "seconds"):
+            totals[k] += r[k]
+    print(f"  {'total':<20} {totals['frames']:>6} {totals['rendered']:>9} "
+          f"{totals['cached']:>7} {totals['written']:>8} {totals['seconds']:>6.1f}s")
+    print(f"\nDone in {wall:.1f}s wall ({args.jobs} worker{'s' if args.jobs != 1 else ''}).")
+
+if __name__ == "__main__":
+    main()
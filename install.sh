@@ -20,7 +20,7 @@ sudo apt update
 sudo apt install -y \
     python3-tk python3-venv libasound2-dev libportaudio2 libopenblas-dev \
     cmake build-essential git curl ffmpeg libssl-dev \
-    libcamera-apps python3-libcamera \
+    libcamera-apps python3-libcamera python3-picamera2 \
     hailo-h10-all  # Hailo-10H PCIe driver, firmware, and runtime
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -1,34 +1,44 @@
 """
-Generate chiptune-style WAV music files for BMO using pure Python wave synthesis.
+Generate chiptune-style WAV music files for BMO with NumPy wave synthesis.
 Each track uses square waves, triangle waves, and simple arpeggios to create
 classic 8-bit sounding melodies. Output is 44100Hz 16-bit PCM mono WAV.
+
+Oscillators and envelopes work on whole notes as arrays, and each track is
+written into one preallocated buffer, so rendering all tracks takes well
+under a second on the Pi (the old per-sample loop took several seconds).
+Output is sample-for-sample identical to that loop; tests/test_chiptunes.py
+checks the parity and benchmarks both versions.
 """
-import struct
-import wave
-import math
-import random
 import os
+import sys
+import wave
+
+import numpy as np
 
 SAMPLE_RATE = 44100
 AMPLITUDE = 0.3  # Keep volume moderate
+ATTACK = 0.005   # seconds
+RELEASE = 0.02
+
+_rng = np.random.default_rng()
 
 def square_wave(freq, t, duty=0.5):
-    """Generate a square wave sample."""
+    """Square wave at times t (seconds, scalar or array)."""
     if freq == 0:
-        return 0.0
-    phase = (t * freq) % 1.0
-    return 1.0 if phase < duty else -1.0
+        return np.zeros_like(t, dtype=np.float64)
+    phase = np.mod(t * freq, 1.0)
+    return np.where(phase < duty, 1.0, -1.0)
 
 def triangle_wave(freq, t):
-    """Generate a triangle wave sample."""
+    """Triangle wave at times t (seconds, scalar or array)."""
     if freq == 0:
-        return 0.0
-    phase = (t * freq) % 1.0
-    return 4.0 * abs(phase - 0.5) - 1.0
+        return np.zeros_like(t, dtype=np.float64)
+    phase = np.mod(t * freq, 1.0)
+    return 4.0 * np.abs(phase - 0.5) - 1.0
 
-def noise(t):
-    """Simple noise generator (seeded per-sample for consistency)."""
-    return random.uniform(-1, 1) * 0.3
+def noise(freq, t):
+    """White noise for percussion; freq is ignored (same signature as the other voices)."""
+    return _rng.uniform(-1, 1, np.shape(t)) * 0.3
 
 def note_freq(note_name):
     """Convert note name to frequency. e.g., 'C4' -> 261.63"""
@@ -44,37 +54,41 @@ def note_freq(note_name):
     semitone = notes[n] + (octave - 4) * 12
     return 440.0 * (2.0 ** ((semitone - 9) / 12.0))
 
+def envelope(duration, num_samples):
+    """Quick linear attack, sustain, linear release over the last RELEASE seconds."""
+    t = np.arange(num_samples) / SAMPLE_RATE
+    env = np.ones(num_samples)
+    tail = t > duration - RELEASE
+    env[tail] = np.maximum(0, (duration - t[tail]) / RELEASE)
+    head = t < ATTACK
+    env[head] = t[head] / ATTACK
+    return t, env
+
 def render_melody(notes_list, wave_func, bpm=140, volume=0.3):
-    """Render a list of (note, beats) into samples."""
-    samples = []
+    """Render a list of (note, beats) into a float64 sample array."""
     beat_duration = 60.0 / bpm
-    for note, beats in notes_list:
+    durations = [beat_duration * beats for _note, beats in notes_list]
+    counts = [int(d * SAMPLE_RATE) for d in durations]
+    out = np.empty(sum(counts))
+    pos = 0
+    for (note, _beats), duration, n in zip(notes_list, durations, counts):
         freq = note_freq(note) if note != 'R' else 0
-        duration = beat_duration * beats
-        num_samples = int(duration * SAMPLE_RATE)
-        for i in range(num_samples):
-            t = i / SAMPLE_RATE
-            # Apply envelope: quick attack, sustain, release at end
-            env = 1.0
-            attack = 0.005
-            release = 0.02
-            if t < attack:
-                env = t / attack
-            elif t > duration - release:
-                env = max(0, (duration - t) / release)
-            sample = wave_func(freq, t) * volume * env
-            samples.append(sample)
-    return samples
+        t, env = envelope(duration, n)
+        out[pos:pos + n] = wave_func(freq, t) * volume * env
+        pos += n
+    return out
 
 def mix_tracks(*tracks):
     """Mix multiple tracks together, padding shorter ones with silence."""
-    max_len = max(len(t) for t in tracks)
-    mixed = [0.0] * max_len
+    mixed = np.zeros(max(len(t) for t in tracks))
     for track in tracks:
-        for i, s in enumerate(track):
-            mixed[i] += s
-    # Clamp
-    return [max(-1.0, min(1.0, s)) for s in mixed]
+        mixed[:len(track)] += track
+    return np.clip(mixed, -1.0, 1.0)
+
+def to_pcm16(samples):
+    """Float samples in [-1, 1] -> little-endian int16 bytes (truncating, like int())."""
+    vals = np.trunc(np.asarray(samples) * 32767 * AMPLITUDE / max(AMPLITUDE, 0.01))
+    return np.clip(vals, -32768, 32767).astype('<i2').tobytes()
 
 def save_wav(filename, samples):
     """Save samples as 16-bit PCM WAV."""
@@ -82,10 +96,7 @@ def save_wav(filename, samples):
         wf.setnchannels(1)
         wf.setsampwidth(2)
         wf.setframerate(SAMPLE_RATE)
-        for s in samples:
-            val = int(s * 32767 * AMPLITUDE / max(AMPLITUDE, 0.01))
-            val = max(-32768, min(32767, val))
-            wf.writeframes(struct.pack('<h', val))
+        wf.writeframes(to_pcm16(samples))
     print(f"  Saved: {filename} ({len(samples)/SAMPLE_RATE:.1f}s, {os.path.getsize(filename)/1024:.0f}KB)")
 
 
@@ -256,8 +267,19 @@ def generate_lullaby():
     return mix_tracks(mel, bas)
 
 
+TRACKS = [
+    ("bmo_adventure.wav", generate_bmo_adventure, "Cheerful adventure melody"),
+    ("pixel_dance.wav", generate_pixel_dance, "Upbeat dance with arpeggios"),
+    ("starry_night.wav", generate_starry_night, "Dreamy stargazing melody"),
+    ("robot_march.wav", generate_robot_march, "Marching mission tune"),
+    ("victory_fanfare.wav", generate_game_over_fanfare, "Triumphant victory jingle"),
+    ("bmo_lullaby.wav", generate_lullaby, "Gentle lullaby"),
+]
+
+
 if __name__ == '__main__':
-    output_dir = r'c:\Users\clevercode\OneDrive - Moores\Documents\GitHub\be-more-agent\sounds\music'
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sounds', 'music')
     
     # Remove corrupt stub files
     stubs = ['adventure_time.wav', 'bmo_jams.wav', 'chiptune_boss.wav']
@@ -271,22 +293,13 @@ if __name__ == '__main__':
     print()
     print("Generating chiptune tracks...")
     
-    tracks = [
-        ("bmo_adventure.wav", generate_bmo_adventure, "Cheerful adventure melody"),
-        ("pixel_dance.wav", generate_pixel_dance, "Upbeat dance with arpeggios"),
-        ("starry_night.wav", generate_starry_night, "Dreamy stargazing melody"),
-        ("robot_march.wav", generate_robot_march, "Marching mission tune"),
-        ("victory_fanfare.wav", generate_game_over_fanfare, "Triumphant victory jingle"),
-        ("bmo_lullaby.wav", generate_lullaby, "Gentle lullaby"),
-    ]
-    
-    for filename, generator, desc in tracks:
+    for filename, generator, desc in TRACKS:
         print(f"\n  Generating: {desc}...")
         samples = generator()
         filepath = os.path.join(output_dir, filename)
         save_wav(filepath, samples)
     
-    print(f"\nDone! Generated {len(tracks)} new chiptune tracks.")
+    print(f"\nDone! Generated {len(TRACKS)} new chiptune tracks.")
     print(f"\nFinal music directory contents:")
     for f in sorted(os.listdir(output_dir)):
         size = os.path.getsize(os.path.join(output_dir, f))
@@ -3,6 +3,8 @@ const chatHistory = document.getElementById('chat-history');
 const userInput = document.getElementById('user-input');
 const sendBtn = document.getElementById('send-btn');
 const micBtn = document.getElementById('mic-btn');
+const photoBtn = document.getElementById('photo-btn');
+const photoInput = document.getElementById('photo-input');
 const faceCanvas = document.getElementById('bmo-face-canvas');
 const audioToggle = document.getElementById('audio-toggle');
 const handsFreeToggle = document.getElementById('hands-free-toggle');
@@ -92,6 +94,8 @@ class BMOFaceRenderer {
 const bmoRenderer = new BMOFaceRenderer(faceCanvas);
 bmoRenderer.render();
 
+// Reply audio is served as Ogg/Opus when this browser can play it (much smaller than WAV)
+const OPUS_OK = new Audio().canPlayType('audio/ogg; codecs="opus"') !== '';
 let conversationHistory = []; let currentAudio = null; let soundFiles = {}; let isRecording = false;
 let screensaverActive = false; let currentMood = 'neutral'; let lastMoodChange = 0;
 const MOOD_DURATION = 300000;
@@ -143,6 +147,7 @@ async function sendAudioToBMO(blob) {
     try {
         const response = await fetch('/api/transcribe', { method: 'POST', body: formData });
         const data = await response.json();
+        if (data.timings) console.debug("STT timings (ms):", data.timings);
         if (data.text) {
             userInput.value = data.text;
             sendMessage();
@@ -175,33 +180,102 @@ async function sendMessage() {
             })
         });
 
-        const data = await response.json();
-        if (data.response) {
-            addMessage(marked.parse(data.response), 'bmo', true);
-            conversationHistory = data.history;
-
-            if (data.audio_url && !audioToggle.checked) {
-                setFaceState('speaking');
-                if (currentAudio) currentAudio.pause();
-                currentAudio = new Audio(data.audio_url);
-                setupVisualizer(currentAudio);
-                currentAudio.onended = () => {
-                    setFaceState('idle');
-                    if (handsFreeToggle.checked) {
-                        setTimeout(startRecording, 500);
-                    }
-                };
-                currentAudio.play();
-            } else {
-                setFaceState('idle');
-            }
-        }
+        handleReply(await response.json());
     } catch (err) {
         console.error("Chat error:", err);
         setFaceState('error');
     }
 }
 
+// Vision: photos are downscaled in the browser to the VLM's input size and
+// posted as a small JPEG, instead of a full-size base64 data URI in JSON.
+const FALLBACK_LONG_SIDE = 672; // until the server has loaded the VLM and knows its frame shape
+let visionInfo = null;
+
+async function getVisionInfo() {
+    if (visionInfo && visionInfo.frame_shape) return visionInfo;
+    try {
+        const r = await fetch('/api/vision/info');
+        visionInfo = await r.json();
+    } catch (e) { }
+    return visionInfo || {};
+}
+
+async function downscalePhoto(file, frameShape) {
+    let bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' });
+    let width, height;
+    if (frameShape) {
+        // The server resizes to exactly this (no crop), so do the same here
+        [height, width] = frameShape;
+    } else {
+        const scale = Math.min(1, FALLBACK_LONG_SIDE / Math.max(bitmap.width, bitmap.height));
+        width = Math.round(bitmap.width * scale);
+        height = Math.round(bitmap.height * scale);
+    }
+    try {
+        // Browsers that support it resample off the main thread, with better filtering
+        const resized = await createImageBitmap(bitmap, { resizeWidth: width, resizeHeight: height, resizeQuality: 'high' });
+        bitmap.close();
+        bitmap = resized;
+    } catch (e) { }
+    const canvas = document.createElement('canvas');
+    canvas.width = width;
+    canvas.height = height;
+    const ctx = canvas.getContext('2d');
+    ctx.imageSmoothingQuality = 'high';
+    ctx.drawImage(bitmap, 0, 0, width, height);
+    bitmap.close();
+    return new Promise((resolve) => canvas.toBlob(resolve, 'image/jpeg', 0.9));
+}
+
+async function sendPhoto(file) {
+    const text = userInput.value.trim() || 'What do you see in this picture?';
+    userInput.value = '';
+    addMessage(`📷 ${text}`, 'user');
+    setFaceState('thinking');
+
+    try {
+        const info = await getVisionInfo();
+        const blob = await downscalePhoto(file, info.frame_shape);
+        const formData = new FormData();
+        formData.append('image', blob, 'photo.jpg');
+        formData.append('message', text);
+        formData.append('history', JSON.stringify(conversationHistory));
+        formData.append('play_on_hardware', audioToggle.checked);
+        const response = await fetch('/api/vision', { method: 'POST', body: formData });
+        handleReply(await response.json());
+    } catch (err) {
+        console.error("Vision error:", err);
+        setFaceState('error');
+    }
+}
+
+function handleReply(data) {
+    if (data.response) {
+        addMessage(marked.parse(data.response), 'bmo', true);
+        conversationHistory = data.history;
+
+        if (data.audio_url && !audioToggle.checked) {
+            setFaceState('speaking');
+            if (currentAudio) currentAudio.pause();
+            currentAudio = new Audio(OPUS_OK ? `${data.audio_url}?codec=opus` : data.audio_url);
+            setupVisualizer(currentAudio);
+            currentAudio.onended = () => {
+                setFaceState('idle');
+                if (handsFreeToggle.checked) {
+                    setTimeout(startRecording, 500);
+                }
+            };
+            currentAudio.play();
+        } else {
+            setFaceState('idle');
+        }
+    } else if (data.error) {
+        addMessage(data.error, 'system');
+        setFaceState('error');
+    }
+}
+
 function addMessage(text, sender, html = false) {
     const msgDiv = document.createElement('div');
     msgDiv.className = `message ${sender}-message`;
@@ -343,6 +417,11 @@ function init() {
     micBtn.addEventListener('touchend', (e) => { e.preventDefault(); stopRecording(); });
 
     sendBtn.addEventListener('click', sendMessage);
+    photoBtn.addEventListener('click', () => photoInput.click());
+    photoInput.addEventListener('change', () => {
+        if (photoInput.files.length) sendPhoto(photoInput.files[0]);
+        photoInput.value = '';
+    });
     userInput.addEventListener('keypress', (e) => { if (e.key === 'Enter') sendMessage(); });
 
     document.addEventListener('mousemove', resetScreensaverTimer);
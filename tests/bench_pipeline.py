@@ -0,0 +1,202 @@
+"""Offline end-to-end benchmark for the Python side of the BMO pipeline.
+
+Starts tests/fake_ollama.py in-process and points LLM_URL and MEMORY_FILE
+at it before core/ is imported. It then drives Brain.think,
+Brain.stream_think, the pre-LLM routes, a long multi-turn session and the
+web endpoints, and prints per-stage latency percentiles from core.tracing.
+No NPU, microphone or network is needed, so it runs on any Linux box:
+
+    python tests/bench_pipeline.py                     # all suites
+    python tests/bench_pipeline.py --ttft 0.5 --tps 8 -n 30 --only stream,history
+    python tests/bench_pipeline.py --json results.json
+
+Piper and whisper aren't faked, so the web /api/chat numbers include a
+failed (fast) Piper spawn when the voice model isn't installed.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_ollama import FakeOllama  # noqa: E402  (tests/ is on sys.path when run as a script)
+
+SUITES = ["think", "stream", "routes", "history", "web"]
+
+PLAIN_INPUTS = [
+    "hi BMO how are you",
+    "tell me about penguins",
+    "what does a banana cost",
+    "who is your best friend",
+    "set a timer for five minutes",
+]
+
+# Pre-LLM routes that don't leave the box (the display_image route runs a
+# real DuckDuckGo image search, so it's left out).
+ROUTE_INPUTS = {
+    "music": "play some music for me",
+    "photo": "what do you see",
+    "chat": "tell me a joke",
+}
+
+
+def _fmt_throughput(label, count, seconds, unit):
+    rate = count / seconds if seconds > 0 else 0.0
+    return f"{label}: {count} {unit} in {seconds:.2f}s ({rate:.2f} {unit}/s)"
+
+
+def bench_think(Brain, tracing, n):
+    t0 = time.perf_counter()
+    for i in range(n):
+        brain = Brain()
+        with tracing.start_turn("think"):
+            brain.think(PLAIN_INPUTS[i % len(PLAIN_INPUTS)])
+    return [_fmt_throughput("think", n, time.perf_counter() - t0, "turns")]
+
+
+def bench_stream(Brain, tracing, n):
+    sentences, chars, short = [], 0, 0
+    t0 = time.perf_counter()
+    for i in range(n):
+        brain = Brain()
+        count = 0
+        with tracing.start_turn("stream"):
+            for chunk in brain.stream_think(PLAIN_INPUTS[i % len(PLAIN_INPUTS)]):
+                if count == 0:
+                    tracing.mark("first_sentence")
+                count += 1
+                chars += len(chunk)
+                # stream_think should never flush fragments under 10 chars
+                # except a trailing remainder / JSON action
+                if len(chunk.strip()) < 10 and not chunk.strip().startswith("{"):
+                    short += 1
+        sentences.append(count)
+    elapsed = time.perf_counter() - t0
+    lines = [
+        _fmt_throughput("stream", n, elapsed, "turns"),
+        _fmt_throughput("stream text", chars, elapsed, "chars"),
+        f"sentences/turn: mean {statistics.mean(sentences):.1f}, max {max(sentences)}",
+    ]
+    if short:
+        lines.append(f"WARNING: {short} chunk(s) shorter than 10 chars were flushed")
+    return lines
+
+
+def bench_routes(Brain, tracing, n):
+    lines = []
+    for intent, text in ROUTE_INPUTS.items():
+        t0 = time.perf_counter()
+        for _ in range(n):
+            brain = Brain()
+            with tracing.start_turn(f"route:{intent}"):
+                for i, _chunk in enumerate(brain.stream_think(text)):
+                    if i == 0:
+                        tracing.mark("first_sentence")
+        lines.append(_fmt_throughput(f"route {intent}", n, time.perf_counter() - t0, "turns"))
+    return lines
+
+
+def bench_history(Brain, tracing, n):
+    """One Brain for many turns: history growth/trimming must not slow turns down."""
+    brain = Brain()
+    per_turn = []
+    turns = max(n, 20)
+    for i in range(turns):
+        t = time.perf_counter()
+        with tracing.start_turn("history"):
+            for _chunk in brain.stream_think(PLAIN_INPUTS[i % len(PLAIN_INPUTS)]):
+                pass
+        per_turn.append(time.perf_counter() - t)
+    k = max(1, turns // 5)
+    first, last = statistics.mean(per_turn[:k]), statistics.mean(per_turn[-k:])
+    return [
+        f"history: {turns} turns, final history length {len(brain.history)} messages",
+        f"history: first {k} turns avg {first * 1000:.0f} ms, last {k} avg {last * 1000:.0f} ms "
+        f"({(last / first - 1) * 100:+.0f}%)",
+    ]
+
+
+def bench_web(Brain, tracing, n):
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError as e:
+        return [f"web: skipped ({e})"]
+    cwd = os.getcwd()
+    os.chdir(ROOT)  # web_app mounts static/, faces/, sounds/ relative to cwd
+    try:
+        import web_app
+        client = TestClient(web_app.app)
+        t0 = time.perf_counter()
+        for i in range(n):
+            with tracing.start_turn("web_chat_client"):
+                r = client.post("/api/chat", json={
+                    "message": PLAIN_INPUTS[i % len(PLAIN_INPUTS)], "history": [], "play_on_hardware": False,
+                })
+                r.raise_for_status()
+        lines = [_fmt_throughput("web /api/chat", n, time.perf_counter() - t0, "requests")]
+        t0 = time.perf_counter()
+        for _ in range(n):
+            client.get("/api/status").raise_for_status()
+        lines.append(_fmt_throughput("web /api/status", n, time.perf_counter() - t0, "requests"))
+        return lines
+    finally:
+        os.chdir(cwd)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline BMO pipeline benchmark (fake Ollama).")
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--ttft", type=float, default=0.3, help="fake LLM time-to-first-token (s)")
+    parser.add_argument("--tps", type=float, default=15.0, help="fake LLM tokens per second")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"comma-separated subset of {SUITES}")
+    parser.add_argument("--json", help="also write the summaries to this file")
+    args = parser.parse_args(argv)
+
+    server = FakeOllama(ttft=args.ttft, tokens_per_sec=args.tps).start()
+    tmp = tempfile.mkdtemp(prefix="bmo-bench-")
+    os.environ["LLM_URL"] = server.url
+    os.environ["MEMORY_FILE"] = os.path.join(tmp, "memory.json")
+
+    # Imported only now so core.config picks up the overrides above
+    from core.llm import Brain
+    from core import tracing
+
+    print(f"Fake Ollama at {server.url} — ttft {args.ttft}s, {args.tps} tok/s, {args.iterations} iterations\n")
+    suites = {"think": bench_think, "stream": bench_stream, "routes": bench_routes,
+              "history": bench_history, "web": bench_web}
+    results = {}
+    try:
+        for name in [s.strip() for s in args.only.split(",") if s.strip()]:
+            if name not in suites:
+                parser.error(f"unknown suite {name!r}")
+            lines = suites[name](Brain, tracing, args.iterations)
+            print(f"== {name} ==")
+            for line in lines:
+                print(line)
+            print()
+            results[name] = {"notes": lines}
+    finally:
+        server.stop()
+
+    tracer = tracing.get_tracer()
+    kinds = sorted({t["kind"] for t in tracer.turns})
+    for kind in kinds:
+        print(f"-- {kind} --")
+        print(tracer.format_table(kind=kind))
+        print()
+    if args.json:
+        for kind in kinds:
+            results.setdefault("latency", {})[kind] = tracer.summary(kind=kind)
+        results["llm_requests"] = server.requests
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
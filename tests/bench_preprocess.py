@@ -0,0 +1,111 @@
+"""Benchmark VLM image preprocessing on phone-sized JPEGs.
+
+Compares the old _decode_image_to_frame path with core.frames.decode_frame.
+The old path did a full-size imdecode, then cvtColor, then an INTER_LINEAR
+resize. The new path uses a reduced-scale decode, an INTER_AREA resize into
+a pooled buffer and an in-place RGB swap. Test images are synthetic
+(gradients plus noise, so the JPEG entropy is realistic) and are encoded at
+quality 90. Quality is reported as PSNR against a full-resolution
+INTER_AREA resize, the best a plain resize can do.
+
+    python tests/bench_preprocess.py
+    python tests/bench_preprocess.py -n 50 --shape 448x448 --image my_photo.jpg
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.frames import FramePool, decode_frame  # noqa: E402
+
+PHONE_SIZES = {
+    "12MP 4:3": (4032, 3024),
+    "12MP 3:4": (3024, 4032),
+    "48MP 4:3": (8064, 6048),
+    "1080p": (1920, 1080),
+}
+
+
+def synthetic_jpeg(width, height, quality=90, seed=0):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    img = np.empty((height, width, 3), dtype=np.float32)
+    img[..., 0] = 128 + 100 * np.sin(x / 97.0) * np.cos(y / 131.0)
+    img[..., 1] = 255 * x / width
+    img[..., 2] = 255 * y / height
+    img += rng.normal(0, 12, img.shape).astype(np.float32)
+    ok, data = cv2.imencode(".jpg", np.clip(img, 0, 255).astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    assert ok
+    return data.tobytes()
+
+
+def old_decode(data, shape):
+    """_decode_image_to_frame before core/frames.py."""
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    h, w = shape[:2]
+    if img.shape[0] != h or img.shape[1] != w:
+        img = cv2.resize(img, (w, h), interpolation=cv2.INTER_LINEAR)
+    return img.astype(np.uint8)
+
+
+def reference(data, shape):
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    img = cv2.resize(img, (shape[1], shape[0]), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+def psnr(a, b):
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def timed(fn, n):
+    samples = []
+    for _ in range(n):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="VLM preprocessing benchmark.")
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--shape", default="336x336", help="VLM input WxH (Qwen2-VL on Hailo: 336x336)")
+    parser.add_argument("--image", action="append", help="benchmark this file too (repeatable)")
+    args = parser.parse_args(argv)
+    w, h = (int(v) for v in args.shape.lower().split("x"))
+    shape = (h, w, 3)
+
+    images = {name: synthetic_jpeg(*size) for name, size in PHONE_SIZES.items()}
+    for path in args.image or []:
+        with open(path, "rb") as f:
+            images[os.path.basename(path)] = f.read()
+
+    pool = FramePool()
+    print(f"target {w}x{h}, median of {args.iterations} runs, {cv2.getNumThreads()} OpenCV threads\n")
+    print(f"{'image':<16}{'KB':>7}{'old':>10}{'new':>10}{'speed-up':>10}{'PSNR old':>10}{'PSNR new':>10}")
+    for name, data in images.items():
+        def new_decode():
+            buf = pool.acquire(shape)
+            decode_frame(data, shape, out=buf)
+            pool.release(buf)
+
+        t_old = timed(lambda: old_decode(data, shape), args.iterations)
+        t_new = timed(new_decode, args.iterations)
+        ref = reference(data, shape)
+        print(f"{name:<16}{len(data) // 1024:>7}{t_old:>8.1f}ms{t_new:>8.1f}ms{t_old / t_new:>9.1f}x"
+              f"{psnr(old_decode(data, shape), ref):>8.1f}dB{psnr(decode_frame(data, shape), ref):>8.1f}dB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Stand-in for hailo-ollama's /api/chat, for benchmarking without an NPU.
+
+Serves canned replies with a configurable time-to-first-token and token
+rate, in both streaming (NDJSON) and non-streaming form, so the whole
+Python side of the pipeline can be timed on any Linux box:
+
+    python tests/fake_ollama.py --port 8000 --ttft 0.35 --tps 12
+
+or from code:
+
+    server = FakeOllama(ttft=0.35, tokens_per_sec=12).start()
+    os.environ["LLM_URL"] = server.url   # before importing core.*
+    ...
+    server.stop()
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLIES = [
+    "Hi friend! BMO is so happy to see you today. Do you want to play a game?",
+    "Ooh, that is a great question! Penguins cannot fly, but they are amazing swimmers. "
+    "They can dive really deep. BMO thinks that is very cool!",
+    "The price is $4.99 at the store. Dr. Bubblegum says that is a fair deal, e.g. for candy.\n\n"
+    "BMO would buy two!",
+    "Let me think... Football says hello! BMO is a little robot, but BMO has a big heart.",
+    'BMO will set that for you!\n{"action": "set_timer", "minutes": 5, "message": "Timer is up!"}',
+]
+
+# Words + trailing whitespace/punctuation, roughly how a BPE tokenizer streams
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text)
+
+
+class FakeOllama:
+    """Threaded fake Ollama server. Replies are picked round-robin."""
+
+    def __init__(self, host="127.0.0.1", port=0, ttft=0.3, tokens_per_sec=15.0, replies=None):
+        self.ttft = ttft
+        self.tokens_per_sec = tokens_per_sec
+        self.replies = list(replies or DEFAULT_REPLIES)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._next = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/chat"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="fake-ollama")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def next_reply(self):
+        with self._lock:
+            self.requests += 1
+            reply = self.replies[self._next % len(self.replies)]
+            self._next += 1
+            return reply
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass  # keep benchmark output clean
+
+            def do_GET(self):
+                if self.path in ("/", "/api/tags"):
+                    body = b'{"models": [{"name": "fake"}]}' if self.path == "/api/tags" else b"Ollama is running"
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                if self.path != "/api/chat":
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    req = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self.send_error(400)
+                    return
+                model = req.get("model", "fake")
+                tokens = tokenize(fake.next_reply())
+                num_predict = (req.get("options") or {}).get("num_predict")
+                if num_predict:
+                    tokens = tokens[:num_predict]
+                per_token = 1.0 / fake.tokens_per_sec if fake.tokens_per_sec > 0 else 0.0
+
+                if req.get("stream", True):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.end_headers()
+                    time.sleep(fake.ttft)
+                    try:
+                        for i, tok in enumerate(tokens):
+                            if i:
+                                time.sleep(per_token)
+                            self._line({"model": model, "message": {"role": "assistant", "content": tok}, "done": False})
+                        self._line({"model": model, "message": {"role": "assistant", "content": ""}, "done": True})
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass
+                    self.close_connection = True
+                else:
+                    time.sleep(fake.ttft + per_token * max(0, len(tokens) - 1))
+                    body = json.dumps({
+                        "model": model,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "done": True,
+                    }).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            def _line(self, obj):
+                self.wfile.write(json.dumps(obj).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Ollama /api/chat server for benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--ttft", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--tps", type=float, default=15.0, help="tokens per second after the first")
+    parser.add_argument("--replies", help="JSON file with a list of canned reply strings")
+    args = parser.parse_args(argv)
+
+    replies = None
+    if args.replies:
+        with open(args.replies) as f:
+            replies = json.load(f)
+    server = FakeOllama(args.host, args.port, args.ttft, args.tps, replies)
+    print(f"Fake Ollama on {server.url} (ttft={args.ttft}s, {args.tps} tok/s)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Concurrent-client load test for web_app.py against the fake Ollama server.
+
+Runs the real FastAPI app under uvicorn on a local port. Several clients
+fire /api/chat at once while a poller hits /api/status every 50 ms. If
+blocking work leaks onto the event loop, status polls stall for a whole LLM
+call and chats finish one after another. With the worker pools, chats
+overlap up to WEB_LLM_WORKERS and status stays in the low milliseconds:
+
+    python tests/load_web.py                     # 4 clients x 3 chats
+    python tests/load_web.py -c 8 -n 5 --ttft 1.5 --max-status-ms 200
+
+Exits non-zero if the status poll p95 exceeds --max-status-ms.
+"""
+import argparse
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_ollama import FakeOllama  # noqa: E402  (tests/ is on sys.path when run as a script)
+from bench_pipeline import PLAIN_INPUTS  # noqa: E402
+from core.tracing import _percentile  # noqa: E402
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _pcts(vals):
+    vals = sorted(vals)
+    return (f"p50 {_percentile(vals, 50) * 1000:.0f} ms, p95 {_percentile(vals, 95) * 1000:.0f} ms, "
+            f"max {vals[-1] * 1000:.0f} ms (n={len(vals)})")
+
+
+def _chat(client, i):
+    t = time.perf_counter()
+    r = client.post("/api/chat", json={
+        "message": PLAIN_INPUTS[i % len(PLAIN_INPUTS)], "history": [], "play_on_hardware": False,
+    })
+    r.raise_for_status()
+    return time.perf_counter() - t
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent /api/chat load test (fake Ollama).")
+    parser.add_argument("-c", "--clients", type=int, default=4)
+    parser.add_argument("-n", "--chats", type=int, default=3, help="chats per client")
+    parser.add_argument("--ttft", type=float, default=1.0, help="fake LLM time-to-first-token (s)")
+    parser.add_argument("--tps", type=float, default=20.0, help="fake LLM tokens per second")
+    parser.add_argument("--max-status-ms", type=float, default=250.0,
+                        help="fail if /api/status p95 under load exceeds this")
+    args = parser.parse_args(argv)
+
+    try:
+        import httpx
+        import uvicorn
+    except ImportError as e:
+        print(f"load_web: skipped ({e})")
+        return 0
+
+    fake = FakeOllama(ttft=args.ttft, tokens_per_sec=args.tps).start()
+    os.environ["LLM_URL"] = fake.url
+    os.environ["MEMORY_FILE"] = os.path.join(tempfile.mkdtemp(prefix="bmo-load-"), "memory.json")
+    os.environ["METRICS_PORT"] = "0"
+    os.chdir(ROOT)  # web_app mounts static/, faces/, sounds/ relative to cwd
+    import web_app  # after the env overrides so core.config picks them up
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(web_app.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True, name="uvicorn").start()
+    while not server.started:
+        time.sleep(0.05)
+    base = f"http://127.0.0.1:{port}"
+    print(f"web_app on {base}, fake Ollama ttft {args.ttft}s / {args.tps} tok/s, "
+          f"{args.clients} clients x {args.chats} chats, {web_app.WEB_LLM_WORKERS} LLM workers\n")
+
+    try:
+        with httpx.Client(base_url=base, timeout=120) as client:
+            single = _chat(client, 0)
+        print(f"single chat (idle server): {single * 1000:.0f} ms")
+
+        chat_times, status_times = [], []
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def poll_status():
+            with httpx.Client(base_url=base, timeout=30) as c:
+                while not done.is_set():
+                    t = time.perf_counter()
+                    c.get("/api/status").raise_for_status()
+                    with lock:
+                        status_times.append(time.perf_counter() - t)
+                    time.sleep(0.05)
+
+        def client_loop(k):
+            with httpx.Client(base_url=base, timeout=120) as c:
+                for j in range(args.chats):
+                    dt = _chat(c, k * args.chats + j)
+                    with lock:
+                        chat_times.append(dt)
+
+        poller = threading.Thread(target=poll_status, daemon=True)
+        poller.start()
+        t0 = time.perf_counter()
+        clients = [threading.Thread(target=client_loop, args=(k,)) for k in range(args.clients)]
+        for t in clients:
+            t.start()
+        for t in clients:
+            t.join()
+        wall = time.perf_counter() - t0
+        done.set()
+        poller.join()
+    finally:
+        server.should_exit = True
+        fake.stop()
+
+    total = len(chat_times)
+    serial = single * total
+    print(f"chats under load: {_pcts(chat_times)}")
+    print(f"wall time: {wall:.2f}s for {total} chats ({total / wall:.2f} chats/s); "
+          f"serialized would be ~{serial:.2f}s -> {serial / wall:.1f}x overlap")
+    print(f"/api/status during load: {_pcts(status_times)}")
+    p95_ms = _percentile(sorted(status_times), 95) * 1000
+    if p95_ms > args.max_status_ms:
+        print(f"FAIL: status p95 {p95_ms:.0f} ms > {args.max_status_ms:.0f} ms — something is blocking the event loop")
+        return 1
+    print("OK: event loop stayed responsive")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
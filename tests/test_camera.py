@@ -0,0 +1,84 @@
+"""Camera capture check, with or without hardware.
+
+With no argument this uses the Pi camera (CAMERA_SOURCE=auto) and prints
+cold and warm capture latency. Pass an image file or directory to run the
+same path against the file-based stand-in camera.
+
+    python tests/test_camera.py                  # Pi camera
+    python tests/test_camera.py bmo_irl.jpg      # stand-in
+    python -m pytest tests/test_camera.py        # stand-in, no hardware
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.camera import CameraService, CameraUnavailable  # noqa: E402
+
+VLM_SHAPE = (336, 336, 3)
+
+
+def _write_image(path, rgb):
+    import cv2
+    cv2.imwrite(path, cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR))
+
+
+def test_file_camera_returns_rgb_at_requested_shape(tmp_path):
+    img = np.zeros((120, 160, 3), dtype=np.uint8)
+    img[..., 0] = 255  # pure red
+    _write_image(str(tmp_path / "red.png"), img)
+    camera = CameraService(str(tmp_path / "red.png"))
+    try:
+        frame = camera.capture(VLM_SHAPE)
+        assert frame.shape == VLM_SHAPE and frame.dtype == np.uint8
+        assert frame[..., 0].min() == 255 and frame[..., 1:].max() == 0
+        assert camera.capture().shape == (480, 640, 3)
+    finally:
+        camera.close()
+
+
+def test_file_camera_cycles_through_a_directory(tmp_path):
+    for i, value in enumerate((10, 200)):
+        _write_image(str(tmp_path / f"{i}.png"), np.full((32, 32, 3), value, dtype=np.uint8))
+    camera = CameraService(str(tmp_path))
+    try:
+        assert [int(camera.capture((32, 32, 3))[0, 0, 0]) for _ in range(3)] == [10, 200, 10]
+    finally:
+        camera.close()
+
+
+def test_missing_source_is_unavailable(tmp_path):
+    camera = CameraService(str(tmp_path / "nothing-here"))
+    try:
+        camera.capture(VLM_SHAPE)
+    except CameraUnavailable:
+        pass
+    else:
+        raise AssertionError("expected CameraUnavailable")
+    finally:
+        camera.close()
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else "auto"
+    camera = CameraService(source)
+    try:
+        for label in ("cold", "warm", "warm"):
+            t = time.perf_counter()
+            frame = camera.capture(VLM_SHAPE)
+            print(f"{label:<5} {(time.perf_counter() - t) * 1000:7.1f} ms  {frame.shape} {frame.dtype}"
+                  f"  mean RGB {frame.reshape(-1, 3).mean(axis=0).round(1)}")
+    except CameraUnavailable as e:
+        print(f"No camera: {e}")
+        return 1
+    finally:
+        camera.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
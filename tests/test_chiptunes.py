@@ -0,0 +1,152 @@
+"""Parity test and benchmark for the NumPy chiptune synth.
+
+scripts/generate_chiptunes.py used to render every sample in a Python loop.
+The reference_* functions below are that loop, kept verbatim so the NumPy
+version can be checked against it: every track must produce byte-identical
+16-bit PCM.
+
+    python tests/test_chiptunes.py            # parity for all tracks + timing
+    python -m pytest tests/test_chiptunes.py  # parity only
+"""
+import os
+import struct
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+import generate_chiptunes as synth  # noqa: E402
+
+SAMPLE_RATE = synth.SAMPLE_RATE
+AMPLITUDE = synth.AMPLITUDE
+
+
+# ── Reference: the original per-sample renderer ─────────────────────────────
+def reference_square_wave(freq, t, duty=0.5):
+    if freq == 0:
+        return 0.0
+    phase = (t * freq) % 1.0
+    return 1.0 if phase < duty else -1.0
+
+
+def reference_triangle_wave(freq, t):
+    if freq == 0:
+        return 0.0
+    phase = (t * freq) % 1.0
+    return 4.0 * abs(phase - 0.5) - 1.0
+
+
+def reference_render_melody(notes_list, wave_func, bpm=140, volume=0.3):
+    samples = []
+    beat_duration = 60.0 / bpm
+    for note, beats in notes_list:
+        freq = synth.note_freq(note) if note != 'R' else 0
+        duration = beat_duration * beats
+        num_samples = int(duration * SAMPLE_RATE)
+        for i in range(num_samples):
+            t = i / SAMPLE_RATE
+            env = 1.0
+            attack = 0.005
+            release = 0.02
+            if t < attack:
+                env = t / attack
+            elif t > duration - release:
+                env = max(0, (duration - t) / release)
+            sample = wave_func(freq, t) * volume * env
+            samples.append(sample)
+    return samples
+
+
+def reference_mix_tracks(*tracks):
+    max_len = max(len(t) for t in tracks)
+    mixed = [0.0] * max_len
+    for track in tracks:
+        for i, s in enumerate(track):
+            mixed[i] += s
+    return [max(-1.0, min(1.0, s)) for s in mixed]
+
+
+def reference_pcm16(samples):
+    out = bytearray()
+    for s in samples:
+        val = int(s * 32767 * AMPLITUDE / max(AMPLITUDE, 0.01))
+        val = max(-32768, min(32767, val))
+        out += struct.pack('<h', val)
+    return bytes(out)
+
+
+class _Reference:
+    """Swap the reference renderer into the synth module for one generate_*() call."""
+
+    def __enter__(self):
+        self._saved = (synth.render_melody, synth.mix_tracks, synth.square_wave, synth.triangle_wave)
+        synth.render_melody = reference_render_melody
+        synth.mix_tracks = reference_mix_tracks
+        synth.square_wave = reference_square_wave
+        synth.triangle_wave = reference_triangle_wave
+        return self
+
+    def __exit__(self, *exc):
+        synth.render_melody, synth.mix_tracks, synth.square_wave, synth.triangle_wave = self._saved
+
+
+def render_both(generator):
+    """(reference PCM, numpy PCM, reference seconds, numpy seconds) for one track."""
+    t = time.perf_counter()
+    with _Reference():
+        ref = reference_pcm16(generator())
+    t_ref = time.perf_counter() - t
+    t = time.perf_counter()
+    new = synth.to_pcm16(generator())
+    t_new = time.perf_counter() - t
+    return ref, new, t_ref, t_new
+
+
+# ── Tests ────────────────────────────────────────────────────────────────────
+def test_oscillators_match_reference():
+    import numpy as np
+    t = np.arange(2000) / SAMPLE_RATE
+    for freq in (0, 98.0, 440.0, synth.note_freq('F#6')):
+        assert list(synth.square_wave(freq, t)) == [reference_square_wave(freq, x) for x in t]
+        assert list(synth.square_wave(freq, t, duty=0.25)) == [reference_square_wave(freq, x, 0.25) for x in t]
+        assert list(synth.triangle_wave(freq, t)) == [reference_triangle_wave(freq, x) for x in t]
+
+
+def test_envelope_and_short_notes_match_reference():
+    # Notes shorter than attack + release exercise the attack/release overlap
+    notes = [('C5', 0.01), ('R', 0.02), ('A4', 0.05), ('E6', 1)]
+    ref = reference_render_melody(notes, reference_square_wave, bpm=180, volume=0.25)
+    new = synth.render_melody(notes, synth.square_wave, bpm=180, volume=0.25)
+    assert list(new) == ref
+
+
+def test_tracks_are_byte_identical():
+    # The lullaby and the fanfare cover triangle-only, square-only and mixed tracks
+    for name in ("generate_lullaby", "generate_game_over_fanfare", "generate_pixel_dance"):
+        ref, new, _t_ref, _t_new = render_both(getattr(synth, name))
+        assert ref == new, name
+
+
+def main():
+    print(f"{'track':<22}{'samples':>10}{'python':>10}{'numpy':>10}{'speed-up':>10}  parity")
+    total_ref = total_new = 0.0
+    ok = True
+    for filename, generator, _desc in synth.TRACKS:
+        ref, new, t_ref, t_new = render_both(generator)
+        total_ref += t_ref
+        total_new += t_new
+        same = ref == new
+        ok &= same
+        print(f"{filename:<22}{len(new) // 2:>10}{t_ref * 1000:>8.0f}ms{t_new * 1000:>8.1f}ms"
+              f"{t_ref / t_new:>9.0f}x  {'OK' if same else 'MISMATCH'}")
+    print(f"{'all tracks':<22}{'':>10}{total_ref * 1000:>8.0f}ms{total_new * 1000:>8.1f}ms"
+          f"{total_ref / total_new:>9.0f}x")
+    test_oscillators_match_reference()
+    test_envelope_and_short_notes_match_reference()
+    print("PASS" if ok else "FAIL: NumPy output differs from the reference renderer")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
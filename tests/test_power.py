@@ -0,0 +1,90 @@
+"""Idle power governor and wake gate checks (core/power.py).
+
+    python tests/test_power.py           # share of a simulated night the model runs on
+    python -m pytest tests/test_power.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.power import ACTIVE, IDLE, NIGHT, PowerGovernor, WakeGate, in_quiet_hours  # noqa: E402
+
+CHUNK = 3840  # 80 ms at 48 kHz, as the agent reads it
+rng = np.random.default_rng(0)
+
+
+def noise(level):
+    return (rng.normal(0, level, CHUNK)).astype(np.int16)
+
+
+def speech(level=3000):
+    t = np.arange(CHUNK) / 48000
+    return (level * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 200, CHUNK)).astype(np.int16)
+
+
+def _at(hour):
+    return time.struct_time((2026, 1, 1, hour, 0, 0, 3, 1, -1))
+
+
+def test_quiet_hours_wrap_midnight():
+    assert [in_quiet_hours(h, (22, 8)) for h in (21, 22, 3, 8)] == [False, True, True, False]
+    assert [in_quiet_hours(h, (13, 15)) for h in (12, 13, 15)] == [False, True, False]
+
+
+def test_governor_modes():
+    gov = PowerGovernor((22, 8), idle_frame_ms=250, night_frame_ms=500, gate="night")
+    assert gov.mode == ACTIVE and gov.frame_interval(40) == 40
+    assert gov.update(True, _at(14)) == ACTIVE and gov.mode == IDLE
+    assert gov.frame_interval(120) == 250 and not gov.gate_enabled and not gov.churn_paused
+    assert gov.update(True, _at(14)) is None
+    gov.update(True, _at(23))
+    assert gov.mode == NIGHT and gov.frame_interval(120) == 500 and gov.gate_enabled and gov.churn_paused
+    gov.wakeup("mic")
+    gov.update(False)
+    assert gov.mode == ACTIVE and not gov.gate_enabled
+    report = gov.report()
+    assert set(report) == {ACTIVE, IDLE, NIGHT} and report[NIGHT]["by_source"].keys() == {"mic"}
+
+
+def test_gate_skips_quiet_room_and_replays_onset():
+    gate = WakeGate(attack=2, hangover_s=0.4, preroll=4)
+    assert all(gate.feed(noise(30)) == [] for _ in range(50))
+    onset = [speech(), speech()]
+    assert gate.feed(onset[0]) == []
+    passed = gate.feed(onset[1])
+    assert len(passed) == 4 and passed[-2] is onset[0] and passed[-1] is onset[1]
+    # Open until hangover_s of quiet, then shut again
+    assert [len(gate.feed(noise(30))) for _ in range(6)] == [1, 1, 1, 1, 1, 0]
+    assert not gate.is_open
+
+
+def test_gate_ignores_clicks_and_learns_a_noisy_room():
+    gate = WakeGate(attack=2)
+    for _ in range(50):
+        gate.feed(noise(30))
+    assert gate.feed(speech()) == [] and gate.feed(noise(30)) == []  # single click
+    for _ in range(400):
+        gate.feed(noise(800))   # fan comes on: gate opens, the floor catches up within ~30 s
+    assert not gate.is_open and gate.feed(noise(800)) == []
+
+
+def main():
+    gate = WakeGate()
+    night = [noise(60) for _ in range(45000)]          # one hour of a quiet bedroom
+    for start in range(0, len(night), 9000):           # a few noises in the night
+        night[start:start + 5] = [speech() for _ in range(5)]
+    t0 = time.perf_counter()
+    passed = sum(len(gate.feed(c)) for c in night)
+    elapsed = time.perf_counter() - t0
+    print(f"{len(night)} chunks (1 h): model ran on {passed} ({100 * passed / len(night):.2f}%), "
+          f"gate cost {elapsed / len(night) * 1e6:.0f} us/chunk")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""StateBus checks: transition table, waiter wake-up latency, shutdown.
+
+    python tests/test_statebus.py           # prints wake-up latency
+    python -m pytest tests/test_statebus.py
+"""
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.statebus import InvalidTransition, StateBus  # noqa: E402
+
+STATES = {"warmup", "idle", "listening", "speaking", "error"}
+ALLOWED = {"warmup": {"error"}, "listening": {"idle", "speaking"}}
+
+
+def _bus(strict=False):
+    return StateBus("warmup", STATES, ALLOWED, strict=strict)
+
+
+def test_transition_table():
+    bus = _bus()
+    assert bus.set("idle") and bus.state == "idle"
+    assert not bus.set("idle")                  # no change
+    assert bus.set("warmup") and bus.state == "warmup"  # logged, still applied
+    assert not bus.set("nonsense") and bus.state == "warmup"  # never applied
+
+    strict = _bus(strict=True)
+    strict.set("idle")
+    try:
+        strict.set("warmup")
+    except InvalidTransition:
+        assert strict.state == "idle"
+    else:
+        raise AssertionError("expected InvalidTransition")
+
+
+def test_subscribers_see_each_change():
+    bus = _bus()
+    q = bus.subscribe()
+    bus.set("idle", "ready")
+    bus.set("listening")
+    assert [q.get_nowait()[:3] for _ in range(2)] == [("warmup", "idle", "ready"), ("idle", "listening", "")]
+
+
+def _wake_latency(bus, change):
+    woke = []
+
+    def waiter():
+        bus.wait_for(lambda: bus.state == "speaking" or flag.is_set(), timeout=5)
+        woke.append(time.perf_counter())
+
+    flag = threading.Event()
+    t = threading.Thread(target=waiter)
+    t.start()
+    time.sleep(0.05)
+    t0 = time.perf_counter()
+    change(flag)
+    t.join(timeout=5)
+    return woke[0] - t0
+
+
+def test_waiters_wake_on_set_and_notify():
+    bus = _bus()
+    bus.set("idle")
+    assert _wake_latency(bus, lambda _flag: bus.set("speaking")) < 0.05
+
+    bus.set("idle")
+
+    def raise_flag(flag):
+        flag.set()
+        bus.notify()
+    assert _wake_latency(bus, raise_flag) < 0.05
+
+
+def test_wait_while_times_out_and_close_releases():
+    bus = _bus()
+    bus.set("idle")
+    assert not bus.wait_while({"idle"}, timeout=0.05)
+    threading.Timer(0.05, bus.close).start()
+    t0 = time.monotonic()
+    assert not bus.wait_while({"idle"}, timeout=5)
+    assert time.monotonic() - t0 < 1
+    assert not bus.wait_for(lambda: False)      # closed: returns at once
+
+
+def main():
+    bus = _bus()
+    bus.set("idle")
+    samples = []
+    for _ in range(50):
+        samples.append(_wake_latency(bus, lambda _flag: bus.set("speaking")))
+        bus.set("idle")
+    samples.sort()
+    print(f"wake-up after set(): median {samples[25] * 1e6:.0f} us, max {samples[-1] * 1e6:.0f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
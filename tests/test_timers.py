@@ -0,0 +1,63 @@
+"""Timer command parsing and duration wording (core/timers.py).
+
+    python -m pytest tests/test_timers.py
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.timers import format_duration, parse_timer_command  # noqa: E402
+
+
+def test_commands():
+    cases = {
+        "Snooze": ("snooze", 300),
+        "snooze it for 10 minutes please.": ("snooze", 600),
+        "Hey BMO, snooze for 30 seconds": ("snooze", 30),
+        "cancel my timer": ("cancel", False),
+        "Cancel the pasta timer.": ("cancel", False),
+        "please stop the 10 minute alarm": ("cancel", False),
+        "cancel all my timers": ("cancel", True),
+        "What timers do I have?": ("list", None),
+        "what are my reminders": ("list", None),
+        "list timers": ("list", None),
+        "Do I have any alarms set?": ("list", None),
+        "how much time is left on the timer?": ("list", None),
+    }
+    for text, expected in cases.items():
+        assert parse_timer_command(text) == expected, text
+
+
+def test_questions_go_to_the_llm():
+    for text in (
+        "what is the history of alarm clocks",
+        "how many alarms did napoleon set",
+        "which timers are the best kitchen timers",
+        "I always hit snooze in the morning",
+        "why do people snooze their alarms",
+        "stop worrying about alarms",
+        "how much time is left in the game",
+        "set a timer for 5 minutes",
+        "remind me to call mum in an hour",
+    ):
+        assert parse_timer_command(text) is None, text
+
+
+def test_format_duration():
+    assert format_duration(1) == "1 second"
+    assert format_duration(59.6) == "1 minute"
+    assert format_duration(90) == "2 minutes"
+    assert format_duration(3600) == "1 hour"
+    assert format_duration(3900) == "1 hour 5 minutes"
+    assert format_duration(7199) == "2 hours"
+    assert format_duration(3569) == "59 minutes"
+    assert format_duration(3571) == "1 hour"
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"ok  {name}")
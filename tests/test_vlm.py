@@ -0,0 +1,219 @@
+"""VLMWorker and answer-cache checks with a fake VLM in place of the Hailo
+one (core/vlm.py, Brain.stream_analyze_image).
+
+    python -m pytest tests/test_vlm.py
+"""
+import contextlib
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core import vlm as vlm_module  # noqa: E402
+from core.vlm import AnswerCache, VLMTimeout, VLMUnavailable, VLMWorker  # noqa: E402
+
+
+class FakeVLM:
+    """Streams `answer` word by word, waiting on `gate` before each token."""
+
+    def __init__(self, answer="I see a cat.", token_s=0.0, text_only_ok=True):
+        self.answer = answer
+        self.token_s = token_s
+        self.text_only_ok = text_only_ok
+        self.gate = threading.Event()
+        self.gate.set()
+        self.calls = []       # (prompt, number of frames)
+        self.clears = 0
+
+    def input_frame_shape(self):
+        return (336, 336, 3)
+
+    def input_frame_format_type(self):
+        return "uint8"
+
+    def clear_context(self):
+        self.clears += 1
+
+    @contextlib.contextmanager
+    def generate(self, prompt, frames, temperature, max_generated_tokens):
+        self.calls.append((prompt, len(frames)))
+        if not frames and not self.text_only_ok:
+            raise RuntimeError("text-only turn needs a kept context")
+
+        def tokens():
+            for i, word in enumerate(self.answer.split(" ")):
+                self.gate.wait(5)
+                time.sleep(self.token_s)
+                yield word if i == 0 else " " + word   # tokens carry a leading space
+        yield tokens()
+
+
+def _worker(vlm, **kwargs):
+    worker = VLMWorker(lambda: (None, vlm), **kwargs)
+    worker.wait_ready(5)
+    return worker
+
+
+def test_answer_streams():
+    worker = _worker(FakeVLM())
+    assert worker.generate("describe", ["frame"]) == "I see a cat."
+    assert worker.health()["state"] == "ready"
+
+
+def test_full_queue_rejects():
+    vlm = FakeVLM()
+    vlm.gate.clear()                       # first request blocks the worker
+    worker = _worker(vlm, max_queue=1)
+    first = worker.submit("a", ["f"])
+    deadline = time.monotonic() + 2
+    while worker.health()["state"] != "busy" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker.submit("b", ["f"])              # fills the queue
+    try:
+        worker.submit("c", ["f"])
+    except VLMUnavailable:
+        pass
+    else:
+        raise AssertionError("expected VLMUnavailable")
+    vlm.gate.set()
+    first.text()
+
+
+def test_expired_and_cancelled_requests():
+    vlm = FakeVLM("one two three four five six", token_s=0.05)
+    worker = _worker(vlm)
+    slow = worker.submit("a", ["f"], timeout=0.12)
+    try:
+        slow.text()
+    except VLMTimeout:
+        pass
+    else:
+        raise AssertionError("expected VLMTimeout")
+
+    # Waited out in the queue behind a busy worker: never reaches the VLM
+    vlm.gate.clear()
+    blocker = worker.submit("b", ["f"])
+    queued = worker.submit("c", ["f"], timeout=0.05)
+    time.sleep(0.1)
+    vlm.gate.set()
+    try:
+        queued.text()
+    except VLMTimeout:
+        pass
+    else:
+        raise AssertionError("expected VLMTimeout")
+    blocker.text()
+    assert [p for p, _n in vlm.calls] == ["a", "b"]
+
+    # Cancelled mid-answer: the worker stops and clears the context
+    req = worker.submit("d", ["f"])
+    next(iter(req))
+    req.cancel()
+    time.sleep(0.4)
+    assert worker.health()["state"] == "ready" and vlm.clears >= 2
+
+
+def test_missing_hef_is_retried():
+    vlm = FakeVLM()
+    installed = threading.Event()
+
+    def loader():
+        if not installed.is_set():
+            raise FileNotFoundError("no HEF")
+        return None, vlm
+
+    worker = VLMWorker(loader)
+    try:
+        worker.wait_ready(5)
+    except FileNotFoundError:
+        pass
+    else:
+        raise AssertionError("expected FileNotFoundError")
+    installed.set()                        # setup.sh ran meanwhile
+
+    # A caller submitting just as the retry is queued lands behind it
+    racers, answers = [], []
+    real_put = worker._requests.put
+
+    def put(item, *args, **kwargs):
+        if item is vlm_module._RELOAD and not racers:
+            racers.append(threading.Thread(target=lambda: answers.append(worker.generate("racer", ["f"]))))
+            racers[0].start()
+            time.sleep(0.05)
+        real_put(item, *args, **kwargs)
+    worker._requests.put = put
+    assert worker.wait_ready(5) == ((336, 336, 3), "uint8")
+    racers[0].join(5)
+    assert answers == ["I see a cat."]
+    assert worker.generate("describe", ["f"]) == "I see a cat."
+    assert worker.health()["state"] == "ready"
+
+
+# ── Answer cache, through Brain.stream_analyze_image ─────────────────────────
+def _scene(seed=0):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:336, 0:336]
+    img = np.stack([128 + 90 * np.sin(x / 23.0), 128 + 90 * np.cos(y / 31.0), (x + y) % 256], axis=-1)
+    return np.clip(img + rng.normal(0, 3, img.shape), 0, 255).astype(np.uint8)
+
+
+def _look(fake, frame, question):
+    from core.llm import Brain
+
+    brain = Brain.__new__(Brain)  # no memory.json load/save
+    brain.history = []
+    return list(brain.stream_analyze_image(None, question, frame=frame))
+
+
+def _with_fake(fake):
+    vlm_module._worker = _worker(fake)
+    vlm_module._answers = AnswerCache()
+
+
+def test_cache_hit_miss_and_followup():
+    fake = FakeVLM("I see stripes. They are very colourful.")
+    _with_fake(fake)
+    scene = _scene()
+    first = _look(fake, scene, "What do you see?")
+    assert first == ["I see stripes.", "They are very colourful."]
+
+    # Re-shot of the same scene, same question: served from the cache
+    assert _look(fake, _scene(seed=1), "what do you see") == first
+    assert len(fake.calls) == 1
+
+    # Something new held up: a miss, and the image is sent again
+    held = scene.copy()
+    held[120:200, 120:200] = (200, 40, 40)
+    _look(fake, held, "What do you see?")
+    assert fake.calls[-1][1] == 1 and len(fake.calls) == 2
+
+    # Different question about that picture: continues on the kept context
+    _look(fake, held, "What colour is it?")
+    assert fake.calls[-1][1] == 0 and len(fake.calls) == 3
+
+    # Flat frames (dark room) are never treated as the same picture
+    dark = np.full((336, 336, 3), 5, dtype=np.uint8)
+    _look(fake, dark, "What do you see?")
+    _look(fake, dark, "What do you see?")
+    assert len(fake.calls) == 5 and all(n == 1 for _p, n in fake.calls[-2:])
+
+
+def test_rejected_followup_falls_back_to_the_image():
+    fake = FakeVLM("A red square.", text_only_ok=False)
+    _with_fake(fake)
+    scene = _scene()
+    _look(fake, scene, "What do you see?")
+    assert _look(fake, scene, "What shape is it?") == ["A red square."]
+    assert [n for _p, n in fake.calls] == [1, 0, 1]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"ok  {name}")
@@ -1,52 +1,75 @@
-from fastapi import FastAPI, Request, BackgroundTasks, UploadFile, File, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi import FastAPI, Request, BackgroundTasks, UploadFile, File, Form, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, FileResponse, PlainTextResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
+import asyncio
+import contextvars
 import logging
 import os
 import json
-import uuid
-import requests
-import shutil
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 import numpy as np
-import psutil
-import subprocess
 
 # Import our new unified core modules
-from core.llm import Brain, strip_prompt_leakage, extract_json_object
-from core.tts import play_audio_on_hardware, generate_audio_file, add_pronunciation, load_pronunciations, clean_text_for_speech
-from core.stt import transcribe_audio
-from core.config import LLM_URL, WAKE_WORD_MODEL, WAKE_WORD_THRESHOLD
+from core.llm import Brain, extract_json_object
+from core.tts import play_audio_on_hardware, synthesize_wav, add_pronunciation, load_pronunciations, clean_text_for_speech
+from core.stt import decode_upload, transcribe_pcm
+from core import metrics, tracing
+from core.vlm import vlm_health, cache_stats as vlm_cache_stats
+from core.wakeword import get_wakeword_service
+from core.assets import AssetManifest, etag_matches
+from core.audio_store import get_audio_store, encode_opus, parse_range
+from core.config import LLM_URL, METRICS_INTERVAL_S
+from core.config import WEB_LLM_WORKERS, WEB_MEDIA_WORKERS, VISION_MAX_UPLOAD_BYTES
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Try to load openwakeword for web streaming
-try:
-    from openwakeword.model import Model
-    # Initialize the model once for the web app
-    oww_model = Model(wakeword_model_paths=[WAKE_WORD_MODEL])
-    logger.info(f"Loaded OpenWakeWord model: {WAKE_WORD_MODEL}")
-except Exception as e:
-    logger.warning(f"Could not load OpenWakeWord for web app: {e}")
-    oww_model = None
-
 app = FastAPI(title="BMO Web UI")
 
+# Handlers are async, so anything blocking runs elsewhere. LLM calls use one
+# bounded pool and whisper/Piper subprocesses use another. A long chat then
+# can't stall the wake-word socket or status polls of other clients. Light
+# HTTP calls (status checks) go through an httpx AsyncClient.
+_llm_pool = ThreadPoolExecutor(max_workers=WEB_LLM_WORKERS, thread_name_prefix="web-llm")
+_media_pool = ThreadPoolExecutor(max_workers=WEB_MEDIA_WORKERS, thread_name_prefix="web-media")
+_POOL_JOBS = metrics.gauge("bmo_web_pool_jobs", "Jobs queued or running in a web worker pool", ["pool"])
+_POOL_JOBS.set(0, pool="llm")
+_POOL_JOBS.set(0, pool="media")
+_http = None
+
+
+async def _run_in(pool, name, fn, *args):
+    """Await fn(*args) on a worker pool. The caller's contextvars (the active
+    tracing turn) carry over to the worker thread."""
+    ctx = contextvars.copy_context()
+    _POOL_JOBS.inc(pool=name)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, ctx.run, fn, *args)
+    finally:
+        _POOL_JOBS.dec(pool=name)
+
+
+def _get_http() -> httpx.AsyncClient:
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(timeout=2)
+    return _http
+
 # Ensure audio directory exists
 os.makedirs("static/audio", exist_ok=True)
 
 import time as _time
-from collections import deque
-recent_thoughts = deque(maxlen=20) # Cache last 20 thoughts to avoid repeats
 
 AUDIO_DIR = os.path.join("static", "audio")
 AUDIO_MAX_AGE_SECONDS = 300  # 5 minutes
 
 def _cleanup_old_audio():
-    """Remove generated audio files older than AUDIO_MAX_AGE_SECONDS."""
+    """Remove leftover response_*.wav files from before replies moved to the
+    in-memory audio store (run once at startup)."""
     try:
         now = _time.time()
         for f in os.listdir(AUDIO_DIR):
@@ -58,9 +81,52 @@ def _cleanup_old_audio():
     except Exception as e:
         logger.warning(f"Audio cleanup error: {e}")
 
+# System stats, LLM reachability and journal lines are sampled off the
+# request path; /api/debug and /metrics just read the latest sample.
+_collector = metrics.SystemCollector(
+    interval=METRICS_INTERVAL_S,
+    journal_unit="bmo-web",
+    llm_health_url=f"{LLM_URL.split('/api/')[0]}/api/tags",
+)
+
 @app.on_event("startup")
 async def startup_cleanup():
     _cleanup_old_audio()
+    _collector.start()
+    # Load the wake-word ONNX sessions in the background, before the first browser connects
+    asyncio.get_running_loop().run_in_executor(None, get_wakeword_service)
+    _face_assets.start()
+    _sound_assets.start()
+
+@app.on_event("shutdown")
+async def shutdown_clients():
+    if _http is not None:
+        await _http.aclose()
+
+# Face/sound listings are built once (with content hashes) and kept fresh by a
+# watcher, so the listing endpoints never touch the filesystem.
+_face_assets = AssetManifest("faces", "/faces", (".png", ".jpg", ".jpeg"))
+_sound_assets = AssetManifest("sounds", "/sounds", (".wav",))
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+@app.middleware("http")
+async def cache_hashed_assets(request: Request, call_next):
+    """?v=<content hash> asset URLs never change content, so let browsers keep them forever."""
+    response = await call_next(request)
+    if "v" in request.query_params and request.url.path.startswith(("/faces/", "/sounds/")) \
+            and response.status_code in (200, 304):
+        response.headers["Cache-Control"] = IMMUTABLE
+    return response
+
+def _manifest_response(request: Request, manifest: AssetManifest, category: str, key: str):
+    # Unknown categories (including anything path-like) simply aren't in the manifest
+    urls, etag = manifest.get(category)
+    if etag is None:
+        return {key: []}
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse({key: urls}, headers=headers)
 
 # Mount static files (for CSS, JS, images, and audio)
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -74,7 +140,7 @@ class ChatRequest(BaseModel):
     message: str
     history: list = []
     play_on_hardware: bool = False
-    image: str = None # Optional base64 image for vision tasks
+    image: str = None # Optional base64 image (legacy; the UI posts photos to /api/vision)
 
 class PronunciationRequest(BaseModel):
     word: str
@@ -101,65 +167,103 @@ async def get_pronunciations():
 
 @app.get("/api/debug")
 async def get_debug_info():
-    """Get system diagnostics and Hailo status."""
+    """Get system diagnostics and Hailo status (from the background collector)."""
+    sample = _collector.last
     info = {
         "status": "online",
         "system": {
-            "cpu_percent": psutil.cpu_percent(interval=0.1),
-            "memory_percent": psutil.virtual_memory().percent
+            "cpu_percent": sample.get("cpu_percent"),
+            "memory_percent": sample.get("memory_percent"),
+            "cpu_temp_c": sample.get("cpu_temp_c"),
+            "sampled_at": sample.get("ts"),
         },
         "hailo": {
-            "status": "unknown",
-            "error": None
+            "status": sample.get("llm_status", "unknown"),
+            "error": sample.get("llm_error")
         },
-        "logs": []
+        "logs": list(_collector.journal)
     }
-    
-    # Check Hailo/Ollama status
-    try:
-        # Extract base URL from LLM_URL (e.g., http://127.0.0.1:8000)
-        base_url = LLM_URL.split("/api/")[0]
-        response = requests.get(f"{base_url}/api/tags", timeout=2)
-        if response.status_code == 200:
-            info["hailo"]["status"] = "online"
-        else:
-            info["hailo"]["status"] = f"error ({response.status_code})"
-    except Exception as e:
-        info["hailo"]["status"] = "offline"
-        info["hailo"]["error"] = str(e)
-        
-    # Get recent logs from journalctl
-    try:
-        result = subprocess.run(
-            ["journalctl", "-u", "bmo-web", "-n", "10", "--no-pager"],
-            capture_output=True, text=True, timeout=2
-        )
-        info["logs"] = result.stdout.splitlines()
-    except Exception as e:
-        info["logs"] = [f"Could not fetch logs: {e}"]
-        
+
+    from core.search import cache_stats, backend_stats
+    info["search_cache"] = cache_stats()
+    info["search_backends"] = backend_stats()
+    info["latency"] = tracing.get_tracer().summary()
+    info["vlm"] = vlm_health()
+    info["vlm_cache"] = vlm_cache_stats()
+
     return info
 
-@app.post("/api/chat")
-async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
-    """
-    Send text to local LLM (Hailo/Ollama) and get response.
-    """
-    user_text = request.message
-    play_on_hardware = request.play_on_hardware
-    
-    # Initialize brain and load history
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of core.metrics (this worker process)."""
+    return PlainTextResponse(metrics.REGISTRY.exposition(), media_type="text/plain; version=0.0.4")
+
+def _think(request: ChatRequest):
+    """Blocking part of /api/chat: load history and run the LLM (or VLM)."""
     brain = Brain()
     brain.set_history(request.history)
 
     # If an image is provided, use the vision model
     if request.image:
         logger.info("Received image for vision analysis.")
-        content = brain.analyze_image(request.image, user_text)
+        content = brain.analyze_image(request.image, request.message)
     else:
         # Get response from LLM (includes keyword-triggered search and camera detection)
-        content = brain.think(user_text)
-    
+        content = brain.think(request.message)
+    return brain, content
+
+@app.post("/api/chat")
+@tracing.traced("web_chat")
+async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
+    """
+    Send text to local LLM (Hailo/Ollama) and get response.
+    """
+    _mark_user_activity()
+    brain, content = await _run_in(_llm_pool, "llm", _think, request)
+    return await _reply(brain, content, request.play_on_hardware, background_tasks)
+
+def _look(data: bytes, message: str, history: list):
+    """Blocking part of /api/vision: decode the upload and run the VLM."""
+    brain = Brain()
+    brain.set_history(history)
+    return brain, brain.analyze_image(data, message)
+
+@app.get("/api/vision/info")
+async def vision_info():
+    """The VLM's input frame size [h, w, c], so the browser can downscale
+    photos to it before uploading. frame_shape is null until this worker
+    has loaded the model (the first photo does that)."""
+    health = vlm_health()
+    return {
+        "state": health["state"],
+        "frame_shape": health["frame_shape"],
+        "max_upload_bytes": VISION_MAX_UPLOAD_BYTES,
+    }
+
+@app.post("/api/vision")
+@tracing.traced("web_vision")
+async def vision(background_tasks: BackgroundTasks, image: UploadFile = File(...), message: str = Form(""),
+                 history: str = Form("[]"), play_on_hardware: bool = Form(False)):
+    """
+    Ask the VLM about a photo. The image arrives as a multipart file (the UI
+    sends a JPEG already downscaled to /api/vision/info's frame_shape) rather
+    than a base64 data URI inside JSON.
+    """
+    _mark_user_activity()
+    data = await image.read(VISION_MAX_UPLOAD_BYTES + 1)
+    if len(data) > VISION_MAX_UPLOAD_BYTES:
+        return JSONResponse({"error": "Image too large"}, status_code=413)
+    try:
+        history = json.loads(history)
+    except ValueError:
+        history = []
+    if not isinstance(history, list) or not all(isinstance(m, dict) for m in history):
+        history = []
+    brain, content = await _run_in(_llm_pool, "llm", _look, data, message or "What do you see in this image?", history)
+    return await _reply(brain, content, play_on_hardware, background_tasks)
+
+async def _reply(brain, content: str, play_on_hardware: bool, background_tasks: BackgroundTasks):
+    """Shared tail of /api/chat and /api/vision: action detection and TTS."""
     # Check if there was an error
     if content.startswith("Error:") or content.startswith("Could not connect") or content.startswith("I'm having trouble"):
         return {"error": content, "history": brain.get_history()}
@@ -193,16 +297,15 @@ async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
         if not tts_content:
             tts_content = spoken_text  # fallback to raw if cleaning strips everything
 
-        # Periodically clean up old audio files
-        background_tasks.add_task(_cleanup_old_audio)
-
         if play_on_hardware:
             # Play on Pi speakers in the background so we don't block the UI response
             background_tasks.add_task(play_audio_on_hardware, tts_content)
         else:
-            # Generate a WAV file for the browser to play
-            filename = f"response_{uuid.uuid4().hex[:8]}.wav"
-            audio_url = generate_audio_file(tts_content, filename)
+            # Synthesize in memory; the browser fetches it from /api/audio/{id}
+            with tracing.span("tts"):
+                wav = await _run_in(_media_pool, "media", synthesize_wav, tts_content)
+            if wav:
+                audio_url = f"/api/audio/{get_audio_store().put(wav)}"
 
     return {
         "response": content,
@@ -211,66 +314,117 @@ async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
     }
 
 
+def _wants_opus(request: Request) -> bool:
+    # <audio> elements in Chrome send Accept: */*, so the UI also opts in with ?codec=opus
+    return request.query_params.get("codec") == "opus" or "audio/ogg" in request.headers.get("accept", "")
+
+@app.get("/api/audio/{audio_id}")
+async def get_audio(audio_id: str, request: Request):
+    """Serve a synthesized reply from the audio store, with Range support.
+    Clients that can play Opus get an Ogg/Opus copy (encoded once, then cached)."""
+    store = get_audio_store()
+    data, variant = None, "wav"
+    if _wants_opus(request):
+        data = store.get(audio_id, "opus")
+        if data is None:
+            wav = store.get(audio_id, "wav")
+            if wav is not None:
+                try:
+                    data = await _run_in(_media_pool, "media", encode_opus, wav)
+                    store.put(data, "opus", audio_id)
+                except Exception as e:
+                    logger.warning(f"Opus encode failed, serving WAV: {e}")
+                    data = None
+        if data is not None:
+            variant = "opus"
+    if data is None:
+        data = store.get(audio_id, "wav")
+    if data is None:
+        return Response(status_code=404)
+
+    size = len(data)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=600",
+        "Vary": "Accept",
+        "ETag": f'"{audio_id}-{variant}"',
+    }
+    media_type = store.CONTENT_TYPES[variant]
+    rng = parse_range(request.headers.get("range"), size)
+    if rng == "invalid":
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if rng is None:
+        return Response(data, media_type=media_type, headers=headers)
+    start, end = rng
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
 @app.post("/api/transcribe")
+@tracing.traced("web_stt")
 async def transcribe(audio: UploadFile = File(...)):
     """
-    Receive an audio file from the browser, save it temporarily,
-    and transcribe it using whisper.cpp.
+    Receive an audio recording from the browser and transcribe it with
+    whisper.cpp. The upload is decoded and resampled to 16 kHz in memory and
+    piped to whisper, so nothing is written to the SD card. Per-stage
+    timings (ms) come back alongside the text.
     """
-    temp_filename = f"temp_{uuid.uuid4().hex}.webm"
-    temp_filepath = os.path.join("static", "audio", temp_filename)
-    
+    _mark_user_activity()
     try:
-        # Save the uploaded file
-        with open(temp_filepath, "wb") as buffer:
-            shutil.copyfileobj(audio.file, buffer)
-            
-        # Transcribe it
-        text = transcribe_audio(temp_filepath)
-        
-        return {"text": text}
+        data = await audio.read()
+        text, timings = await _run_in(_media_pool, "media", _decode_and_transcribe, data)
+        return {"text": text, "timings": timings}
     except Exception as e:
         logger.error(f"Transcription endpoint error: {e}")
         return {"error": str(e)}
-    finally:
-        # Clean up the original uploaded file
-        if os.path.exists(temp_filepath):
-            try:
-                os.remove(temp_filepath)
-            except Exception as e:
-                logger.warning(f"Could not remove temp file {temp_filepath}: {e}")
+
+def _decode_and_transcribe(data: bytes):
+    """Blocking part of /api/transcribe: decode the upload, then run whisper."""
+    t0 = _time.perf_counter()
+    with tracing.span("decode"):
+        pcm = decode_upload(data)
+    t1 = _time.perf_counter()
+    with tracing.span("stt"):
+        text = transcribe_pcm(pcm)
+    t2 = _time.perf_counter()
+    return text, {
+        "audio_ms": round(len(pcm) / 16.0, 1),
+        "decode_ms": round((t1 - t0) * 1000, 1),
+        "stt_ms": round((t2 - t1) * 1000, 1),
+    }
 
 @app.websocket("/api/wakeword")
 async def websocket_wakeword(websocket: WebSocket):
     """
     WebSocket endpoint for continuous audio streaming from the browser.
     Expects 16kHz 16-bit PCM audio chunks.
+
+    Each connection gets its own streaming state in the shared wake-word
+    service (core/wakeword.py); inference is batched across connections on
+    the service's worker thread, so nothing heavy runs on the event loop.
     """
     await websocket.accept()
-    if oww_model is None:
+    service = await asyncio.to_thread(get_wakeword_service)
+    if service is None:
         await websocket.send_json({"error": "Wake word model not loaded on server."})
         await websocket.close()
         return
 
+    loop = asyncio.get_running_loop()
+    detections = asyncio.Queue()
+    stream = service.open(lambda key, score: loop.call_soon_threadsafe(detections.put_nowait, key))
+
+    async def send_detections():
+        while True:
+            key = await detections.get()
+            logger.info(f"Web Wake Word Detected: {key}")
+            await websocket.send_json({"event": "wakeword_detected", "model": key})
+
+    sender = asyncio.create_task(send_detections())
     try:
         while True:
             # Receive binary audio data (Int16 PCM)
             data = await websocket.receive_bytes()
-            
-            # Convert bytes to numpy array
-            audio_chunk = np.frombuffer(data, dtype=np.int16)
-            
-            # Feed to openwakeword
-            oww_model.predict(audio_chunk)
-            
-            # Check predictions
-            for key in oww_model.prediction_buffer.keys():
-                if oww_model.prediction_buffer[key][-1] > WAKE_WORD_THRESHOLD:
-                    logger.info(f"Web Wake Word Detected: {key}")
-                    await websocket.send_json({"event": "wakeword_detected", "model": key})
-                    oww_model.reset()
-                    break # Only trigger once per chunk
-                    
+            stream.push(np.frombuffer(data, dtype=np.int16))
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected")
     except Exception as e:
@@ -279,6 +433,9 @@ async def websocket_wakeword(websocket: WebSocket):
             await websocket.close()
         except Exception:
             pass
+    finally:
+        sender.cancel()
+        service.close(stream)
 
 @app.get("/api/status")
 async def get_status():
@@ -286,7 +443,7 @@ async def get_status():
     try:
         # Check the base Ollama URL (e.g., http://127.0.0.1:8000)
         base_url = LLM_URL.replace("/api/chat", "")
-        response = requests.get(base_url, timeout=2)
+        response = await _get_http().get(base_url)
         if response.status_code == 200:
             return {"status": "online"}
     except Exception:
@@ -294,179 +451,80 @@ async def get_status():
     return {"status": "offline"}
 
 @app.get("/api/faces/{state}")
-async def get_face(state: str):
+async def get_face(state: str, request: Request):
     """
     Returns a list of image paths for a given state (idle, thinking, speaking, etc.)
+    URLs are content-hashed (?v=...) and the list carries a strong ETag.
     """
-    # Prevent path traversal by rejecting any path separators
-    if "/" in state or "\\" in state or ".." in state:
-        return {"images": []}
-    face_dir = os.path.join("faces", state)
-    if not os.path.exists(face_dir) or not os.path.isdir(face_dir):
-        return {"images": []}
-
-    images = [f"/faces/{state}/{img}" for img in os.listdir(face_dir) if img.endswith(('.png', '.jpg', '.jpeg'))]
-    return {"images": sorted(images)}
+    return _manifest_response(request, _face_assets, state, "images")
 
 @app.get("/api/sounds/{category}")
-async def get_sounds(category: str):
+async def get_sounds(category: str, request: Request):
     """
     Returns a list of sound paths for a given category (greeting_sounds, ack_sounds, thinking_sounds)
+    URLs are content-hashed (?v=...) and the list carries a strong ETag.
     """
-    # Prevent path traversal by rejecting any path separators
-    if "/" in category or "\\" in category or ".." in category:
-        return {"sounds": []}
-    sound_dir = os.path.join("sounds", category)
-    if not os.path.exists(sound_dir) or not os.path.isdir(sound_dir):
-        return {"sounds": []}
+    return _manifest_response(request, _sound_assets, category, "sounds")
+
+# Screensaver thoughts come from a pool so a browser poll rarely waits on
+# topic + search + musing.  Each poll queues one refill on _llm_pool (no NPU
+# work unless a web screensaver is actually open), and only when no
+# chat/transcribe request has arrived for a while.
+_thought_pool = None
+_last_user_activity = 0.0
+
+
+def _mark_user_activity():
+    global _last_user_activity
+    _last_user_activity = _time.time()
+
+
+_thought_refill = None  # Future of the refill running on _llm_pool, if any
+
+
+def _get_thought_pool():
+    # No refill thread (pool.start()) here: it would call the LLM outside
+    # _llm_pool's WEB_LLM_WORKERS bound, once per uvicorn worker.
+    global _thought_pool
+    if _thought_pool is None:
+        from core.thoughts import ThoughtPool
+        _thought_pool = ThoughtPool(
+            capacity=3, idle_check=lambda: _time.time() - _last_user_activity > 30,
+        )
+    return _thought_pool
+
+
+def _refill_thoughts(pool):
+    """Queue one refill on the bounded LLM pool, so the next screensaver
+    request is served from the pool. Skipped if one is already queued."""
+    global _thought_refill
+    if _thought_refill is not None and not _thought_refill.done():
+        return
+    if len(pool) < pool.capacity and pool.idle_check():
+        _thought_refill = _llm_pool.submit(pool.refill_once)
 
-    sounds = [f"/sounds/{category}/{s}" for s in os.listdir(sound_dir) if s.endswith('.wav')]
-    return {"sounds": sorted(sounds)}
 
 @app.get("/api/screensaver-thought")
 async def get_screensaver_thought():
     """Generate a random BMO thought for the web screensaver.
-    Uses web search + local LLM."""
+    Uses web search + local LLM (pre-generated by the thought pool)."""
     import random
-    import re
-    from core.search import search_web, search_images
-    from core.config import LLM_URL, FAST_LLM_MODEL
-
-    fallback_phrases = [
-        "I wonder what Finn and Jake are doing right now.",
-        "Does anyone want to play a video game? No? ...Okay.",
-        "La la la la la... BMO is the best!",
-        "Sometimes BMO just likes to hum a little tune.",
-        "Football... is a tough little guy.",
-        "Is it time for a video game yet? I have a new one!",
-        "I hope everyone is having a wonderful day. Especially you!",
-        "Sometimes I like to just sit and think about... well, everything!",
-        "Being a robot is pretty cool, but being BMO is even better!",
-    ]
-
-    phrase = None
-    image_url = None
+    from core.thoughts import FALLBACK_PHRASES
 
-    try:
-        # 1. Ask the LLM for a random, weird, or interesting topic to search for
-        # This ensures the thoughts are always fresh and diverse.
-        topic = None
+    pool = _get_thought_pool()
+    thought = pool.take()
+    if thought is None:
         try:
-            topic_messages = [
-                {"role": "system", "content": "You are BMO's brain. Suggest one very specific, random, and interesting topic for BMO to learn about today. Examples: 'history of the first toaster', 'why do wombats have square poop', 'the mystery of the Voynich manuscript'. Keep it under 10 words. Provide ONLY the topic, no quotes or preamble."},
-                {"role": "user", "content": "Give me a random topic."}
-            ]
-            topic_payload = {
-                "model": FAST_LLM_MODEL,
-                "messages": topic_messages,
-                "stream": False,
-                "options": {"temperature": 1.0, "num_predict": 20}
-            }
-            import requests as http_requests
-            topic_resp = http_requests.post(LLM_URL, json=topic_payload, timeout=10)
-            if topic_resp.status_code == 200:
-                topic = topic_resp.json().get("message", {}).get("content", "").strip().strip('"').strip("'")
-                # Remove any BMO tags or prefix if the LLM leaked them
-                topic = re.sub(r'^Topic:|^BMO topic:|^I want to learn about: ', '', topic, flags=re.IGNORECASE)
+            thought = await _run_in(_llm_pool, "llm", pool.make_now)
         except Exception as e:
-            logger.warning(f"[SCREENSAVER-WEB] LLM topic generation failed: {e}")
-
-        # Fallback to a fixed list if LLM fails
-        if not topic or len(topic) < 3:
-            search_topics = [
-                "interesting fun fact of the day",
-                "weather forecast today in Brantford, Ontario",
-                "this day in history",
-                "cool science discovery this week",
-                "funny animal fact",
-                "Adventure Time lore or trivia",
-                "latest space news from NASA",
-                "strange laws in Canada",
-                "history of robots",
-                "cool deep sea creatures",
-                "unusual world records",
-                "mysteries of the pyramids",
-                "evolution of video game consoles",
-                "fun facts about penguins",
-            ]
-            topic = random.choice(search_topics)
-            # Avoid picking the same topic too often
-            for _ in range(3):
-                if topic in recent_thoughts:
-                    topic = random.choice(search_topics)
-                else:
-                    break
-        
-        logger.info(f"[SCREENSAVER-WEB] Pondering about: {topic}")
-        search_result = search_web(topic)
-
-        if search_result and search_result not in ("SEARCH_EMPTY", "SEARCH_ERROR"):
-            thought_prompt = (
-                "Read this real-world info, then share a short charming musing "
-                "as BMO (under 50 words, finish the thought).\n"
-                "Wrap your final reply between [BMO] and [/BMO] markers — only "
-                "what's between the markers will be spoken.\n"
-                "If the topic is visual, include ONE JSON action AFTER [/BMO]:\n"
-                '  {"action": "display_image", "subject": "<short visual phrase>"}\n\n'
-                f"Topic: {topic}\n"
-                f"Info: {search_result[:1500]}"
-            )
-            messages = [
-                {"role": "system", "content":
-                 "You are BMO, a cute robot musing to yourself. Always wrap your "
-                 "spoken reply in [BMO]...[/BMO] tags. Be concise and specific."},
-                {"role": "user", "content": thought_prompt},
-            ]
-
-            # Try local LLM
-            try:
-                payload = {
-                    "model": FAST_LLM_MODEL,
-                    "messages": messages,
-                    "stream": False,
-                    "options": {"temperature": 0.8, "num_predict": 256}
-                }
-                resp = http_requests.post(LLM_URL, json=payload, timeout=60)
-                if resp.status_code == 200:
-                    content = resp.json().get("message", {}).get("content", "").strip()
-                    if content and "connect" not in content.lower() and "error" not in content.lower():
-                        # Strip leakage and reasoning
-                        phrase = strip_prompt_leakage(content)
-                        if phrase:
-                            recent_thoughts.append(topic)
-            except Exception as e:
-                logger.warning(f"[SCREENSAVER-WEB] Local LLM failed: {e}")
-
-            # Extract image URL if present (brace-balanced; handles nesting)
-            if phrase:
-                while True:
-                    action_data, span = extract_json_object(phrase)
-                    if action_data is None:
-                        break
-                    if action_data.get("action") == "display_image":
-                        subject = action_data.get("subject") or action_data.get("image_url")
-                        if subject:
-                            if "://" in subject:
-                                image_url = subject
-                            else:
-                                image_url = search_images(subject)
-                        phrase = (phrase[:span[0]] + phrase[span[1]:]).strip()
-                        break  # Only one image
-                    elif "action" in action_data:
-                        # Other action — strip it and keep scanning
-                        phrase = (phrase[:span[0]] + phrase[span[1]:]).strip()
-                    else:
-                        # Bare {} or non-action JSON — stop the loop
-                        break
-                # Final cleanup of the phrase
-                phrase = strip_prompt_leakage(phrase)
-    except Exception as e:
-        logger.error(f"[SCREENSAVER-WEB] Thought generation failed: {e}")
+            logger.error(f"[SCREENSAVER-WEB] Thought generation failed: {e}")
 
-    if not phrase:
-        phrase = random.choice(fallback_phrases)
+    _refill_thoughts(pool)
 
-    return {"thought": phrase, "image_url": image_url}
+    if thought is None:
+        return {"thought": random.choice(FALLBACK_PHRASES), "image_url": None}
+    logger.info(f"[SCREENSAVER-WEB] Pondering about: {thought.topic}")
+    return {"thought": thought.text, "image_url": thought.image_url}
 
 if __name__ == "__main__":
     import uvicorn